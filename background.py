@@ -0,0 +1,182 @@
+"""
+静态背景层
+边框、分割线、网格、固定标题等不随数据变化的界面元素只渲染一次，保存为整屏背景。
+每次刷新先把背景复制到帧缓冲区，再只绘制与数据有关的内容，绘制耗时取决于数据量，
+而不是布局的复杂程度。
+
+指定path时第一次渲染后写入flash文件，之后直接readinto帧缓冲区，不额外占用RAM。
+布局改变后需要换一个文件名(如修改版本号)，否则会继续使用旧文件。
+不指定path时背景保存在RAM中，多占用一块整屏大小的缓冲区(400x300为15000字节)，
+只有gc.mem_free()足够时才分配；否则每次paint()直接重新渲染到帧缓冲区，
+此时cached为False，restore()不能使用。
+
+    def draw_chrome(fb):
+        fb.rect(0, 0, 400, 300, 0)
+        fb.hline(0, 50, 400, 0)
+
+    bg = background.Background(buf, 400, 300, draw_chrome)
+    bg.paint()                  # 整屏复制背景
+    ...                         # 绘制动态内容
+    bg.restore(x, y, w, h)      # 把一个区域恢复为背景，x方向扩展到整字节
+"""
+import framebuf
+import gc
+import log
+
+WHITE = 1
+# 分配RAM背景后至少还要剩余的内存
+RESERVE = 8192
+
+
+def align(x, y, w, h, width, height):
+    """裁剪到画布内并把x方向扩展到整字节，返回 (x, y, w, h)，区域为空时返回None"""
+    x0 = max(x, 0) & ~7
+    y0 = max(y, 0)
+    x1 = min((x + w + 7) & ~7, (width + 7) & ~7)
+    y1 = min(y + h, height)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return x0, y0, x1 - x0, y1 - y0
+
+
+class Background:
+    """整屏静态背景，格式与帧缓冲区相同(MONO_HMSB)
+
+    参数:
+        buf: 目标帧缓冲区(bytearray)，paint()和restore()直接写入它
+        width, height: 画布尺寸
+        draw: draw(fb) 绘制静态元素，调用前fb已用color填充
+        path: flash文件路径，为None时背景在内存足够时保存在RAM中
+        color: 背景底色
+    """
+
+    def __init__(self, buf, width, height, draw, path=None, color=WHITE):
+        self.buf = buf
+        self.width = width
+        self.height = height
+        self.stride = (width + 7) // 8
+        self.draw = draw
+        self.path = path
+        self.color = color
+        # RAM中的背景；flash模式下写入失败时也改用它，内存不足时为None
+        self._data = None
+        # 分配RAM背景失败后为False，invalidate()之前不再尝试
+        self._fits = True
+        # flash文件状态: None为未检查(可能是上次运行保存的)，True为有效，False为需要重新渲染
+        self._saved = None
+        # 实际渲染的次数
+        self.renders = 0
+
+    def _render(self, target):
+        fb = framebuf.FrameBuffer(target, self.width, self.height, framebuf.MONO_HMSB)
+        fb.fill(self.color)
+        self.draw(fb)
+        self.renders += 1
+
+    def _alloc(self):
+        """内存足够时分配RAM背景，返回缓冲区，否则返回None"""
+        if not self._fits:
+            return None
+        size = self.stride * self.height
+        gc.collect()
+        if gc.mem_free() >= size + RESERVE:
+            try:
+                return bytearray(size)
+            except MemoryError:
+                pass
+        log.warn("内存不足，背景不缓存，每次重新渲染")
+        self._fits = False
+        return None
+
+    def _ram(self):
+        if self._data is None:
+            data = self._alloc()
+            if data is not None:
+                self._render(data)
+                self._data = data
+        return self._data
+
+    @property
+    def cached(self):
+        """背景已保存在flash或RAM中，可以restore()局部区域"""
+        return self._data is not None or self._saved is True
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                return f.readinto(self.buf) == len(self.buf)
+        except OSError:
+            return False
+
+    def _save(self):
+        try:
+            with open(self.path, "wb") as f:
+                f.write(self.buf)
+            self._saved = True
+        except OSError as e:
+            log.warn("背景写入flash失败，不再使用flash: %s", e)
+            # 之后不再尝试写入，内存足够时改为保存在RAM中
+            self.path = None
+            data = self._alloc()
+            if data is not None:
+                data[:] = self.buf
+                self._data = data
+
+    def paint(self):
+        """把整个背景复制到帧缓冲区，第一次调用时渲染(或从flash读取)"""
+        if self.path is None or self._data is not None:
+            data = self._ram()
+            if data is not None:
+                self.buf[:] = data
+            else:
+                self._render(self.buf)
+            return
+        if self._saved is not False and self._load():
+            self._saved = True
+            return
+        self._render(self.buf)
+        self._save()
+
+    def restore(self, x, y, w, h):
+        """把一个区域恢复为背景，返回按字节对齐后的区域，区域为空时返回None
+
+        x方向扩展到整字节，区域内原有的内容全部被背景覆盖。需先调用过paint()，
+        且cached为True；背景没有缓存时区域只填充底色。
+        """
+        rect = align(x, y, w, h, self.width, self.height)
+        if rect is None:
+            return None
+        x, y, w, h = rect
+        dst = memoryview(self.buf)
+        n = w >> 3
+        start = y * self.stride + (x >> 3)
+        if self._saved is True and self._data is None:
+            try:
+                with open(self.path, "rb") as f:
+                    d = start
+                    for _ in range(h):
+                        f.seek(d)
+                        f.readinto(dst[d:d + n])
+                        d += self.stride
+                return rect
+            except OSError as e:
+                log.warn("读取背景文件失败，不再使用flash: %s", e)
+                self._saved = False
+                self.path = None
+        data = self._ram()
+        if data is None:
+            fb = framebuf.FrameBuffer(self.buf, self.width, self.height, framebuf.MONO_HMSB)
+            fb.fill_rect(x, y, w, h, self.color)
+            return rect
+        src = memoryview(data)
+        d = start
+        for _ in range(h):
+            dst[d:d + n] = src[d:d + n]
+            d += self.stride
+        return rect
+
+    def invalidate(self):
+        """静态元素改变后调用，下次paint()时重新渲染并覆盖flash文件"""
+        self._data = None
+        self._saved = False
+        self._fits = True
@@ -0,0 +1,215 @@
+"""
+flash点阵字体
+内置的fb.text()只有8x8 ASCII字体。本模块从flash中的二进制字体文件按需读取字形，
+可以绘制任意UTF-8文本(中文等)，不需要把整个字体加载到RAM：
+查找字符时在文件中的索引上二分查找，字形用seek + readinto读入，
+保存在有字节预算的LRU缓存中，之后每个字符只需一次blit。
+
+字体文件由 tool/build_font.py 从TTF/OTF或BDF字体中截取需要的字符生成。
+
+    import bitmap_font
+    with bitmap_font.load("font16.bin") as font:
+        w = font.draw(fb, "连接成功", 20, 50)
+        for i, line in enumerate(font.wrap(text, 360)):
+            font.draw(fb, line, 20, 80 + i * font.height)
+
+字体文件在close()或退出with块之前保持打开。
+
+文件格式(小端):
+    头部12字节: b"EPF1", u16 字高, u16 基线(距顶部), u32 字符数
+    索引: 每个字符8字节，按码点升序: u16 码点, u8 位图宽度, u8 步进宽度, u32 位图偏移
+    位图: MONO_HMSB(面板格式)，逐行存储，每行 (宽度 + 7) // 8 字节，笔画位为1
+只支持基本多文种平面(U+0000~U+FFFF)的字符。
+"""
+import framebuf
+
+MAGIC = b"EPF1"
+HEADER_SIZE = 12
+ENTRY_SIZE = 8
+# 默认的字形缓存上限，16x16字形每个32字节
+MAX_BYTES = 4096
+# 索引查找结果的缓存数量，超过时清空
+MAX_ENTRIES = 256
+
+
+def load(path, max_bytes=MAX_BYTES):
+    """打开字体文件，返回Font；文件不存在时抛出OSError，格式不对时抛出ValueError"""
+    return Font(path, max_bytes)
+
+
+class Font:
+    """flash中的点阵字体，文件在关闭前保持打开，可以用作with的上下文管理器"""
+
+    def __init__(self, path, max_bytes=MAX_BYTES):
+        self._f = open(path, "rb")
+        head = self._f.read(HEADER_SIZE)
+        if len(head) != HEADER_SIZE or head[:4] != MAGIC:
+            self._f.close()
+            raise ValueError("不是EPF1字体文件: %s" % path)
+        self.height = head[4] | head[5] << 8
+        self.baseline = head[6] | head[7] << 8
+        self.count = head[8] | head[9] << 8 | head[10] << 16 | head[11] << 24
+        self.max_bytes = max_bytes
+        self._ent = bytearray(ENTRY_SIZE)
+        # 码点 -> (位图宽度, 步进宽度, 偏移)，字体中没有的字符为None
+        self._entries = {}
+        # 键: (码点, 颜色) -> (FrameBuffer或None, 字节数, 步进宽度)
+        self._cache = {}
+        # 最近使用的键在末尾
+        self._order = []
+        self._bytes = 0
+        # 命中/未命中次数和读取flash的次数
+        self.hits = 0
+        self.misses = 0
+        self.reads = 0
+
+    def close(self):
+        """关闭字体文件并释放缓存"""
+        self.clear()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_entry(self, i):
+        f = self._f
+        f.seek(HEADER_SIZE + i * ENTRY_SIZE)
+        f.readinto(self._ent)
+        self.reads += 1
+        return self._ent
+
+    def _lookup(self, code):
+        """在索引中二分查找码点，返回 (位图宽度, 步进宽度, 偏移)，没有时返回None"""
+        entries = self._entries
+        if code in entries:
+            return entries[code]
+        found = None
+        if code <= 0xFFFF:
+            lo = 0
+            hi = self.count - 1
+            while lo <= hi:
+                mid = (lo + hi) >> 1
+                e = self._read_entry(mid)
+                c = e[0] | e[1] << 8
+                if c < code:
+                    lo = mid + 1
+                elif c > code:
+                    hi = mid - 1
+                else:
+                    found = (e[2], e[3], e[4] | e[5] << 8 | e[6] << 16 | e[7] << 24)
+                    break
+        if len(entries) >= MAX_ENTRIES:
+            entries.clear()
+        entries[code] = found
+        return found
+
+    def glyph(self, ch, color=0):
+        """返回 (FrameBuffer, 步进宽度)：笔画为color，背景为另一色(blit时作为透明色)
+
+        空白字符的FrameBuffer为None，字体中没有的字符返回None。
+        """
+        code = ord(ch)
+        key = (code, color)
+        entry = self._cache.get(key)
+        if entry is not None:
+            self.hits += 1
+            if self._order[-1] != key:
+                self._order.remove(key)
+                self._order.append(key)
+            return entry[0], entry[2]
+        info = self._lookup(code)
+        if info is None:
+            return None
+        self.misses += 1
+        w, adv, off = info
+        gfb = None
+        n = 0
+        if w:
+            n = (w + 7) // 8 * self.height
+            gbuf = bytearray(n)
+            self._f.seek(off)
+            self._f.readinto(gbuf)
+            self.reads += 1
+            if color == 0:
+                # 黑色笔画：笔画位为0，背景为1
+                for i in range(n):
+                    gbuf[i] ^= 0xFF
+            gfb = framebuf.FrameBuffer(gbuf, w, self.height, framebuf.MONO_HMSB)
+        # 超过预算时淘汰最久未用的字形，单个字形超过预算时仍然缓存它自己
+        while self._order and self._bytes + n > self.max_bytes:
+            old = self._order.pop(0)
+            self._bytes -= self._cache.pop(old)[1]
+        self._cache[key] = (gfb, n, adv)
+        self._order.append(key)
+        self._bytes += n
+        return gfb, adv
+
+    def char_width(self, ch):
+        """返回字符的步进宽度"""
+        info = self._lookup(ord(ch))
+        if info is not None:
+            return info[1]
+        return 8 if ord(ch) < 128 else self.height // 2
+
+    def width(self, text):
+        """返回文本绘制的宽度(像素)"""
+        w = 0
+        for ch in text:
+            w += self.char_width(ch)
+        return w
+
+    def draw(self, fb, text, x, y, color=0):
+        """在fb的(x, y)处绘制文本，(x, y)为左上角，只绘制笔画，背景保持不变
+
+        字体中没有的ASCII字符用内置8x8字体代替，其它字符画成空心方框。
+        返回文本绘制的宽度(像素)
+        """
+        key = 1 - color
+        cx = x
+        for ch in str(text):
+            g = self.glyph(ch, color)
+            if g is not None:
+                if g[0] is not None:
+                    fb.blit(g[0], cx, y, key)
+                cx += g[1]
+            elif ord(ch) < 128:
+                fb.text(ch, cx, y + (self.height - 8) // 2, color)
+                cx += 8
+            else:
+                w = self.height // 2
+                fb.rect(cx + 1, y + 1, w - 2, self.height - 2, color)
+                cx += w
+        return cx - x
+
+    def wrap(self, text, max_width):
+        """按宽度把文本拆成多行，返回行列表；遇到换行符时换行，其余位置逐字符断行"""
+        lines = []
+        for para in str(text).split("\n"):
+            line = ""
+            w = 0
+            for ch in para:
+                cw = self.char_width(ch)
+                if line and w + cw > max_width:
+                    lines.append(line)
+                    line = ""
+                    w = 0
+                line += ch
+                w += cw
+            lines.append(line)
+        return lines
+
+    def clear(self):
+        """清空字形缓存，释放内存"""
+        self._cache.clear()
+        self._entries.clear()
+        del self._order[:]
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """返回缓存状态 (字形数, 字节数, 命中, 未命中)"""
+        return len(self._cache), self._bytes, self.hits, self.misses
@@ -6,7 +6,7 @@
 """
 
 
-import epaper4in2
+import display_service
 import config
 import button_control
 from time import sleep_ms
@@ -26,7 +26,8 @@ def clear_cache():
     # 需要清理的模块列表
     modules_to_clear = [
         'wifi_display', 'calendar', 'image', 'http_image_display', 
-        'dashboard', 'todo_list', 'image_data', 'image_dark'
+        'dashboard', 'todo_list', 'image_data', 'image_dark', 'scaled_text',
+        'icons', 'icon_atlas', 'widgets', 'background', 'bitmap_font'
     ]
     
     for m in modules_to_clear:
@@ -40,6 +41,16 @@ def clear_cache():
     gc.collect()
     print(f"内存清理完成，当前空闲: {gc.mem_free()} 字节")
 
+def tune_spi():
+    """使用上次校准的SPI时钟，首次启动时校准一次并保存到闪存"""
+    import spi_tune
+    if spi_tune.apply_saved(config.spi):
+        return
+    print("校准SPI时钟...")
+    e = display_service.epd()
+    e.init()
+    spi_tune.calibrate(e)
+
 # 执行当前模式的应用
 def run_current_mode(mode):
     # 运行前进行垃圾回收
@@ -70,7 +81,7 @@ def run_current_mode(mode):
         sleep_ms(500)
         import image
         from image_data import data
-        image.run(data, width=400, height=300)
+        image.run(data, width=400, height=300, fmt=image.FORMAT_HLSB)
         sleep_ms(1500)
         print("\n播放音乐6")
         system_buzzer.play_song(config.PLAY_SONG_INDEX)
@@ -105,29 +116,23 @@ def run_current_mode(mode):
             size = stat[6]
             print(f"文件大小: {size} 字节")
             
-            f = open('mac.bin', 'rb')
-            # 尝试预分配
-            try:
-                bin_data = bytearray(size)
-                f.readinto(bin_data)
-                f.close()
+            # mac.bin为整屏面板格式数据，直接读入共享帧缓冲区，不再分配15KB的临时缓冲区
+            import display_service
+            import image
+            buf, _ = display_service.framebuffer()
+            if size != len(buf):
+                print(f"BIN文件大小不是整屏 {len(buf)} 字节")
+            else:
+                with open('mac.bin', 'rb') as f:
+                    f.readinto(buf)
                 print("读取BIN文件成功")
-                
-                # 使用image模块显示，400x300是屏幕尺寸
-                import image
-                # 再次回收，为image模块内部buffer腾出空间
-                gc.collect() 
-                image.run(bin_data, width=400, height=300)
-                
-                # 运行完立即释放bin_data
-                bin_data = None
-                gc.collect()
-                
+
+                # 使用image模块显示，400x300是屏幕尺寸，整屏数据直接发送
+                image.run(buf, width=400, height=300)
+
                 sleep_ms(2000)
-            except MemoryError:
-                print("内存不足，无法读取或显示BIN文件")
-                if 'f' in locals(): f.close()
-                
+        except MemoryError:
+            print("内存不足，无法读取或显示BIN文件")
         except OSError as e:
             print(f"Error reading mac.bin: {e}")
     elif mode == 6:
@@ -141,10 +146,7 @@ def run_current_mode(mode):
         # 清空屏幕，显示全白
         print("清空屏幕为白色")
         
-        e = epaper4in2.EPD(config.spi, config.cs, config.dc, config.rst, config.busy)
-        
-        e.pwr_on()
-        e.init()
+        e, _, _ = display_service.acquire()
         e.clear_screen(double_refresh=False)
         
         print("演示完成")
@@ -156,6 +158,9 @@ def run_current_mode(mode):
         sleep_ms(500)
         button_control.btn_irq_flag = False
 
+    # 归还共享显示服务：等待刷新结束并关闭模拟电路
+    display_service.release()
+
     # Clean up memory after mode execution
     gc.collect()
     print(f"Free memory: {gc.mem_free()} bytes")
@@ -164,6 +169,7 @@ def run_current_mode(mode):
 if __name__ == "__main__":
     print("开机音乐")
     system_buzzer.play_song(7)
+    tune_spi()
     current_mode = RUN_MODE
     
     # 模式名称列表
@@ -195,10 +201,7 @@ if __name__ == "__main__":
             if current_mode == 0:
                 clear_cache()
                 print("清空屏幕为白色")
-                e = epaper4in2.EPD(config.spi, config.cs, config.dc, config.rst, config.busy)
-                
-                e.pwr_on()
-                e.init()
+                e, _, _ = display_service.acquire()
                 e.clear_screen(double_refresh=False)
                 
                 print("关机")
@@ -4,22 +4,22 @@
 时段分为：Morning(5:00-12:00), Noon(12:00-14:00), Afternoon(14:00-17:00), Evening(17:00-20:00), Night(20:00-5:00)
 """
 
-import epaper4in2
+import display_service
+import icons
+import background
 import config
+from micropython import const
 from time import sleep_ms, localtime, mktime
-import framebuf
 import gc
+import log
 import wifi
 import button_control
 
-# 初始化墨水屏
-e = epaper4in2.EPD(config.spi, config.cs, config.dc, config.rst, config.busy)
-e.pwr_on()
-e.init()
+# 为1时编译进本模块的调试日志
+_DEBUG = const(0)
 
-# 创建帧缓冲区
-buf = bytearray(config.WIDTH * config.HEIGHT // 8)
-fb = framebuf.FrameBuffer(buf, config.WIDTH, config.HEIGHT, framebuf.MONO_HMSB)
+# 借用共享的墨水屏和帧缓冲区
+e, buf, fb = display_service.acquire()
 
 # 颜色定义
 BLACK = 0
@@ -30,22 +30,9 @@ WEEKDAYS = ["sun", "mon", "tue", "wed", "thu", "fri", "sat"]
 MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", 
           "jul", "aug", "sep", "oct", "nov", "dec"]
 
-# 时段图标 (8x8像素)
-# Morning/Afternoon - 太阳图标
-MORNING_ICON = bytearray(b'\x08\x1C\x22\x41\x41\x22\x1C\x08')
-AFTERNOON_ICON = bytearray(b'\x08\x1C\x22\x41\x41\x22\x1C\x08')
-
-# Noon - 正午太阳（更亮）
-NOON_ICON = bytearray(b'\x3C\x42\x42\x42\x42\x42\x42\x3C')
-
-# Evening/Night - 月亮图标
-EVENING_ICON = bytearray(b'\x08\x1C\x2A\x55\x55\x2A\x1C\x08')
-NIGHT_ICON = bytearray(b'\x08\x1C\x2A\x55\x55\x2A\x1C\x08')
-
-# WiFi图标 (8x8像素)
-# WiFi图标（8×8 像素，文字描述：底部一条横线，中间三竖，顶部一横，呈“Wi-Fi”扇形）
-WIFI_ICON = bytearray([0x00, 0x0E, 0x11, 0x11, 0x11, 0x0A, 0x04, 0x00])
-WIFI_NO_SIGNAL_ICON = bytearray(b'\x00\x0E\x11\x11\x11\x11\x0E\x00')
+# 图标 (8x8像素) 打包在 icon_atlas.py 中，源图见 tool/icons/
+# 时段图标: morning/afternoon 太阳，noon 正午太阳（更亮），evening/night 月亮
+# WiFi图标: signal 已连接，signal_off 无信号
 
 class CalendarApp:
     def __init__(self):
@@ -65,18 +52,25 @@ class CalendarApp:
         self.wifi_connected = False
         self.wifi_signal_strength = None
         
+        # 边框、星期标题和网格线只渲染一次，保存为静态背景
+        path = getattr(config, 'BACKGROUND_DIR', None)
+        if path is not None:
+            path = path.rstrip("/") + "/bg_calendar_v1.bin"
+        self.background = background.Background(buf, config.WIDTH, config.HEIGHT,
+                                                self.draw_chrome, path)
+        
     def get_time_period_icon(self, hour):
-        """根据小时数返回时段对应的图标"""
+        """根据小时数返回时段对应的图标名"""
         if 5 <= hour < 12:
-            return MORNING_ICON
+            return "morning"
         elif 12 <= hour < 14:
-            return NOON_ICON
+            return "noon"
         elif 14 <= hour < 17:
-            return AFTERNOON_ICON
+            return "afternoon"
         elif 17 <= hour < 20:
-            return EVENING_ICON
+            return "evening"
         else:
-            return NIGHT_ICON
+            return "night"
             
     def get_time_period(self, hour):
         """根据小时数返回时段"""
@@ -109,7 +103,7 @@ class CalendarApp:
             else:
                 self.wifi_signal_strength = None
         except Exception as e:
-            print(f"获取WiFi状态失败: {e}")
+            log.warn("获取WiFi状态失败: %s", e)
             self.wifi_connected = False
             self.wifi_signal_strength = None
         
@@ -144,8 +138,8 @@ class CalendarApp:
         
     def draw_calendar(self):
         """绘制日历界面"""
-        # 清空屏幕
-        fb.fill(WHITE)
+        # 复制静态背景，之后只绘制与日期、时段、WiFi有关的内容
+        self.background.paint()
         
         # 绘制顶部标题区域
         self.draw_header()
@@ -156,15 +150,45 @@ class CalendarApp:
         # 绘制底部时间信息
         self.draw_footer()
         
-    def draw_header(self):
-        """绘制顶部标题区域"""
-        # 绘制分割线
+    def draw_chrome(self, fb):
+        """绘制静态背景：标题和底部的分割线、装饰框，星期标题和网格线"""
+        # 网格参数
+        grid_start_y = 70
+        grid_height = 180
+        cell_width = config.WIDTH // 7
+        cell_height = grid_height // 7
+        
+        # 顶部分割线和装饰框
         fb.hline(0, 50, config.WIDTH, BLACK)
+        fb.rect(10, 10, config.WIDTH - 20, 30, BLACK)
+        
+        # 绘制星期标题
+        for i, weekday in enumerate(WEEKDAYS):
+            x = i * cell_width + cell_width // 2 - len(weekday) * 6 // 2
+            y = grid_start_y - 20
+            fb.text(weekday, x, y, BLACK)
+            
+        # 绘制网格线
+        # 水平线
+        for i in range(8):
+            y = grid_start_y + i * cell_height
+            fb.hline(0, y, config.WIDTH, BLACK)
+            
+        # 垂直线
+        for i in range(8):
+            x = i * cell_width
+            fb.vline(x, grid_start_y - 30, grid_height + 30, BLACK)
         
+        # 底部分割线和装饰框
+        fb.hline(0, config.HEIGHT - 50, config.WIDTH, BLACK)
+        fb.rect(10, config.HEIGHT - 45, config.WIDTH - 20, 35, BLACK)
+        
+    def draw_header(self):
+        """绘制顶部标题区域"""
         # 绘制WiFi状态（左上角）
         if self.wifi_connected:
             # 绘制WiFi图标
-            self.draw_icon(WIFI_ICON, 10, 15)
+            self.draw_icon("signal", 10, 15)
             
             # 绘制信号强度条
             if self.wifi_signal_strength is not None:
@@ -197,40 +221,22 @@ class CalendarApp:
                         fb.rect(22 + i * (bar_width + 1), 24 - height, bar_width, height, BLACK)
         else:
             # 绘制无WiFi连接图标
-            self.draw_icon(WIFI_NO_SIGNAL_ICON, 10, 15)
+            self.draw_icon("signal_off", 10, 15)
+        # 背景中装饰框的左边线压在图标第一列上，补画被图标覆盖的部分
+        fb.vline(10, 15, 8, BLACK)
         
         # 绘制年份和月份（居中）
         month_year = f"year {self.current_year} {MONTHS[self.current_month-1]}"
         fb.text(month_year, config.WIDTH // 2 - len(month_year) * 6 // 2, 20, BLACK)
         
-        # 绘制装饰性元素
-        fb.rect(10, 10, config.WIDTH - 20, 30, BLACK)
-        
     def draw_calendar_grid(self):
-        """绘制日历网格"""
+        """在网格中填充日期，网格线和星期标题在静态背景中"""
         # 网格参数
         grid_start_y = 70
         grid_height = 180
         cell_width = config.WIDTH // 7
         cell_height = grid_height // 7
         
-        # 绘制星期标题
-        for i, weekday in enumerate(WEEKDAYS):
-            x = i * cell_width + cell_width // 2 - len(weekday) * 6 // 2
-            y = grid_start_y - 20
-            fb.text(weekday, x, y, BLACK)
-            
-        # 绘制网格线
-        # 水平线
-        for i in range(8):
-            y = grid_start_y + i * cell_height
-            fb.hline(0, y, config.WIDTH, BLACK)
-            
-        # 垂直线
-        for i in range(8):
-            x = i * cell_width
-            fb.vline(x, grid_start_y - 30, grid_height + 30, BLACK)
-            
         # 获取月份信息
         days_in_month = self.get_month_days(self.current_year, self.current_month)
         first_weekday = self.get_first_weekday(self.current_year, self.current_month)
@@ -262,24 +268,12 @@ class CalendarApp:
             if day > days_in_month:
                 break
                 
-    def draw_icon(self, icon_data, x, y, size=8):
-        """绘制8x8像素的图标"""
-        # 创建一个小的帧缓冲区用于图标
-        icon_buf = bytearray(size * size // 8)
-        icon_fb = framebuf.FrameBuffer(icon_buf, size, size, framebuf.MONO_HMSB)
-        
-        # 将图标数据复制到缓冲区
-        for i in range(len(icon_data)):
-            icon_buf[i] = icon_data[i]
-            
-        # 将图标绘制到主帧缓冲区
-        fb.blit(icon_fb, x, y)
+    def draw_icon(self, name, x, y):
+        """绘制8x8像素的图标，黑底白图的方块"""
+        icons.draw(fb, name, x, y, color=WHITE, opaque=True)
         
     def draw_footer(self):
         """绘制底部时间信息"""
-        # 绘制分割线
-        fb.hline(0, config.HEIGHT - 50, config.WIDTH, BLACK)
-        
         # 获取当前时段和图标
         current_period = self.get_time_period(self.current_hour)
         period_icon = self.get_time_period_icon(self.current_hour)
@@ -300,9 +294,6 @@ class CalendarApp:
         # 显示日期
         fb.text(date_str, config.WIDTH // 2 - len(date_str) * 6 // 2, config.HEIGHT - 25, BLACK)
         
-        # 绘制装饰性元素
-        fb.rect(10, config.HEIGHT - 45, config.WIDTH - 20, 35, BLACK)
-        
     def need_refresh(self):
         """检查是否需要刷新（只在时段变化时刷新）"""
         # 获取当前时段
@@ -322,15 +313,15 @@ class CalendarApp:
         
         # 检查是否需要刷新
         if self.need_refresh():
-            print(f"时段变化，执行全局刷新 - {self.last_period}")
+            log.info("时段变化，执行全局刷新 - %s", self.last_period)
             self.draw_calendar()
             e.display_frame(buf, global_refresh=True)
         else:
-            print(f"时段未变化，不刷新 - {self.last_period}")
+            if _DEBUG: log.debug("时段未变化，不刷新 - %s", self.last_period)
             
     def run(self):
         """运行日历应用"""
-        print("启动墨水屏日历应用")
+        log.info("启动墨水屏日历应用")
         
         # 初始化按钮中断
         button_control.init_button_irq()
@@ -352,7 +343,7 @@ class CalendarApp:
                 for _ in range(600):  # 600 * 100ms = 60s
                     # 检查按钮状态
                     if button_control.check_button() == 1:
-                        print("检测到按钮点击，退出日历应用")
+                        log.info("检测到按钮点击，退出日历应用")
                         return  # 退出循环
                     sleep_ms(100)
                 
@@ -360,7 +351,7 @@ class CalendarApp:
                 gc.collect()
                 
             except Exception as e:
-                print(f"发生错误: {e}")
+                log.error("发生错误: %s", e)
                 sleep_ms(5000)
 
 # 创建并运行日历应用
@@ -61,4 +61,11 @@ WEATHER_LAT = 24.8801
 WEATHER_LON = 102.8329
 WEATHER_CITY_NAME = "Kunming"  # 仅用于显示
 
+# 日历、看板的静态背景缓存到flash的目录，每个应用一个15000字节的文件，不占用RAM
+# 设为None时背景保存在RAM中，多占用15000字节，gc.mem_free()不够时不缓存、每次重新渲染
+BACKGROUND_DIR = "/"
+
+# WiFi显示应用使用的点阵字体文件，由tool/build_font.py生成，文件不存在时使用内置字体
+# FONT_PATH = "font16.bin"
+
 
@@ -0,0 +1,85 @@
+"""
+双缓冲显示流水线
+墨水屏刷新第N帧的同时，应用在后台缓冲区绘制第N+1帧或进行网络请求，
+上一帧刷新结束后再提交，两个缓冲区轮流作为前台和后台
+"""
+import framebuf
+
+
+class DisplayPipeline:
+    def __init__(self, epd, auto=True, buf=None):
+        """
+        参数:
+            epd: 已初始化的 epaper4in2.EPD 实例
+            auto: 提交时是否用 display_auto() 按内容变化选择刷新方式，
+                  为False时每帧都执行全局刷新
+            buf: 作为第一个缓冲区的现有整屏缓冲区(如 display_service 的共享缓冲区)，
+                 为None时分配两块
+        """
+        self.epd = epd
+        self.auto = auto
+        size = epd.stride * epd.height
+        if buf is None:
+            buf = bytearray(size)
+        elif len(buf) != size:
+            raise ValueError("buffer size mismatch: %d != %d" % (len(buf), size))
+        self._bufs = (buf, bytearray(size))
+        self._fbs = (framebuf.FrameBuffer(self._bufs[0], epd.width, epd.height, framebuf.MONO_HMSB),
+                     framebuf.FrameBuffer(self._bufs[1], epd.width, epd.height, framebuf.MONO_HMSB))
+        self._back = 0
+        # 已提交的帧数
+        self.frames = 0
+
+    @property
+    def buf(self):
+        """后台缓冲区，用于绘制下一帧"""
+        return self._bufs[self._back]
+
+    @property
+    def fb(self):
+        """后台缓冲区对应的FrameBuffer"""
+        return self._fbs[self._back]
+
+    @property
+    def front(self):
+        """前台缓冲区，即最近一次提交(可能仍在刷新)的帧"""
+        return self._bufs[self._back ^ 1]
+
+    def busy(self):
+        """上一帧是否仍在刷新"""
+        return self.epd.refresh_pending() and self.epd.is_busy()
+
+    def present(self, global_refresh=False, copy=False, callback=None):
+        """提交后台缓冲区并立即返回，不等待刷新结束
+
+        上一帧还在刷新时先等待它结束，然后启动本帧的刷新并交换前后台缓冲区。
+
+        参数:
+            global_refresh: 强制全局刷新
+            copy: 交换后把刚提交的内容复制到新的后台缓冲区，适合只做增量绘制的应用
+            callback: 本帧刷新结束后调用 callback(epd)
+
+        返回刷新方式: "none" / "partial" / "full"
+        """
+        epd = self.epd
+        # 前台缓冲区要等上一帧刷新并收尾后才能复用为后台缓冲区
+        epd.finish_refresh()
+        back = self._bufs[self._back]
+        if self.auto and not global_refresh:
+            mode = epd.display_auto(back, wait=False, callback=callback)
+        else:
+            epd.display_frame(back, global_refresh=True, wait=False, callback=callback)
+            mode = "full"
+        self._back ^= 1
+        if copy:
+            self._bufs[self._back][:] = back
+        self.frames += 1
+        return mode
+
+    def wait(self, timeout_ms=None):
+        """阻塞等待最近提交的帧刷新完成"""
+        self.epd.finish_refresh(timeout_ms)
+
+    async def wait_async(self, timeout_ms=None):
+        """在asyncio中等待最近提交的帧刷新完成"""
+        await self.epd.refresh_done(timeout_ms)
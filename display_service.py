@@ -0,0 +1,68 @@
+"""
+共享显示服务
+固件中只有一个墨水屏控制器，本模块持有唯一的EPD实例和一块整屏帧缓冲区，
+借给各应用使用。切换应用时不再重新创建EPD、复位控制器或分配15KB缓冲区，
+帧副本、差分旧画面、残影预算、温度缓存和刷新统计也随EPD一起保留。
+
+    import display_service
+    e, buf, fb = display_service.acquire()
+    fb.fill(1)
+    ...
+    e.display_auto(buf)
+    display_service.release()
+
+boot.py卸载应用模块释放内存时不会卸载本模块，缓冲区在整个运行期间只分配一次。
+"""
+import config
+import framebuf
+import epaper4in2
+
+_epd = None
+_buf = None
+_fb = None
+
+
+def epd():
+    """返回共享的EPD实例，首次调用时创建(不初始化控制器)"""
+    global _epd
+    if _epd is None:
+        _epd = epaper4in2.EPD(config.spi, config.cs, config.dc, config.rst, config.busy)
+    return _epd
+
+
+def framebuffer():
+    """返回共享的整屏帧缓冲区 (buf, fb)，MONO_HMSB，首次调用时分配"""
+    global _buf, _fb
+    if _buf is None:
+        _buf = bytearray(config.WIDTH * config.HEIGHT // 8)
+        _fb = framebuf.FrameBuffer(_buf, config.WIDTH, config.HEIGHT, framebuf.MONO_HMSB)
+    return _buf, _fb
+
+
+def acquire():
+    """借出共享的EPD和帧缓冲区，返回 (epd, buf, fb)
+
+    等待上一个应用提交的刷新结束，恢复0度方向并开启模拟电路。
+    控制器已初始化时只重设RAM窗口，不复位。
+    帧缓冲区保留上一个应用的内容，应用自行清空。
+    """
+    e = epd()
+    e.finish_refresh()
+    if e.rotation != 0 or e.mirror_x or e.mirror_y:
+        e.set_orientation(0)
+    e.pwr_on()
+    e.init()
+    buf, fb = framebuffer()
+    return e, buf, fb
+
+
+def release(power_off=True):
+    """应用退出时归还：等待刷新结束，默认关闭模拟电路
+
+    控制器保持待机，RAM和驱动状态都保留，下一个应用acquire()时只需重新上电。
+    """
+    if _epd is None:
+        return
+    _epd.finish_refresh()
+    if power_off:
+        _epd.pwr_off()
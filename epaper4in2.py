@@ -34,20 +34,146 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import micropython
 from micropython import const
-from time import sleep_ms
+from array import array
+from time import sleep_ms, ticks_ms, ticks_diff
+import frame_diff
+import refresh_policy
+import log
 try:
     from buzzer import system_buzzer
 except ImportError:
     system_buzzer = None
 
+# 为1时编译进驱动的调试日志
+_DEBUG = const(0)
+
 # Display resolution
 EPD_WIDTH  = const(400)
 EPD_HEIGHT = const(300)
 BUSY = const(0)  # 0=busy, 1=idle
 
+# 刷新记录环形缓冲区：记录条数和每条的字段数
+# 字段: 开始时刻, 类型, 刷新模式, 传输耗时, BUSY耗时, 总耗时, 字节数, 事务数, 温度
+_HIST_LEN = const(16)
+_REC_FIELDS = const(9)
+_KINDS = ("full", "partial", "clear")
+_MODES = ("fast", "normal", "full")
+# 温度未知时记录的值
+_NO_TEMP = const(-128)
+
+# 控制器电源状态
+STATE_OFF = const(0)        # 上电后尚未初始化，或MCU重启后状态未知
+STATE_HIBERNATE = const(1)  # 深度睡眠(0x10)，RAM和寄存器丢失，需要硬件复位
+STATE_STANDBY = const(2)    # 寄存器已配置，模拟电路关闭
+STATE_POWERED = const(3)    # 模拟电路已开启，可以直接刷新
+_STATE_NAMES = ("off", "hibernate", "standby", "powered")
+
+# 控制器只有一个，电源状态在同一次启动内跨EPD实例保持，
+# 各应用重新创建EPD时可以跳过复位直接使用
+_panel_state = STATE_OFF
+
+# SPI总线时钟(Hz)，由set_spi_rate()设置，None表示沿用SPI对象当前的时钟。
+# 控制器的读取时钟上限远低于写入，写入时钟调高后读取临时切换到_spi_read_hz
+_spi_write_hz = None
+_spi_read_hz = None
+
+
+def set_spi_rate(spi, write_hz, read_hz=None):
+    """设置SPI写入时钟，read_hz为读取温度/RAM时临时使用的时钟，None表示与写入相同
+
+    时钟属于总线，在同一次启动内对所有EPD实例生效，见spi_tune.py
+    """
+    global _spi_write_hz, _spi_read_hz
+    spi.init(baudrate=write_hz)
+    _spi_write_hz = write_hz
+    _spi_read_hz = read_hz if read_hz != write_hz else None
+
+# 数据输入模式(0x11)：bit0=X地址递增，bit1=Y地址递增，清零则为递减
+_ENTRY_X_INC = const(0x01)
+_ENTRY_Y_INC = const(0x02)
+
+def _rev8(b):
+    b = ((b & 0xF0) >> 4) | ((b & 0x0F) << 4)
+    b = ((b & 0xCC) >> 2) | ((b & 0x33) << 2)
+    return ((b & 0xAA) >> 1) | ((b & 0x55) << 1)
+
+# 字节位反转表，水平方向与MONO_HMSB位序相反时整行查表处理，
+# 也用于把MONO_HLSB图片转换为面板格式(见image.to_native)
+REV8 = bytes(_rev8(i) for i in range(256))
+
+def _transpose8(b):
+    """原地转置8x8位矩阵：b[k]的第j位与b[j]的第k位互换"""
+    for s, m in ((1, 0x55), (2, 0x33), (4, 0x0F)):
+        for i in range(8):
+            if i & s == 0:
+                t = ((b[i] >> s) ^ b[i + s]) & m
+                b[i + s] ^= t
+                b[i] ^= t << s
+
+class CommandSequence:
+    """预编码的命令序列
+
+    把若干 (命令, 参数) 编码进同一个缓冲区并预先切好每段的memoryview，
+    EPD.send_sequence() 重放时整段只拉低一次CS，也不再分配内存。
+    参数可以是bytes、None，或整数表示预留的字节数，之后通过buf和offsets原地修改。
+    power表示序列执行后模拟电路是否开启，None表示不改变。
+    """
+
+    def __init__(self, commands, power=None):
+        self.power = power
+        size = 0
+        for cmd, payload in commands:
+            size += 1 + self._len(payload)
+        self.buf = bytearray(size)
+        # 重放一次的SPI事务数，供统计使用
+        self.transactions = 0
+        mv = memoryview(self.buf)
+        parts = []
+        offsets = []
+        pos = 0
+        for cmd, payload in commands:
+            n = self._len(payload)
+            self.buf[pos] = cmd
+            if n and not isinstance(payload, int):
+                self.buf[pos + 1:pos + 1 + n] = payload
+            parts.append((mv[pos:pos + 1], mv[pos + 1:pos + 1 + n] if n else None))
+            self.transactions += 2 if n else 1
+            offsets.append(pos + 1)
+            pos += 1 + n
+        self.parts = tuple(parts)
+        # 每条命令参数在buf中的起始位置
+        self.offsets = tuple(offsets)
+
+    @staticmethod
+    def _len(payload):
+        if payload is None:
+            return 0
+        if isinstance(payload, int):
+            return payload
+        return len(payload)
+
+
+# 初始化寄存器
+_SEQ_INIT = CommandSequence((
+    (0x01, b'\x2B\x01\x00'),  # MUX 设置
+    (0x21, b'\x40\x00'),       # 显示更新控制
+    (0x3C, b'\x05'),            # 边界波形控制，减少残影
+    (0x18, b'\x80'),            # 读取内部温度传感器
+    (0x0C, b'\x8B\x00\x00'),  # 设置开始和结束阶段，优化刷新
+))
+# 刷新启动序列，均以0x20结尾
+_SEQ_FULL = CommandSequence(((0x21, b'\x40\x00'), (0x22, b'\xf7'), (0x20, None)), False)  # 按实测温度加载波形
+_SEQ_FAST = CommandSequence(((0x21, b'\x40\x00'), (0x1A, b'\x64'), (0x22, b'\xd7'), (0x20, None)), False)  # 强制高温快速波形
+_SEQ_DIFF = CommandSequence(((0x21, b'\x00\x00'), (0x22, b'\xfc'), (0x20, None)), True)  # 差分局部刷新，保持上电
+_SEQ_DIFF_WAKE = CommandSequence(((0x21, b'\x00\x00'), (0x22, b'\xff'), (0x20, None)), False)  # 差分局部刷新(含上下电)
+_SEQ_PWR_ON = CommandSequence(((0x22, b'\xe0'), (0x20, None)), True)
+_SEQ_PWR_OFF = CommandSequence(((0x22, b'\x83'), (0x20, None)), False)
+_SEQ_LOAD_TEMP = CommandSequence(((0x22, b'\xb1'), (0x20, None)))  # 采样温度
+
 class EPD:
-    def __init__(self, spi, cs, dc, rst, busy):
+    def __init__(self, spi, cs, dc, rst, busy, rotation=0, mirror_x=False, mirror_y=False):
         self.spi = spi
         self.cs = cs
         self.dc = dc
@@ -55,110 +181,639 @@ class EPD:
         self.busy = busy
         self.cs.init(self.cs.OUT, value=1)
         self.dc.init(self.dc.OUT, value=0)
-        self.rst.init(self.rst.OUT, value=0)
+        # 控制器已初始化时保持RST为高，避免把它复位
+        self.rst.init(self.rst.OUT, value=0 if _panel_state == STATE_OFF else 1)
         self.busy.init(self.busy.IN)
+        # BUSY释放时由中断置位，供异步等待和完成回调使用
+        self._busy_flag = True
+        self._idle_callback = None
+        self._idle_event = None
+        # 中断里调度的收尾函数，预先绑定，中断中不分配内存
+        self._idle_done_ref = self._idle_done
+        try:
+            trigger = self.busy.IRQ_RISING if BUSY == 0 else self.busy.IRQ_FALLING
+            self.busy.irq(trigger=trigger, handler=self._busy_irq)
+            self._use_irq = True
+        except (AttributeError, TypeError, ValueError):
+            self._use_irq = False
+        # 等待BUSY的超时时间(毫秒)，全屏刷新最慢约4秒
+        self.busy_timeout_ms = 10000
+        # 已触发但尚未收尾的刷新 (帧缓冲区, 刷新区域)
+        self._pending = None
         self.width = EPD_WIDTH
         self.height = EPD_HEIGHT
-        self.powered = False
-        self.init_done = False
-        self.hibernate = True
         self.use_fast_update = True
-        # 添加刷新计数器，用于控制全屏刷新频率
+        # 上一次全屏刷新后的局部刷新次数
         self.refresh_count = 0
-        # 每N次局部刷新后执行一次全屏刷新，防止残影积累
-        self.partial_refresh_limit = 5
+        # 刷新策略：根据局部刷新累计翻转的像素决定何时做全屏清理刷新，
+        # 可替换为 refresh_policy.CountPolicy() 恢复每N次局部刷新清理一次
+        self.policy = refresh_policy.GhostBudgetPolicy()
+        # 面板温度(℃)，未知时为None，刷新策略据此调整残影权重
+        self.temperature = None
+        self._temp_time = None
+        # 温度读数的有效期(毫秒)，过期后下一次刷新前重新读取
+        self.temp_ttl_ms = 300000
+        # 是否通过0x1B读回温度，SDA未接到MISO时首次读取失败后自动关闭
+        self.temp_readback = True
+        # 温度分档(℃)：不低于fast_min_temp才使用快速波形，
+        # 低于partial_min_temp时局部刷新残影严重，一律改为全屏刷新
+        self.fast_min_temp = 15
+        self.partial_min_temp = 5
+        # 当前温度下选择的刷新模式 "fast" / "normal" / "full"
+        self.refresh_mode = "fast"
+        # 运行统计，通过stats()读取
+        self._stats = {"temp_reads": 0, "temp_errors": 0, "refreshes": 0,
+                       "fast": 0, "normal": 0, "full": 0, "partial": 0, "clears": 0,
+                       "resets": 0, "reset_ms": 0, "cold_inits": 0, "warm_inits": 0,
+                       "wake_ms": 0, "power_on_ms": 0,
+                       "busy_ms_max": 0}
+        # 累计SPI事务数和字节数
+        self._io_tx = 0
+        self._io_bytes = 0
+        # 最近_HIST_LEN次刷新的记录，预分配的环形缓冲区，见history()
+        self._hist = array('i', [0] * (_HIST_LEN * _REC_FIELDS))
+        self._hist_pos = 0
+        self._hist_count = 0
+        # 当前刷新的开始时刻、启动(0x20)时刻和BUSY释放时刻，以及开始时的SPI计数
+        self._op_start = None
+        self._op_kind = 0
+        self._t_act = None
+        self._t_idle = None
+        self._op_tx = 0
+        self._op_bytes = 0
+        # 差分局部刷新：RAM 0x26保存屏幕上的旧画面，波形只驱动变化的像素，残影少得多
+        self.use_differential = True
+        # RAM 0x26是否与屏幕当前显示的内容一致
+        self._old_ram_valid = False
         # 强制全屏刷新标志
         self.force_full_refresh = False
+        # 上一次发送到屏幕的帧副本，用于display_auto()比较差异，
+        # 第一次整帧刷新(或第一次display_auto())时分配
+        self.shadow = None
+        self._shadow_valid = False
+        # 画面方向，由set_orientation()设置
+        self.rotation = None
+        self.mirror_x = False
+        self.mirror_y = False
+        # 变化面积超过画布的该百分比时改用全屏刷新
+        self.full_refresh_percent = 50
+        # 变化区域最多合并为几个矩形
+        self.max_dirty_boxes = 4
+        # 预分配的发送缓冲区，避免RAM写入时逐字节分配
+        self._cmd_buf = bytearray(1)
+        self._dat_buf = bytearray(1)
+        # RAM窗口设置序列：数据输入模式、X/Y范围和地址计数器，参数由set_partial()原地填写
+        self._seq_window = CommandSequence(((0x11, 1), (0x44, 2), (0x45, 4), (0x4E, 1), (0x4F, 2)))
+        self._row_buf = bytearray(EPD_WIDTH // 8)
+        # 90/270度转置用：8行的输出缓冲和8字节的位块
+        self._band_buf = bytearray(EPD_WIDTH)
+        self._blk = bytearray(8)
+        # 纯色填充用的小缓冲区(4行)，内容为_fill_value，值变化时才重新填充
+        self._fill_buf = bytearray(EPD_WIDTH // 8 * 4)
+        self._fill_value = 0
+        self.set_orientation(rotation, mirror_x, mirror_y)
 
     def _command(self, command, data=None):
-        self.dc(0)
+        if self._pending is not None:
+            self.finish_refresh()
+        self._cmd_buf[0] = command
         self.cs(0)
-        self.spi.write(bytearray([command]))
-        self.cs(1)
+        self.dc(0)
+        self.spi.write(self._cmd_buf)
+        self._io_tx += 1
+        self._io_bytes += 1
         if data is not None:
-            self._data(data)
+            self.dc(1)
+            self.spi.write(data)
+            self._io_tx += 1
+            self._io_bytes += len(data)
+        self.cs(1)
 
     def _data(self, data):
         self.dc(1)
         self.cs(0)
         self.spi.write(data)
         self.cs(1)
+        self._io_tx += 1
+        self._io_bytes += len(data)
         
     def _ndata(self, data):
-        self._data(bytearray([data]))
+        self._dat_buf[0] = data
+        self._data(self._dat_buf)
+
+    def _read(self, command, nbytes):
+        """发送命令后从MISO读回nbytes字节，写入时钟过高时临时降到读取时钟"""
+        self._command(command)
+        slow = _spi_read_hz is not None
+        if slow:
+            self.spi.init(baudrate=_spi_read_hz)
+        self.dc(1)
+        self.cs(0)
+        raw = self.spi.read(nbytes)
+        self.cs(1)
+        if slow:
+            self.spi.init(baudrate=_spi_write_hz)
+        self._io_tx += 1
+        self._io_bytes += nbytes
+        return raw
+
+    def send_sequence(self, seq):
+        """重放预编码的命令序列，整个序列只拉低一次CS"""
+        if self._pending is not None:
+            self.finish_refresh()
+        write = self.spi.write
+        dc = self.dc
+        self.cs(0)
+        for cmd, data in seq.parts:
+            dc(0)
+            write(cmd)
+            if data is not None:
+                dc(1)
+                write(data)
+        self.cs(1)
+        self._io_tx += seq.transactions
+        self._io_bytes += len(seq.buf)
+        if seq.power is not None and _panel_state >= STATE_STANDBY:
+            self._set_state(STATE_POWERED if seq.power else STATE_STANDBY)
+
+    def _stream_begin(self, command):
+        """开始一次RAM流式写入：发送命令后保持CS为低，后续数据连续发送"""
+        if self._pending is not None:
+            self.finish_refresh()
+        self._cmd_buf[0] = command
+        self.dc(0)
+        self.cs(0)
+        self.spi.write(self._cmd_buf)
+        self.dc(1)
+        self._io_tx += 1
+        self._io_bytes += 1
+
+    def _stream_end(self):
+        """结束流式写入，释放CS"""
+        self.cs(1)
         
+    @property
+    def state(self):
+        """控制器电源状态 STATE_OFF / STATE_HIBERNATE / STATE_STANDBY / STATE_POWERED"""
+        return _panel_state
+
+    def _set_state(self, state):
+        global _panel_state
+        _panel_state = state
+
+    @property
+    def powered(self):
+        return _panel_state == STATE_POWERED
+
+    @property
+    def init_done(self):
+        return _panel_state >= STATE_STANDBY
+
+    @property
+    def hibernate(self):
+        return _panel_state <= STATE_HIBERNATE
+
     def pwr_on(self):
-        if self.powered == False:
-            self._command(0x22, b'\xe0')
-            self._command(0x20)
-            self.wait_until_idle()
-            self.powered = True
+        """开启模拟电路；控制器尚未初始化时先初始化"""
+        if _panel_state == STATE_POWERED:
+            return
+        t0 = ticks_ms()
+        if _panel_state < STATE_STANDBY:
+            self.init()
+        self.send_sequence(_SEQ_PWR_ON)
+        self.wait_until_idle()
+        self._stats["power_on_ms"] = ticks_diff(ticks_ms(), t0)
 
     def pwr_off(self):
-        if self.powered == True:
-            self._command(0x22, b'\x83')
-            self._command(0x20)
+        if _panel_state == STATE_POWERED:
+            self.send_sequence(_SEQ_PWR_OFF)
             self.wait_until_idle()
-            self.powered = False
+
+    def set_orientation(self, rotation=0, mirror_x=False, mirror_y=False):
+        """设置画面方向
+
+        参数:
+            rotation: 顺时针旋转角度，0/90/180/270
+            mirror_x: 水平镜像
+            mirror_y: 垂直镜像
+
+        画布使用MONO_HMSB帧缓冲区。0度时帧缓冲区按原样发送，由数据输入模式
+        (0x11)的X/Y递减完成翻转；垂直翻转只改Y方向，水平翻转改X方向并整行
+        查位反转表；90/270度时画布为300x400，发送时按8x8位块转置。
+        """
+        if rotation not in (0, 90, 180, 270):
+            raise ValueError("rotation只能是0/90/180/270")
+        if (rotation, bool(mirror_x), bool(mirror_y)) != (self.rotation, self.mirror_x, self.mirror_y):
+            # 帧副本按原来的方向排列，不能再与新方向的画布比较
+            self._shadow_valid = False
+        self.mirror_x = bool(mirror_x)
+        self.mirror_y = bool(mirror_y)
+        self._transpose = rotation in (90, 270)
+        if self._transpose:
+            self.width = EPD_HEIGHT
+            self.height = EPD_WIDTH
+            # 转置后按直立坐标系发送，镜像在读取画布时完成
+            self._hflip = False
+            self._vflip = False
+            self._col_rev = (rotation == 270) != self.mirror_x
+            self._row_rev = (rotation == 90) != self.mirror_y
+        else:
+            self.width = EPD_WIDTH
+            self.height = EPD_HEIGHT
+            self._hflip = (rotation == 180) != self.mirror_x
+            self._vflip = (rotation == 180) != self.mirror_y
+        # 画布每行字节数，90/270度时为38(300像素补齐到字节)
+        self.stride = (self.width + 7) // 8
+        if self.shadow is not None and len(self.shadow) != self.stride * self.height:
+            # 画布大小改变，下次使用时按新大小重新分配
+            self.shadow = None
+        if self.init_done:
+            self.set_partial(0, 0, self.width, self.height)
+
+    def _upright_rect(self, x, y, w, h):
+        """90/270度：把画布矩形换算为0度坐标系下的矩形"""
+        ux = EPD_WIDTH - y - h if self._row_rev else y
+        uy = EPD_HEIGHT - x - w if self._col_rev else x
+        return ux, uy, h, w
 
     #set partial
     def set_partial(self, x, y, w, h):
-        self._command(0x11,b'\x03')
-        self._command(0x44)
-        self._ndata(x // 8)
-        self._ndata((x + w - 1) // 8)
-        self._command(0x45)
-        self._ndata(y % 256)        
-        self._ndata(y // 256)
-        self._ndata((y+h-1) % 256)
-        self._ndata((y+h-1) // 256)
-        self._command(0x4E)
-        self._ndata(x // 8)
-        self._command(0x4F)
-        self._ndata(y % 256)        
-        self._ndata(y // 256)
-
-    def init(self):
-        if self.hibernate==True:
+        """设置RAM写入窗口和数据输入模式，坐标为当前方向下的画布坐标"""
+        if self._transpose:
+            x, y, w, h = self._upright_rect(x, y, w, h)
+        xs = x // 8
+        xe = (x + w - 1) // 8
+        ys = y
+        ye = y + h - 1
+        if not self._hflip:
+            xs = EPD_WIDTH // 8 - 1 - xs
+            xe = EPD_WIDTH // 8 - 1 - xe
+        if not self._vflip:
+            ys = EPD_HEIGHT - 1 - ys
+            ye = EPD_HEIGHT - 1 - ye
+        entry = (_ENTRY_X_INC if self._hflip else 0) | (_ENTRY_Y_INC if self._vflip else 0)
+        self._set_window(entry, xs, xe, ys, ye)
+
+    def ram_window(self, xs, xe, ys, ye):
+        """按RAM坐标设置窗口并把地址计数器移到起点，X/Y递增，不受画面方向影响
+
+        xs/xe为起止字节列，ys/ye为起止行，用于RAM读写测试。
+        """
+        self._set_window(_ENTRY_X_INC | _ENTRY_Y_INC, xs, xe, ys, ye)
+
+    def _set_window(self, entry, xs, xe, ys, ye):
+        seq = self._seq_window
+        buf = seq.buf
+        o = seq.offsets
+        buf[o[0]] = entry
+        buf[o[1]] = xs
+        buf[o[1] + 1] = xe
+        buf[o[2]] = ys & 0xFF
+        buf[o[2] + 1] = ys >> 8
+        buf[o[2] + 2] = ye & 0xFF
+        buf[o[2] + 3] = ye >> 8
+        buf[o[3]] = xs
+        buf[o[4]] = ys & 0xFF
+        buf[o[4] + 1] = ys >> 8
+        self.send_sequence(seq)
+
+    def init(self, force=False):
+        """初始化控制器
+
+        只有控制器未初始化或处于深度睡眠时才执行硬件复位、SWRESET和寄存器配置；
+        已处于待机或上电状态时(例如另一个应用刚用过屏幕)只重新设置RAM窗口。
+        force为True时总是完整初始化。耗时记录在stats()的wake_ms中。
+        """
+        t0 = ticks_ms()
+        if force or _panel_state < STATE_STANDBY:
             self.reset()
-        sleep_ms(100)
-        #self.wait_until_idle()
-        self._command(const(0x12)) #SWRESET
-        self.wait_until_idle()
-        
-        # 优化驱动初始化参数，确保与GDEY042T81规格匹配
-        self._command(0x01,b'\x2B\x01\x00') #MUX 设置
-        self._command(0x21,b'\x40\x00')      # 显示更新控制
-        self._command(0x3C,b'\x05')         # 边界波形控制，减少残影
-        self._command(0x18,b'\x80')         # 读取内部温度传感器
-        self._command(0x0C,b'\x8B\x00\x00') # 设置开始和结束阶段，优化刷新
+            sleep_ms(100)
+            #self.wait_until_idle()
+            self._command(const(0x12)) #SWRESET
+            self.wait_until_idle()
+            
+            # 优化驱动初始化参数，确保与GDEY042T81规格匹配
+            self.send_sequence(_SEQ_INIT)
+            self._set_state(STATE_STANDBY)
+            self._stats["cold_inits"] += 1
+            # 复位后RAM内容未知
+            self._shadow_valid = False
+            self._old_ram_valid = False
+        else:
+            self._stats["warm_inits"] += 1
         
         self.set_partial(0, 0, self.width, self.height)
-        self.init_done = True
+        self._stats["wake_ms"] = ticks_diff(ticks_ms(), t0)
+
+    def _busy_irq(self, pin):
+        """BUSY释放中断：置位标志，唤醒异步等待并调度完成回调"""
+        if pin.value() == BUSY:
+            return
+        self._busy_flag = True
+        if self._t_idle is None:
+            self._t_idle = ticks_ms()
+        if self._idle_event is not None:
+            self._idle_event.set()
+        cb = self._idle_callback
+        if cb is not None:
+            self._idle_callback = None
+            micropython.schedule(self._idle_done_ref, cb)
+
+    def _idle_done(self, callback):
+        """BUSY释放后调度执行：先收尾，再调用完成回调
+
+        收尾把帧缓冲区同步到RAM 0x26和帧副本，之后回调中才能重画帧缓冲区。
+        回调执行前刷新已经被收尾、又开始了下一次刷新时不再等待。
+        """
+        pending = self._pending
+        if pending is not None and pending[2] is callback:
+            self.finish_refresh()
+        callback(self)
+
+    def is_busy(self):
+        """控制器是否仍在执行刷新等耗时操作"""
+        return self.busy.value() == BUSY
 
-    def wait_until_idle(self):
+    def _busy_timeout(self):
+        """BUSY等待超时：丢弃未收尾的刷新，返回要抛出的RuntimeError
+
+        控制器状态未知，标记为未初始化，下一次init()(或自动初始化)时重新复位；
+        屏幕内容也未知，帧副本和RAM 0x26不再可信。
+        """
+        self._pending = None
+        self._idle_callback = None
+        self._shadow_valid = False
+        self._old_ram_valid = False
+        self._op_start = None
+        self._t_act = None
+        self._set_state(STATE_OFF)
+        return RuntimeError("等待墨水屏空闲超时")
+
+    def wait_until_idle(self, timeout_ms=None):
+        """阻塞等待BUSY释放，超过timeout_ms(默认busy_timeout_ms)抛出RuntimeError"""
+        if timeout_ms is None:
+            timeout_ms = self.busy_timeout_ms
+        start = ticks_ms()
         while self.busy.value() == BUSY:
-            sleep_ms(100)
-            print("等待墨水屏空闲")
+            if ticks_diff(ticks_ms(), start) > timeout_ms:
+                raise self._busy_timeout()
+            sleep_ms(1)
+        if self._t_idle is None:
+            self._t_idle = ticks_ms()
+
+    async def wait_idle_async(self, timeout_ms=None):
+        """在asyncio中等待BUSY释放，期间其他任务可以继续运行
+
+        有BUSY中断时由中断唤醒，否则每5毫秒轮询一次；
+        超过timeout_ms(默认busy_timeout_ms)抛出RuntimeError。
+        """
+        try:
+            import asyncio
+        except ImportError:
+            import uasyncio as asyncio
+        if timeout_ms is None:
+            timeout_ms = self.busy_timeout_ms
+        if self._use_irq and hasattr(asyncio, "ThreadSafeFlag"):
+            if self._idle_event is None:
+                self._idle_event = asyncio.ThreadSafeFlag()
+            event = self._idle_event
+            start = ticks_ms()
+            while self.is_busy():
+                left = timeout_ms - ticks_diff(ticks_ms(), start)
+                if left <= 0:
+                    raise self._busy_timeout()
+                try:
+                    await asyncio.wait_for_ms(event.wait(), left)
+                except asyncio.TimeoutError:
+                    pass
+            return
+        start = ticks_ms()
+        while self.is_busy():
+            if ticks_diff(ticks_ms(), start) > timeout_ms:
+                raise self._busy_timeout()
+            await asyncio.sleep(0.005)
+
+    def _activate(self, callback=None, seq=None, partial=False):
+        """发送0x20启动刷新，callback在BUSY释放后被调度执行
+
+        seq为以0x20结尾的刷新启动序列，为None时只发送0x20。
+        """
+        stats = self._stats
+        stats["refreshes"] += 1
+        stats[self.refresh_mode] += 1
+        if partial:
+            stats["partial"] += 1
+        self._begin_op()
+        self._op_kind = 1 if partial else 0
+        self._t_act = ticks_ms()
+        self._t_idle = None
+        self._busy_flag = False
+        self._idle_callback = callback if self._use_irq else None
+        if seq is None:
+            self._command(0x20)
+        else:
+            self.send_sequence(seq)
+
+    def refresh_pending(self):
+        """是否有已提交、尚未收尾的刷新(可能仍在进行，也可能已结束但未调用finish_refresh())"""
+        return self._pending is not None
+
+    def finish_refresh(self, timeout_ms=None):
+        """等待进行中的刷新结束并完成收尾
+
+        收尾包括把刚显示的内容同步到RAM 0x26和帧副本。非阻塞刷新后，
+        在下一次访问控制器前会自动调用；有BUSY中断时BUSY释放后也会调度执行，
+        完成回调总在收尾之后调用，回调被调用时帧缓冲区可以重用。
+        """
+        pending = self._pending
+        if pending is None:
+            return
+        self.wait_until_idle(timeout_ms)
+        if self._pending is not pending:
+            # 等待期间调度的收尾已经执行
+            return
+        self._pending = None
+        frame_buffer, rects, callback = pending
+        self._commit_frame(frame_buffer, rects)
+        self._end_op()
+        if callback is not None and not self._use_irq:
+            callback(self)
+
+    async def refresh_done(self, timeout_ms=None):
+        """异步等待非阻塞刷新完成并收尾"""
+        await self.wait_idle_async(timeout_ms)
+        self.finish_refresh()
+
+    def read_temperature(self):
+        """从内部温度传感器读取面板温度(℃)
+
+        先用0x22 0xB1让控制器采样温度，再通过0x1B读回12位有符号值。
+        读数为全0或全1(SDA未接到MISO时的典型值)或超出工作范围时视为读取失败，
+        返回None并关闭temp_readback，之后只使用set_temperature()提供的温度。
+        """
+        self.send_sequence(_SEQ_LOAD_TEMP)
+        self.wait_until_idle()
+        raw = self._read(0x1B, 2)
+        self._stats["temp_reads"] += 1
+        v = (raw[0] << 4) | (raw[1] >> 4)
+        if v & 0x800:
+            v -= 0x1000
+        t = (v + 8) // 16
+        if raw[0] in (0x00, 0xFF) and raw[1] in (0x00, 0xFF) or not -30 <= t <= 70:
+            self._stats["temp_errors"] += 1
+            self.temp_readback = False
+            log.warn("无法读取面板温度，改用默认刷新模式")
+            return None
+        return t
+
+    def set_temperature(self, temperature):
+        """使用外部传感器提供的温度(℃)，None表示未知"""
+        self.temperature = temperature
+        self._temp_time = ticks_ms()
+
+    def panel_temperature(self):
+        """返回面板温度，缓存超过temp_ttl_ms时重新读取；未知时返回None"""
+        if (self._temp_time is None or
+                ticks_diff(ticks_ms(), self._temp_time) > self.temp_ttl_ms):
+            if self.temp_readback and self.init_done:
+                self.set_temperature(self.read_temperature())
+        return self.temperature
+
+    def select_refresh_mode(self):
+        """根据面板温度选择刷新模式
+
+        "fast": 温度足够高，可以使用强制高温的快速波形
+        "normal": 偏冷，使用按实测温度加载的标准波形，避免快速刷新拖影
+        "full": 很冷，局部刷新残影严重，所有刷新都改为全屏刷新
+        温度未知时沿用use_fast_update的设置。
+        """
+        t = self.panel_temperature()
+        if t is None:
+            mode = "fast" if self.use_fast_update else "normal"
+        elif t < self.partial_min_temp:
+            mode = "full"
+        elif t < self.fast_min_temp or not self.use_fast_update:
+            mode = "normal"
+        else:
+            mode = "fast"
+        if mode != self.refresh_mode:
+            log.info("面板温度%s℃，刷新模式切换为%s", t, mode)
+            self.refresh_mode = mode
+        return mode
+
+    def _begin_op(self):
+        """开始记录一次刷新：记下开始时刻和SPI计数
+
+        嵌套调用(如display_auto转交display_frame)时沿用外层的开始时刻；
+        上一次刷新已启动但还没有收尾时先把它记录下来。
+        """
+        if self._op_start is not None:
+            if self._t_act is None:
+                return
+            self._end_op()
+        self._op_start = ticks_ms()
+        self._op_tx = self._io_tx
+        self._op_bytes = self._io_bytes
+
+    def _end_op(self):
+        """结束记录：把本次刷新的耗时和传输量写入环形缓冲区"""
+        start = self._op_start
+        if start is None:
+            return
+        now = ticks_ms()
+        t_act = now if self._t_act is None else self._t_act
+        t_idle = now if self._t_idle is None else self._t_idle
+        busy_ms = ticks_diff(t_idle, t_act)
+        h = self._hist
+        i = self._hist_pos * _REC_FIELDS
+        h[i] = start
+        h[i + 1] = self._op_kind
+        h[i + 2] = _MODES.index(self.refresh_mode)
+        h[i + 3] = ticks_diff(t_act, start)
+        h[i + 4] = busy_ms
+        h[i + 5] = ticks_diff(now, start)
+        h[i + 6] = self._io_bytes - self._op_bytes
+        h[i + 7] = self._io_tx - self._op_tx
+        h[i + 8] = _NO_TEMP if self.temperature is None else self.temperature
+        self._hist_pos = (self._hist_pos + 1) % _HIST_LEN
+        if self._hist_count < _HIST_LEN:
+            self._hist_count += 1
+        if busy_ms > self._stats["busy_ms_max"]:
+            self._stats["busy_ms_max"] = busy_ms
+        self._op_start = None
+        self._t_act = None
+
+    def history(self):
+        """返回最近的刷新记录，从旧到新
+
+        每条记录包含: start(开始时刻ticks_ms)、kind(full/partial/clear)、mode(刷新模式)、
+        ram_ms(写RAM等准备耗时)、busy_ms(BUSY耗时)、total_ms(总耗时)、bytes、
+        transactions(SPI字节数和事务数)、temperature(温度，未知为None)
+        """
+        h = self._hist
+        n = self._hist_count
+        first = (self._hist_pos - n) % _HIST_LEN
+        records = []
+        for k in range(n):
+            i = ((first + k) % _HIST_LEN) * _REC_FIELDS
+            records.append({
+                "start": h[i],
+                "kind": _KINDS[h[i + 1]],
+                "mode": _MODES[h[i + 2]],
+                "ram_ms": h[i + 3],
+                "busy_ms": h[i + 4],
+                "total_ms": h[i + 5],
+                "bytes": h[i + 6],
+                "transactions": h[i + 7],
+                "temperature": None if h[i + 8] == _NO_TEMP else h[i + 8],
+            })
+        return records
+
+    def stats(self):
+        """返回驱动运行统计
+
+        包括温度读数、各刷新模式和类型的次数、清屏次数、复位和初始化耗时、
+        累计SPI事务数和字节数、最近一次刷新的记录、最近几次刷新的平均耗时
+        以及刷新策略计数器。计数器在每次操作时只做整数加法，可以在正式固件中保持开启。
+        """
+        s = dict(self._stats)
+        s["transactions"] = self._io_tx
+        s["bytes"] = self._io_bytes
+        s["temperature"] = self.temperature
+        s["temp_age_ms"] = (None if self._temp_time is None
+                            else ticks_diff(ticks_ms(), self._temp_time))
+        s["mode"] = self.refresh_mode
+        s["state"] = _STATE_NAMES[_panel_state]
+        records = self.history()
+        s["last"] = records[-1] if records else None
+        for key in ("ram_ms", "busy_ms", "total_ms"):
+            total = 0
+            for r in records:
+                total += r[key]
+            s["avg_" + key] = total // len(records) if records else 0
+        s["policy"] = self.policy.counters()
+        return s
 
     def reset(self):
+        t0 = ticks_ms()
         self.rst(0)
         sleep_ms(200)
         self.rst(1)
         sleep_ms(200)
+        self._stats["resets"] += 1
+        self._stats["reset_ms"] = ticks_diff(ticks_ms(), t0)
 
-    def update_full(self):
+    def update_full(self, wait=True, callback=None):
         #update Full
-        print("执行全屏更新")
-        self._command(0x21,b'\x40\x00')
-        if self.use_fast_update == False:
-            self._command(0x22,b'\xf7')
+        if _DEBUG: log.debug("执行全屏更新")
+        if self.select_refresh_mode() != "fast":
+            self._activate(callback, _SEQ_FULL)  # 按实测温度加载波形
         else:
-            self._command(0x1A, b'\x64')  # 快速刷新设置
-            self._command(0x22,b'\xd7')
-        self._command(0x20)
-        self.wait_until_idle()
-        print("更新完成", self.busy.value())
+            self._activate(callback, _SEQ_FAST)  # 快速刷新设置
+        if wait:
+            self.wait_until_idle()
+            self._end_op()
+            if _DEBUG: log.debug("更新完成")
 
     # 添加专门的全屏刷新方法，用于清除残影
     def clear_screen(self, double_refresh=True):
@@ -168,63 +823,213 @@ class EPD:
             double_refresh: 是否执行两次刷新以彻底清除残影，默认为True
         """
         if double_refresh:
-            print("执行双次全屏刷新以彻底清除残影")
+            log.info("执行双次全屏刷新以彻底清除残影")
         else:
-            print("执行单次全屏刷新以清除残影")
-            
-        # 创建全白缓冲区
-        white_buffer = bytearray(self.width * self.height // 8)
-        for i in range(len(white_buffer)):
-            white_buffer[i] = 0xFF  # 全白
+            log.info("执行单次全屏刷新以清除残影")
+        if not self.init_done:
+            self.init()
+        self.finish_refresh()
+        self._begin_op()
             
-        # 先写入全白数据
+        # 先写入全白数据，分块发送，不分配帧大小的缓冲区
         self.set_partial(0, 0, self.width, self.height)
-        self.write_image(0x24, white_buffer, True, True)
+        self.write_value(0x24, 0xFF)
         
-        # 执行第一次全屏刷新
-        self._command(0x21,b'\x40\x00')
-        self._command(0x22,b'\xf7')  # 使用完整刷新模式
-        self._command(0x20)
-        self.wait_until_idle()
-        
-        # 如果启用双次刷新，再执行一次
-        if double_refresh:
-            print("执行第二次全屏刷新")
-            self._command(0x21,b'\x40\x00')
-            self._command(0x22,b'\xf7')  # 使用完整刷新模式
-            self._command(0x20)
+        # 每次刷新与其他刷新一样计入刷新次数，并各记录一条clear记录
+        for i in range(2 if double_refresh else 1):
+            if i and _DEBUG: log.debug("执行第二次全屏刷新")
+            self._activate(None, _SEQ_FULL)  # 使用完整刷新模式
+            self._op_kind = 2
             self.wait_until_idle()
+            self._end_op()
+        self._stats["clears"] += 1
         
         # 重置刷新计数器
         self.refresh_count = 0
         self.force_full_refresh = False
-        print("全屏刷新完成")
+        self.policy.on_full(self, cleaning=True)
+        self._shadow_valid = False
+        self._old_ram_valid = False
+        if _DEBUG: log.debug("全屏刷新完成")
 
-    def write_image(self, command, bitmap, mirror_x, mirror_y):
+    def write_image(self, command, bitmap):
+        """按当前方向流式写入整帧图像，整个RAM写入只拉低一次CS"""
         sleep_ms(1)
-        h = self.height
-        w = self.width
-        bpl = w // 8 # bytes per line
-        
-        self._command(command)
-        for i in range(0, h):
-            for j in range(0, bpl):
-                idx = ((bpl-j-1) if mirror_x else j) + ((h-i-1) if mirror_y else i) * bpl
-                self._ndata(bitmap[idx])
-                
-    def write_value(self, command, value):
+        self._stream_begin(command)
+        self._stream_rect(bitmap, 0, 0, self.width, self.height)
+        self._stream_end()
+
+    def align_rect(self, x, y, w, h):
+        """把矩形裁剪到画布内并扩展到RAM字节边界
+
+        RAM每个字节对应8个水平像素；90/270度时RAM的水平方向对应画布的
+        垂直方向，因此还要对齐y和h。x方向总是按帧缓冲区字节对齐，
+        这样写入的内容正好是整字节，便于记录已显示的帧。
+        矩形完全在画布外时返回None。
+        """
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        x1 = min(x + w, self.width)
+        y1 = min(y + h, self.height)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        x0 &= ~7
+        x1 = min((x1 + 7) & ~7, self.width)
+        if self._transpose:
+            y0 &= ~7
+            y1 = (y1 + 7) & ~7
+        return x0, y0, x1 - x0, y1 - y0
+
+    def write_region(self, command, bitmap, x, y, w, h):
+        """只把帧缓冲区中的矩形区域写入控制器RAM的对应窗口
+
+        参数:
+            command: RAM写入命令(0x24)
+            bitmap: 整个画布的帧缓冲区
+            x, y, w, h: 画布坐标下的矩形，会自动裁剪并按字节对齐
+
+        返回实际写入的对齐矩形 (x, y, w, h)，矩形为空时返回None。
+        """
+        rect = self.align_rect(x, y, w, h)
+        if rect is None:
+            return None
+        x, y, w, h = rect
+        self.set_partial(x, y, w, h)
         sleep_ms(1)
-        h = self.height
-        w = self.width
-        bpl = w // 8 # bytes per line
-        
-        self._command(command)
-        for i in range(0, h):
-            for j in range(0, bpl):
-                self._ndata(value)
+        self._stream_begin(command)
+        self._stream_rect(bitmap, x, y, w, h)
+        self._stream_end()
+        return rect
+
+    def _stream_rect(self, bitmap, x, y, w, h):
+        """按RAM写入顺序发送画布矩形内的数据，x和w需按8像素对齐"""
+        if self._transpose:
+            ux, uy, uw, uh = self._upright_rect(x, y, w, h)
+            ub0 = ux // 8
+            ub1 = (ux + uw - 1) // 8
+            self._stream_transposed(bitmap, ub0, ub1, uy, uy + uh - 1)
+            self._io_tx += uh
+            self._io_bytes += (ub1 - ub0 + 1) * uh
+            return
+        stride = self.stride
+        b0 = x // 8
+        n = (x + w - 1) // 8 - b0 + 1
+        mv = memoryview(bitmap)
+        self._io_bytes += n * h
+        if not self._hflip and n == stride:
+            self._io_tx += 1
+        else:
+            self._io_tx += h
+        if not self._hflip:
+            if n == stride:
+                # 整行宽度时数据在内存中连续，一次发送
+                self.spi.write(mv[y * stride:(y + h) * stride])
+            else:
+                for i in range(y, y + h):
+                    start = i * stride + b0
+                    self.spi.write(mv[start:start + n])
+            return
+        rev = REV8
+        row = self._row_buf
+        row_mv = memoryview(row)[:n]
+        for i in range(y, y + h):
+            start = i * stride + b0
+            for j in range(n):
+                row[j] = rev[bitmap[start + j]]
+            self.spi.write(row_mv)
+
+    def _stream_transposed(self, bitmap, ub0, ub1, uy0, uy1):
+        """90/270度：按8x8位块转置画布，逐行输出0度坐标系下的数据
+
+        ub0/ub1为0度坐标系下的起止字节列，uy0/uy1为起止行。
+        画布的每个字节列展开为8个输出行，先在行缓冲中拼好再按行发送。
+        """
+        stride = self.stride
+        nb = ub1 - ub0 + 1
+        band = self._band_buf
+        band_mv = memoryview(band)
+        blk = self._blk
+        col_rev = self._col_rev
+        # 0度坐标系的行对应画布的列
+        if col_rev:
+            lx0 = self.width - 1 - uy1
+            lx1 = self.width - 1 - uy0
+            cols = range(lx1 // 8, lx0 // 8 - 1, -1)
+            order = range(7, -1, -1)
+        else:
+            lx0 = uy0
+            lx1 = uy1
+            cols = range(lx0 // 8, lx1 // 8 + 1)
+            order = range(8)
+        # 0度坐标系的列对应画布的行
+        if self._row_rev:
+            step = -stride
+            first = (self.height - 1 - ub0 * 8) * stride
+        else:
+            step = stride
+            first = ub0 * 8 * stride
+        for c in cols:
+            base = first + c
+            for k in range(nb):
+                idx = base
+                for t in range(8):
+                    blk[t] = bitmap[idx]
+                    idx += step
+                _transpose8(blk)
+                for j in range(8):
+                    band[j * nb + k] = blk[j]
+                base += 8 * step
+            for j in order:
+                lx = c * 8 + j
+                if lx0 <= lx <= lx1:
+                    self.spi.write(band_mv[j * nb:(j + 1) * nb])
+
+    def write_value(self, command, value):
+        """把整个面板的RAM填充为同一个字节值
+
+        从预分配的小缓冲区分块流式发送，不分配帧大小的缓冲区。
+        调用前需要用set_partial()设置全屏窗口。
+        """
+        chunk = self._fill_buf
+        if self._fill_value != value:
+            for i in range(len(chunk)):
+                chunk[i] = value
+            self._fill_value = value
+        self._stream_begin(command)
+        n = EPD_WIDTH // 8 * EPD_HEIGHT // len(chunk)
+        for i in range(n):
+            self.spi.write(chunk)
+        self._stream_end()
+        self._io_tx += n
+        self._io_bytes += n * len(chunk)
+
+    def write_ram(self, data, ram=0x26):
+        """从ram_window()设置的地址起原样写入data
+
+        写入后驱动不再信任该RAM中记录的画面：0x26在下一次全屏提交时重写，
+        0x24使帧副本失效，下一次display_auto()改为整帧写入。
+        """
+        self._command(ram, data)
+        if ram == 0x26:
+            self._old_ram_valid = False
+        else:
+            self._shadow_valid = False
+
+    def read_ram(self, nbytes, ram=0x26, buf=None):
+        """从ram_window()设置的地址起通过0x27读回nbytes字节，需要接MISO
+
+        第一个读出的字节是控制器规定的空字节，已丢弃。
+        """
+        self._command(0x41, b'\x01' if ram == 0x26 else b'\x00')
+        raw = self._read(0x27, nbytes + 1)
+        if buf is None:
+            return raw[1:]
+        buf[:] = raw[1:]
+        return buf
 
     # 修改显示方法，添加刷新控制逻辑
-    def display_frame(self, frame_buffer, partial=False, x=0, y=0, w=None, h=None, global_refresh=False):
+    def display_frame(self, frame_buffer, partial=False, x=0, y=0, w=None, h=None, global_refresh=False,
+                      wait=True, callback=None):
         """显示帧缓冲区内容
         
         参数:
@@ -235,10 +1040,15 @@ class EPD:
             w: 局部刷新的宽度，默认为全屏宽度
             h: 局部刷新的高度，默认为全屏高度
             global_refresh: 是否使用全局刷新模式，默认为False
+            wait: 是否阻塞到刷新完成，默认为True；为False时启动刷新后立即返回，
+                  刷新结束前不能修改frame_buffer
+            callback: 刷新完成后调用 callback(epd)
         """
-        print("显示帧缓冲区")
+        if _DEBUG: log.debug("显示帧缓冲区")
         if self.init_done==False:
             self.init()
+        self.finish_refresh()
+        self._begin_op()
 
         # 如果未指定宽高，则使用全屏
         if w is None:
@@ -246,67 +1056,237 @@ class EPD:
         if h is None:
             h = self.height
             
-        # 检查是否需要强制全屏刷新
-        need_clear_screen = self.force_full_refresh or self.refresh_count >= self.partial_refresh_limit
+        # 残影预算耗尽或被要求强制刷新时，本次改为一次完整波形的全局刷新
+        need_clear_screen = self.force_full_refresh or self.policy.need_full(self)
+        if need_clear_screen and not global_refresh:
+            log.info("需要清除残影，本次改为全局刷新")
+            global_refresh = True
+        elif self.select_refresh_mode() == "full" and not global_refresh:
+            log.info("面板温度过低，本次改为全局刷新")
+            global_refresh = True
         
-        # 如果使用全局刷新模式，则设置全屏刷新区域
+        # 写入图像数据
         if global_refresh:
+            # 全局刷新模式写入整帧
             self.set_partial(0, 0, self.width, self.height)
-        elif need_clear_screen:
-            self.clear_screen()
-            # 设置局部刷新区域
-            self.set_partial(x, y, w, h)
+            self.write_image(0x24, frame_buffer)
+        elif partial:
+            # 局部刷新只传输窗口内的数据
+            region = self.write_region(0x24, frame_buffer, x, y, w, h)
+            if region is None:
+                # 窗口裁剪后为空，没有写入任何数据，不刷新
+                if _DEBUG: log.debug("局部刷新区域为空，跳过刷新")
+                self._op_start = None
+                if callback is not None:
+                    callback(self)
+                return
         else:
-            # 设置局部刷新区域
-            self.set_partial(x, y, w, h)
-        
-        # 写入图像数据
-        self.write_image(0x24, frame_buffer, True, True)
+            self.set_partial(0, 0, self.width, self.height)
+            self.write_image(0x24, frame_buffer)
 
         # 播放等待音效 (异步)
         if system_buzzer:
             system_buzzer.play_process_async()
 
         # 执行刷新
+        irq_callback = None if wait else callback
         if global_refresh:
             # 全局刷新模式
-            print("执行全局刷新模式")
-            self._command(0x21,b'\x40\x00')
-            self._command(0x22,b'\xf7')  # 使用完整刷新模式
-            self._command(0x20)
-            self.wait_until_idle()
-            self.refresh_count = 0
-            print("全局刷新完成，重置计数器")
-        elif need_clear_screen:
-            # 已经通过clear_screen()执行了刷新，这里不需要再次刷新
-            print("已通过clear_screen完成全屏刷新，跳过重复刷新")
+            if _DEBUG: log.debug("执行全局刷新模式")
+            self._activate(irq_callback, _SEQ_FULL)  # 使用完整刷新模式
             self.refresh_count = 0
-        elif partial and not self.force_full_refresh and self.refresh_count < self.partial_refresh_limit:
+            self.force_full_refresh = False
+            self.policy.on_full(self, cleaning=need_clear_screen)
+            rects = None
+        elif partial:
             # 局部刷新模式
-            print("执行局部刷新模式")
-            self._command(0x21,b'\x40\x00')
-            self._command(0x1A, b'\x64')  # 快速刷新设置
-            self._command(0x22,b'\xd7')  # 局部刷新命令
-            self._command(0x20)
-            self.wait_until_idle()
-            self.refresh_count += 1
-            print(f"局部刷新完成，刷新计数: {self.refresh_count}/{self.partial_refresh_limit}")
+            rects = [region]
+            self._partial_update(frame_buffer, rects, irq_callback)
         else:
             # 全屏刷新模式
-            print("执行全屏刷新模式")
-            self.update_full()
+            if _DEBUG: log.debug("执行全屏刷新模式")
+            self.update_full(False, irq_callback)
             self.refresh_count = 0
-            print("全屏刷新完成，重置计数器")
+            self.policy.on_full(self)
+            rects = None
+        self._end_refresh(frame_buffer, rects, wait, callback)
+
+    def _end_refresh(self, frame_buffer, rects, wait, callback):
+        """阻塞模式下等待刷新结束并收尾，非阻塞模式下登记待收尾的刷新"""
+        self._pending = (frame_buffer, rects, None if wait else callback)
+        if wait:
+            self.finish_refresh()
+            if _DEBUG: log.debug("刷新完成")
+            if callback is not None:
+                callback(self)
+
+    def _partial_update(self, frame_buffer, rects, callback=None):
+        """启动一次局部刷新并通知刷新策略
+
+        RAM 0x26中保存着屏幕上的旧画面时使用差分波形，只驱动变化的像素；
+        否则使用强制温度的快速刷新。rects为已写入RAM的区域。
+        """
+        # 偏冷时不使用强制高温的快速波形，优先用按实测温度加载的差分波形
+        fast = self.select_refresh_mode() == "fast"
+        differential = self.use_differential and self._old_ram_valid
+        # 帧副本要到刷新收尾时才更新，此时仍是屏幕上的旧画面
+        old = self.shadow if self._shadow_valid else None
+        self.policy.on_partial(self, frame_buffer, old, rects, differential)
+        if differential:
+            if _DEBUG: log.debug("执行差分局部刷新")
+            # 使用RAM 0x26作为旧画面
+            seq = _SEQ_DIFF if self.powered else _SEQ_DIFF_WAKE
+        elif fast:
+            if _DEBUG: log.debug("执行局部刷新模式")
+            seq = _SEQ_FAST  # 快速刷新设置
+        else:
+            if _DEBUG: log.debug("执行标准波形刷新")
+            seq = _SEQ_FULL  # 按实测温度加载波形
+        self._activate(callback, seq, partial=True)
+        self.refresh_count += 1
+        if _DEBUG: log.debug("局部刷新计数: %d", self.refresh_count)
+
+    def _commit_frame(self, frame_buffer, rects=None):
+        """刷新完成后记录屏幕上的内容
+
+        差分模式下把刚显示的内容同步写入RAM 0x26作为下一次局部刷新的旧画面，
+        同时更新帧副本。rects为None表示整帧都已刷新。
+        """
+        if self.use_differential:
+            if rects is None:
+                self.set_partial(0, 0, self.width, self.height)
+                self.write_image(0x26, frame_buffer)
+                self._old_ram_valid = True
+            elif self._old_ram_valid:
+                for x, y, w, h in rects:
+                    self.write_region(0x26, frame_buffer, x, y, w, h)
+        if rects is None:
+            self._shadow_store(frame_buffer)
+        else:
+            for rect in rects:
+                self._shadow_store(frame_buffer, rect)
+
+    def _alloc_shadow(self):
+        """分配帧副本，内存不足时返回False"""
+        if self.shadow is None:
+            try:
+                self.shadow = bytearray(self.stride * self.height)
+            except MemoryError:
+                return False
+        return True
+
+    def _shadow_store(self, frame_buffer, rect=None):
+        """记录已显示到屏幕的内容；rect为None时记录整帧
+
+        整帧刷新时分配帧副本，这样先用display_frame()显示首帧、之后改用
+        display_auto()的应用不会在第一次display_auto()时多做一次全局刷新。
+        """
+        if rect is None and not self._alloc_shadow():
+            return
+        shadow = self.shadow
+        if shadow is None:
+            return
+        stride = self.stride
+        if rect is None:
+            shadow[:] = memoryview(frame_buffer)[:len(shadow)]
+            self._shadow_valid = True
+            return
+        if not self._shadow_valid:
+            return
+        x, y, w, h = rect
+        mv = memoryview(frame_buffer)
+        b0 = x // 8
+        b1 = min((x + w + 7) // 8, stride)
+        for i in range(y, y + h):
+            start = i * stride
+            shadow[start + b0:start + b1] = mv[start + b0:start + b1]
+
+    def display_auto(self, frame_buffer, wait=True, callback=None):
+        """与上一次显示的帧比较，按变化内容自动选择刷新方式
+
+        画面没有变化时不刷新；变化面积超过full_refresh_percent、刷新策略要求
+        全屏刷新或没有上一帧可比较时执行全局刷新；否则把变化区域合并为最多
+        max_dirty_boxes个矩形，逐个写入RAM后只做一次局部刷新。
+        wait和callback的含义同display_frame()，不刷新时callback立即被调用。
+
+        返回实际执行的刷新方式: "none" / "partial" / "full"
+        """
+        if self.init_done==False:
+            self.init()
+        # 与上一帧比较前先完成进行中的刷新，保证帧副本是最新的
+        self.finish_refresh()
+        self._begin_op()
+        if not self._alloc_shadow():
+            log.warn("内存不足，无法比较帧差异，执行全局刷新")
+            self.display_frame(frame_buffer, global_refresh=True, wait=wait, callback=callback)
+            return "full"
+
+        if not self._shadow_valid:
+            self.display_frame(frame_buffer, global_refresh=True, wait=wait, callback=callback)
+            return "full"
+
+        boxes = frame_diff.dirty_boxes(frame_buffer, self.shadow, self.stride,
+                                       self.height, self.max_dirty_boxes)
+        return self.display_regions(frame_buffer, boxes, wait=wait, callback=callback)
+
+    def display_regions(self, frame_buffer, rects, wait=True, callback=None):
+        """把帧缓冲区中的多个矩形区域合并为一次刷新显示
+
+        每个矩形按各自的窗口写入RAM，全部写完后只触发一次局部刷新，
+        N个区域只需等待一次BUSY。矩形总面积超过full_refresh_percent、
+        刷新策略要求全屏刷新或面板温度过低时改为一次全局刷新。
+
+        参数:
+            frame_buffer: 整个画布的帧缓冲区
+            rects: 画布坐标下的矩形列表 [(x, y, w, h), ...]，会自动裁剪并按字节对齐
+            wait, callback: 含义同display_frame()，不刷新时callback立即被调用
+
+        返回实际执行的刷新方式: "none" / "partial" / "full"
+        """
+        if self.init_done==False:
+            self.init()
+        self.finish_refresh()
+        self._begin_op()
+        aligned = []
+        area = 0
+        for x, y, w, h in rects:
+            rect = self.align_rect(x, y, w, h)
+            if rect is not None:
+                aligned.append(rect)
+                area += rect[2] * rect[3]
+        if not aligned:
+            if _DEBUG: log.debug("画面无变化，跳过刷新")
+            self._op_start = None
+            if callback is not None:
+                callback(self)
+            return "none"
+
+        if (area * 100 >= self.width * self.height * self.full_refresh_percent or
+                self.force_full_refresh or self.policy.need_full(self) or
+                self.select_refresh_mode() == "full"):
+            self.display_frame(frame_buffer, global_refresh=True, wait=wait, callback=callback)
+            return "full"
+
+        if _DEBUG: log.debug("%d个区域合并为一次刷新，共%d像素", len(aligned), area)
+        for x, y, w, h in aligned:
+            self.write_region(0x24, frame_buffer, x, y, w, h)
+        if system_buzzer:
+            system_buzzer.play_process_async()
+        self._partial_update(frame_buffer, aligned, None if wait else callback)
+        self._end_refresh(frame_buffer, aligned, wait, callback)
+        return "partial"
 
     # 添加强制全屏刷新的方法
     def force_refresh(self):
         """强制执行下一次全屏刷新，清除所有残影"""
         self.force_full_refresh = True
-        print("已设置强制全屏刷新标志")
+        if _DEBUG: log.debug("已设置强制全屏刷新标志")
 
-    # to wake call reset() or init()
+    # to wake call init()
     def sleep(self):
+        """进入深度睡眠，RAM内容丢失，下次init()时完整初始化"""
         self.pwr_off()
         self._command(0x10, b'\x01')
-        self.init_done = False
-        self.hibernate = True
\ No newline at end of file
+        self._set_state(STATE_HIBERNATE)
+        self._shadow_valid = False
+        self._old_ram_valid = False
\ No newline at end of file
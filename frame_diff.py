@@ -0,0 +1,127 @@
+"""
+帧差异检测
+逐行比较新旧帧缓冲区，把变化的字节区间合并为按字节对齐的矩形，
+供墨水屏驱动决定局部刷新、全屏刷新还是不刷新
+"""
+
+# 字节中置位的个数，统计翻转像素时查表
+_POP8 = bytes(bin(i).count("1") for i in range(256))
+
+
+def changed_spans(new, old, stride, height):
+    """逐行比较两帧，返回变化行的 (行号, 起始字节, 结束字节) 列表
+
+    参数:
+        new: 新的帧缓冲区
+        old: 上一次发送的帧缓冲区
+        stride: 每行字节数
+        height: 行数
+    """
+    nv = memoryview(new)
+    ov = memoryview(old)
+    spans = []
+    start = 0
+    for y in range(height):
+        end = start + stride
+        # 整行相同则直接跳过，比较在C层完成
+        if nv[start:end] != ov[start:end]:
+            l = start
+            while nv[l] == ov[l]:
+                l += 1
+            r = end - 1
+            while nv[r] == ov[r]:
+                r -= 1
+            spans.append((y, l - start, r - start))
+        start = end
+    return spans
+
+
+def _union(a, b):
+    return [min(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3])]
+
+
+def _area(box):
+    return (box[1] - box[0] + 1) * (box[3] - box[2] + 1)
+
+
+def _touching(a, b, gap_bytes, gap_rows):
+    return (a[0] <= b[1] + gap_bytes + 1 and b[0] <= a[1] + gap_bytes + 1 and
+            a[2] <= b[3] + gap_rows + 1 and b[2] <= a[3] + gap_rows + 1)
+
+
+def merge_spans(spans, max_boxes=4, gap_bytes=2, gap_rows=8):
+    """把逐行变化区间合并为矩形
+
+    参数:
+        spans: changed_spans() 的结果
+        max_boxes: 最多保留的矩形数，超出时合并面积增加最少的两个
+        gap_bytes: 水平方向相距不超过该字节数的区间合并
+        gap_rows: 垂直方向相距不超过该行数的区间合并
+
+    返回像素坐标的矩形列表 [(x, y, w, h), ...]，x和w按8像素对齐。
+    """
+    # 矩形内部表示为 [起始字节, 结束字节, 起始行, 结束行]
+    boxes = []
+    for y, l, r in spans:
+        span = [l, r, y, y]
+        for k in range(len(boxes)):
+            if _touching(boxes[k], span, gap_bytes, gap_rows):
+                boxes[k] = _union(boxes[k], span)
+                break
+        else:
+            boxes.append(span)
+
+    # 扩展后的矩形之间可能重新相交，反复合并直到稳定
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                if _touching(boxes[i], boxes[j], gap_bytes, gap_rows):
+                    boxes[i] = _union(boxes[i], boxes.pop(j))
+                    merged = True
+                    break
+            if merged:
+                break
+
+    while len(boxes) > max_boxes:
+        best = None
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                u = _union(boxes[i], boxes[j])
+                cost = _area(u) - _area(boxes[i]) - _area(boxes[j])
+                if best is None or cost < best[0]:
+                    best = (cost, i, j, u)
+        _, i, j, u = best
+        boxes.pop(j)
+        boxes[i] = u
+
+    return [(b[0] * 8, b[2], (b[1] - b[0] + 1) * 8, b[3] - b[2] + 1) for b in boxes]
+
+
+def dirty_boxes(new, old, stride, height, max_boxes=4):
+    """比较两帧并返回变化区域的矩形列表，两帧相同时返回空列表"""
+    size = stride * height
+    if memoryview(new)[:size] == memoryview(old)[:size]:
+        return []
+    return merge_spans(changed_spans(new, old, stride, height), max_boxes)
+
+
+def flipped_pixels(new, old, stride, x, y, w, h):
+    """统计矩形内新旧两帧取值不同的像素数，x和w按8像素对齐"""
+    nv = memoryview(new)
+    ov = memoryview(old)
+    pop = _POP8
+    b0 = x // 8
+    b1 = min((x + w + 7) // 8, stride)
+    n = 0
+    for row in range(y, y + h):
+        start = row * stride
+        l = start + b0
+        r = start + b1
+        # 相同的行不逐字节统计
+        if nv[l:r] == ov[l:r]:
+            continue
+        for i in range(l, r):
+            n += pop[nv[i] ^ ov[i]]
+    return n
@@ -2,16 +2,23 @@
 从后端服务器获取二进制图像数据并显示在墨水屏上
 """
 import socket
+from micropython import const
 import config
-from time import sleep_ms
+from time import sleep_ms, ticks_ms, ticks_diff
 import image
 import wifi
 import gc
+import log
+import display_service
+from display_pipeline import DisplayPipeline
 try:
     from buzzer import system_buzzer
 except ImportError:
     system_buzzer = None
 
+# 为1时编译进本模块的调试日志
+_DEBUG = const(0)
+
 def http_get(host, port, path, headers=None):
     """使用socket实现HTTP GET请求，优化内存使用"""
     s = None
@@ -20,7 +27,7 @@ def http_get(host, port, path, headers=None):
         gc.collect()
         
         # 创建socket连接
-        print("连接到 " + host + ":" + str(port))
+        if _DEBUG: log.debug("连接到 %s:%d", host, port)
         addr = socket.getaddrinfo(host, port)[0][-1]
         s = socket.socket()
         s.settimeout(10)
@@ -39,11 +46,11 @@ def http_get(host, port, path, headers=None):
         request += "\r\n"
         
         # 发送请求
-        print("发送HTTP请求")
+        if _DEBUG: log.debug("发送HTTP请求")
         s.send(request.encode())
         
         # 接收响应头
-        print("接收响应...")
+        if _DEBUG: log.debug("接收响应...")
         response_buffer = b""
         while b"\r\n\r\n" not in response_buffer:
             chunk = s.recv(64)
@@ -56,7 +63,7 @@ def http_get(host, port, path, headers=None):
         # 解析HTTP响应
         header_end = response_buffer.find(b"\r\n\r\n")
         if header_end == -1:
-            print("无效的HTTP响应")
+            log.warn("无效的HTTP响应")
             if s: s.close()
             return None, None
         
@@ -68,7 +75,7 @@ def http_get(host, port, path, headers=None):
         except:
             status_code = 0
             
-        print("HTTP状态码: " + str(status_code))
+        if _DEBUG: log.debug("HTTP状态码: %d", status_code)
         
         # 提取Content-Length
         content_length = -1
@@ -83,7 +90,7 @@ def http_get(host, port, path, headers=None):
         body_start = response_buffer[header_end + 4:]
         
         if content_length > 0:
-            print(f"准备接收数据，大小: {content_length} 字节")
+            if _DEBUG: log.debug("准备接收数据，大小: %d 字节", content_length)
             try:
                 gc.collect()
                 body = bytearray(content_length)
@@ -102,14 +109,14 @@ def http_get(host, port, path, headers=None):
                     received += len(chunk)
                     
                 if received < content_length:
-                    print(f"警告: 只接收了 {received}/{content_length} 字节")
+                    log.warn("只接收了 %d/%d 字节", received, content_length)
                     
             except MemoryError:
-                print("内存分配失败，无法分配 " + str(content_length) + " 字节")
+                log.error("内存分配失败，无法分配 %d 字节", content_length)
                 if s: s.close()
                 return None, None
         else:
-            print("未找到Content-Length，使用流式接收")
+            if _DEBUG: log.debug("未找到Content-Length，使用流式接收")
             body_parts = [body_start]
             while True:
                 chunk = s.recv(1024)
@@ -119,11 +126,11 @@ def http_get(host, port, path, headers=None):
             body = b"".join(body_parts)
         
         s.close()
-        print("接收完成，总大小: " + str(len(body)) + " 字节")
+        if _DEBUG: log.debug("接收完成，总大小: %d 字节", len(body))
         return status_code, body
         
     except Exception as e:
-        print("HTTP请求失败: " + str(e))
+        log.error("HTTP请求失败: %s", e)
         import sys
         sys.print_exception(e)
         if s: s.close()
@@ -134,8 +141,8 @@ def fetch_image_from_server():
     # API路径
     path = "/api/contents/devices/1/content/latest/binary?invert=false&rotate=false&dither=true"
     
-    print("正在从服务器获取图像")
-    print("路径: " + path)
+    log.info("正在从服务器获取图像")
+    if _DEBUG: log.debug("路径: %s", path)
     
     # 设置请求头
     headers = {
@@ -152,27 +159,27 @@ def fetch_image_from_server():
     )
     
     if status_code == 200:
-        print("成功获取图像数据，大小: " + str(len(body)) + " 字节")
+        log.info("成功获取图像数据，大小: %d 字节", len(body))
         if system_buzzer:
             system_buzzer.play_success()
         return body
     else:
-        print("获取图像失败，状态码: " + str(status_code))
+        log.warn("获取图像失败，状态码: %s", status_code)
         if system_buzzer:
             system_buzzer.play_error()
         return None
 
 def run():
     """主运行函数"""
-    print("启动HTTP图像显示程序")
+    log.info("启动HTTP图像显示程序")
     
     # 连接WiFi
     if not wifi.wifi_manager.connect():
-        print("无法连接WiFi，程序退出")
+        log.error("无法连接WiFi，程序退出")
         return
     
     # 从服务器获取图像
-    print("\n=== 获取图像数据 ===")
+    log.info("=== 获取图像数据 ===")
     
     # 重试机制
     max_retries = 3
@@ -181,24 +188,82 @@ def run():
     
     for i in range(max_retries):
         if i > 0:
-            print(f"等待 {retry_delay/1000} 秒后重试...")
+            log.info("等待 %d 秒后重试...", retry_delay // 1000)
             sleep_ms(retry_delay)
-            print(f"重试 ({i+1}/{max_retries})...")
+            log.info("重试 (%d/%d)...", i + 1, max_retries)
             
         bin_data = fetch_image_from_server()
         if bin_data:
             break
             
     if bin_data is None:
-        print("无法获取图像数据，程序退出")
+        log.error("无法获取图像数据，程序退出")
         return
     
     # 使用image模块显示
-    print("\n=== 显示图像 ===")
-    image.run(bin_data, width=400, height=300)
+    log.info("=== 显示图像 ===")
+    # 后端服务器输出的是MONO_HLSB格式
+    image.run(bin_data, width=400, height=300, fmt=image.FORMAT_HLSB)
+
 
+    log.info("程序完成")
 
-    print("\n程序完成")
+def run_slideshow(count=None, interval_ms=0):
+    """连续从服务器获取图像并轮播显示
+    
+    使用双缓冲流水线：屏幕刷新上一张图像的同时下载并绘制下一张，
+    相邻两张图像的间隔约为 max(下载+绘制, 刷新) 而不是两者之和。
+    
+    参数:
+        count: 显示的图像数量，None表示一直轮播
+        interval_ms: 每张图像至少显示的时间(毫秒)
+    """
+    log.info("启动HTTP图像轮播")
+    
+    if not wifi.wifi_manager.connect():
+        log.error("无法连接WiFi，程序退出")
+        return
+    
+    # 共享帧缓冲区作为流水线的其中一个缓冲区，只需再分配一块
+    e, buf, _ = display_service.acquire()
+    try:
+        pipe = DisplayPipeline(e, auto=False, buf=buf)
+        
+        shown = 0
+        last_present = None
+        while count is None or shown < count:
+            # 上一张图像仍在刷新，此时进行网络请求
+            bin_data = fetch_image_from_server()
+            if bin_data is None:
+                log.warn("获取图像失败，5秒后重试")
+                sleep_ms(5000)
+                continue
+            
+            if len(bin_data) == len(pipe.buf):
+                # 整屏图片复制到后台缓冲区并原地转换为面板格式，无需逐像素blit
+                image.load_frame(pipe.buf, bin_data, image.FORMAT_HLSB)
+            else:
+                pipe.fb.fill(1)
+                image.draw_image(pipe.fb, bin_data, 400, 300, fmt=image.FORMAT_HLSB)
+            bin_data = None
+            gc.collect()
+            
+            if last_present is not None and interval_ms > 0:
+                left = interval_ms - ticks_diff(ticks_ms(), last_present)
+                if left > 0:
+                    sleep_ms(left)
+            
+            # 提交后立即返回，刷新在后台进行
+            pipe.present(global_refresh=True)
+            last_present = ticks_ms()
+            shown += 1
+            log.info("已提交第 %d 张图像", shown)
+        
+        pipe.wait()
+        log.info("轮播结束")
+    finally:
+        # 等待最后一次刷新并关闭模拟电路，交还给下一个应用
+        display_service.release()
 
 if __name__ == "__main__":
     run()
@@ -0,0 +1,131 @@
+"""
+图标图集
+由 tool/build_icons.py 根据 tool/icons/ 生成，请勿手工修改
+"""
+# Format: MONO_HMSB，每个变体逐行存储，每行 (宽 + 7) // 8 字节
+ATLAS = (
+    b'\x08\x1c"AA"\x1c\x08\x00\x1c"*&"\x1c\x00\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x7f\x00\xf8\xff\xff\xff\x7f\x00\xf8\xff\xff'
+    b'\xff\x7f\x00\xf8\xff\xff\xff\x81\xff\x07\xfe\xff\xff\x81\xff\x07\xfe\xff\xff\x81\xff\x07\xfe\xff?\xfe\xff\xff\xf1\xff?\xfe'
+    b'\xff\xff\xf1\xff?\xfe\xff\xff\xf1\xff\xc7\xff\xff\xff\x8f\xff\xc7\xff\xff\xff\x8f\xff\xc7\xff\xff\xff\x8f\xff\xc7\x7f\x00\xc0'
+    b'\x8f\xff\xc7\x7f\x00\xc0\x8f\xff\xc7\x7f\x00\xc0\x8f\xff\xc7\x81\xff\x07\x8e\xff\xc7\x81\xff\x07\x8e\xff\xc7\x81\xff\x07\x8e\xff'
+    b'\x07\xfe\xff\xff\x81\xff\x07\xfe\xff\xff\x81\xff\x07\xfe\xff\xff\x81\xff\xc7\xff\xff\xff\x8f\xff\xc7\xff\xff\xff\x8f\xff\xc7\xff'
+    b'\xff\xff\x8f\xff\xc7\xff\xff\xff\x8f\xff\xc7\xff\xff\xff\x8f\xff\xc7\xff\xff\xff\x8f\xff\x07\xfe\xff\xff\x81\xff\x07\xfe\xff\xff'
+    b'\x81\xff\x07\xfe\xff\xff\x81\xff?\x00\x00\x00\xf0\xff?\x00\x00\x00\xf0\xff?\x00\x00\x00\xf0\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x00\x00\x00\x00\xe0\x01\x18\x06\x04\x08\x02\x10\xe2\x13\x1a\x16'
+    b'\x06\x18\x02\x10\x02\x10\x06\x18\xfc\x0f\x00\x00\x00\x00\x00\x00\x08\x1c*UU*\x1c\x08<BBBBBB<'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x7f\x00\xf8\xff\xff\xff\x7f\x00\xf8\xff\xff\xff\x7f'
+    b'\x00\xf8\xff\xff\xff\x81\xff\x07\xfe\xff\xff\x81\xff\x07\xfe\xff\xff\x81\xff\x07\xfe\xff?\xfe\xff\xff\xf1\xff?\xfe\xff\xff'
+    b'\xf1\xff?\xfe\xff\xff\xf1\xff\xc7\xff\xff\xff\x8f\xff\xc7\xff\xff\xff\x8f\xff\xc7\xff\xff\xff\x8f\xff\xc7\xff\xff\xff\x8f\xff'
+    b'\xc7\xff\xff\xff\x8f\xff\xc7\xff\xff\xff\x8f\xff\x07\xfe\xff\xff\x81\xff\x07\xfe\xff\xff\x81\xff\x07\xfe\xff\xff\x81\xff?\x00'
+    b'\x00\x00\xf0\xff?\x00\x00\x00\xf0\xff?\x00\x00\x00\xf0\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\x8f\x1f?\xfe\xff\xff\x8f\x1f?\xfe\xff\xff\x8f\x1f?\xfe\xff\xff\x8f\x1f?\xfe\xff\xff\x8f\x1f?\xfe\xff'
+    b'\xff\x8f\x1f?\xfe\xff\xff\x8f\x1f?\xfe\xff\xff\x8f\x1f?\xfe\xff\xff\x8f\x1f?\xfe\xff\xff\xf1\xe3\xc7\xff\xff\xff\xf1'
+    b'\xe3\xc7\xff\xff\xff\xf1\xe3\xc7\xff\xff\xff\xf1\xe3\xc7\xff\xff\xff\xf1\xe3\xc7\xff\xff\xff\xf1\xe3\xc7\xff\xff\xff\xf1\xe3\xc7'
+    b'\xff\xff\xff\xf1\xe3\xc7\xff\xff\xff\xf1\xe3\xc7\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\x00\x00\xe0\x01\x18\x06\x04\x08\x02\x10\x02\x10\x06\x18\xfc\x0f\x00\x00\x90\x04\x90\x04\x90\x04H\x02H\x02H\x02\x00\x00'
+    b'\xff\xff\xff\xff????\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x00\xff\xff\xff\x00\xff\xff\xff\x00\xff\xff\xff\x00\xff\xff\xff\x00\xff\xff\xff\x00'
+    b'\xff\xff\xff\x00\xff\xff\xff\x00\xff\xff\xff\x00\xff\xff\xff\x00\xff\xff\xff\x00\xff\xff\xff\x00\xff\xff\xff\x00\xff\xff\xff\x00'
+    b'\xff\xff\xff\x00\xff\xff\xff\x00\x00\x00\x00\x00\xc0\xc0\xc0\xc0\xff\xff\xff\xff\x0f\x0f\x0f\x0f\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x00\x00\xff\xff\x00\x00'
+    b'\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00'
+    b'\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\x00\x00\x00\x00\xf0\xf0\xf0\xf0'
+    b'\xff\xff\xff\xff\x0f\x07\x0f\x0f\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00'
+    b'\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00'
+    b'\xff\xff\x00\x00\xff\xff\x00\x00\x00\x00\x00\x00\xf0\xf8\xf0\xf0\xff\xff\xff\xff\x0f\x07\x07\x07\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x00\x00\xff\xff\x00\x00'
+    b'\xff\xff\x00\x00\xff\xff\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00'
+    b'\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00\x00\x00\x00\x00\xf0\xf8\xf8\xf8'
+    b'\xff\xff\xff\xff\x0f\x07\x03\x07\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00'
+    b'\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00'
+    b'\xff\x0f\x00\x00\xff\x0f\x00\x00\x00\x00\x00\x00\xf0\xf8\xfc\xf8\xff\xff\xff\xff\x0f\x07\x03\x03\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x00\x00\xff\xff\x00\x00'
+    b'\xff\xff\x00\x00\xff\xff\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00'
+    b'\xff\x00\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00\x00\x00\x00\x00\xf0\xf8\xfc\xfc'
+    b'\xff\xff\xff\xff\x0f\x07\x03\x05\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00'
+    b'\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00\x0f\x0f\x00\x00\x0f\x0f\x00\x00'
+    b'\x0f\x0f\x00\x00\x0f\x0f\x00\x00\x00\x00\x00\x00\xf0\xf8\xfc\xfa\xff\xff\xff\xff\x0f\x07\x03\x01\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x00\x00\xff\xff\x00\x00'
+    b'\xff\xff\x00\x00\xff\xff\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00'
+    b'\xff\x00\x00\x00\xff\x00\x00\x00\x0f\x00\x00\x00\x0f\x00\x00\x00\x0f\x00\x00\x00\x0f\x00\x00\x00\x00\x00\x00\x00\xf0\xf8\xfc\xfe'
+    b'\xff\xff\xff\xff\x0f\x07\x03\x00\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff'
+    b'\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\xff\x00\x00\xff\x0f\x00\x00\xff\x0f\x00\x00'
+    b'\xff\x0f\x00\x00\xff\x0f\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00\xff\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xf0\xf8\xfc\xff\x00\x0e\x11\x11\x11\n\x04\x00\x00\x0e\x11\x11\x11\x11\x0e\x00'
+    b'\xff\xff\x1f\xf8\xff\xff\xff\xff\x1f\xf8\xff\xff\xff\xff\x1f\xf8\xff\xff\xff\xff\x1f\xf8\xff\xff\xff\xff\x1f\xf8\xff\xff\xff\xff'
+    b'\x1f\xf8\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xf1\xff\xff\x8f\xff\xff\xf1\xff\xff'
+    b'\x8f\xff\xff\xf1\xff\xff\x8f\xff\xff\x8f\xff\xff\xf1\xff\xff\x8f\xff\xff\xf1\xff\xff\x8f\xff\xff\xf1\xff\xff\x7f\x00\x00\xfe\xff'
+    b'\xff\x7f\x00\x00\xfe\xff\xff\x7f\x00\x00\xfe\xff\xff\x01\x00\x00\x80\xff\xff\x01\x00\x00\x80\xff\xff\x01\x00\x00\x80\xff?\x00'
+    b'\x00\x00\x00\xfc?\x00\x00\x00\x00\xfc?\x00\x00\x00\x00\xfc?\x00\x00\x00\x00\xfc?\x00\x00\x00\x00\xfc?\x00\x00\x00'
+    b'\x00\xfc\xff\x01\x00\x00\x80\xff\xff\x01\x00\x00\x80\xff\xff\x01\x00\x00\x80\xff\xff\x7f\x00\x00\xfe\xff\xff\x7f\x00\x00\xfe\xff'
+    b'\xff\x7f\x00\x00\xfe\xff\xff\x8f\xff\xff\xf1\xff\xff\x8f\xff\xff\xf1\xff\xff\x8f\xff\xff\xf1\xff\xff\xf1\xff\xff\x8f\xff\xff\xf1'
+    b'\xff\xff\x8f\xff\xff\xf1\xff\xff\x8f\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x1f\xf8'
+    b'\xff\xff\xff\xff\x1f\xf8\xff\xff\xff\xff\x1f\xf8\xff\xff\xff\xff\x1f\xf8\xff\xff\xff\xff\x1f\xf8\xff\xff\xff\xff\x1f\xf8\xff\xff'
+    b'\x80\x01\x80\x01\x00\x00\x08\x10\x10\x08\xe0\x07\xf8\x1f\xfc?\xfc?\xf8\x1f\xe0\x07\x10\x08\x08\x10\x00\x00\x80\x01\x80\x01'
+    b'\xff\xff\x1f\xf8\xe7\xe7\xfb\xdf=\xbc\xces\xf6oz^z^\xf6o\xces=\xbc\xfb\xdf\xe7\xe7\x1f\xf8\xff\xff'
+    b'\x00\x00\xe0\x07\x18\x18\x04 \xc2C1\x8c\t\x90\x85\xa1\x85\xa1\t\x901\x8c\xc2C\x04 \x18\x18\xe0\x07\x00\x00'
+    b'\x00<B\x81$B\x18\x00\x00B$\x18\x18$B\x00'
+)
+
+# (名称, 倍数, 颜色) -> (偏移, 宽, 高)
+INDEX = {
+    ('afternoon', 1, 1): (0, 8, 8),
+    ('clock', 1, 1): (8, 8, 8),
+    ('cloudy', 1, 1): (304, 16, 16),
+    ('cloudy', 3, 0): (16, 48, 48),
+    ('evening', 1, 1): (336, 8, 8),
+    ('morning', 1, 1): (0, 8, 8),
+    ('night', 1, 1): (336, 8, 8),
+    ('noon', 1, 1): (344, 8, 8),
+    ('rainy', 1, 1): (640, 16, 16),
+    ('rainy', 3, 0): (352, 48, 48),
+    ('rssi0', 1, 0): (672, 8, 8),
+    ('rssi0', 1, 1): (808, 8, 8),
+    ('rssi0', 4, 0): (680, 32, 32),
+    ('rssi1', 1, 0): (816, 8, 8),
+    ('rssi1', 1, 1): (952, 8, 8),
+    ('rssi1', 4, 0): (824, 32, 32),
+    ('rssi2', 1, 0): (960, 8, 8),
+    ('rssi2', 1, 1): (1096, 8, 8),
+    ('rssi2', 4, 0): (968, 32, 32),
+    ('rssi3', 1, 0): (1104, 8, 8),
+    ('rssi3', 1, 1): (1240, 8, 8),
+    ('rssi3', 4, 0): (1112, 32, 32),
+    ('rssi4', 1, 0): (1248, 8, 8),
+    ('rssi4', 1, 1): (1384, 8, 8),
+    ('rssi4', 4, 0): (1256, 32, 32),
+    ('rssi5', 1, 0): (1392, 8, 8),
+    ('rssi5', 1, 1): (1528, 8, 8),
+    ('rssi5', 4, 0): (1400, 32, 32),
+    ('rssi6', 1, 0): (1536, 8, 8),
+    ('rssi6', 1, 1): (1672, 8, 8),
+    ('rssi6', 4, 0): (1544, 32, 32),
+    ('rssi7', 1, 0): (1680, 8, 8),
+    ('rssi7', 1, 1): (1816, 8, 8),
+    ('rssi7', 4, 0): (1688, 32, 32),
+    ('rssi8', 1, 0): (1824, 8, 8),
+    ('rssi8', 1, 1): (1960, 8, 8),
+    ('rssi8', 4, 0): (1832, 32, 32),
+    ('signal', 1, 1): (1968, 8, 8),
+    ('signal_off', 1, 1): (1976, 8, 8),
+    ('sunny', 1, 1): (2272, 16, 16),
+    ('sunny', 3, 0): (1984, 48, 48),
+    ('wifi16', 1, 0): (2304, 16, 16),
+    ('wifi16', 1, 1): (2336, 16, 16),
+    ('wifi8', 1, 1): (2368, 8, 8),
+    ('wifi8_off', 1, 1): (2376, 8, 8),
+}
@@ -0,0 +1,62 @@
+"""
+图标绘制
+图标由 tool/build_icons.py 预先打包在 icon_atlas.py 中：所有变体(放大倍数、黑/白笔画)
+以面板格式连续存放在一个字节串里，按偏移表用memoryview切片构造FrameBuffer，
+绘制时只需一次blit，不再每次分配缓冲区、逐字节复制或逐像素绘制。
+
+    import icons
+    icons.draw(fb, "sunny", 296, 60, scale=3)
+    icons.draw(fb, "wifi8", 140, 18, color=1)
+
+颜色0为黑色笔画，颜色1为白色笔画；默认只绘制笔画，opaque=True时连同底色
+(与笔画相反的颜色)一起绘制整个方块。图集中没有的变体第一次使用时由[1, 1]变体现场放大。
+"""
+import framebuf
+import icon_atlas
+import scaled_text
+
+# FrameBuffer需要可写缓冲区，图集在导入时复制一次到RAM
+_atlas = bytearray(icon_atlas.ATLAS)
+_view = memoryview(_atlas)
+# (名称, 倍数, 颜色) -> FrameBuffer
+_frames = {}
+
+
+def size(name, scale=1):
+    """返回图标放大scale倍后的 (宽, 高)"""
+    off, w, h = icon_atlas.INDEX[(name, 1, 1)]
+    return w * scale, h * scale
+
+
+def _build(name, scale, color):
+    """由[1, 1]变体生成图集中没有的变体"""
+    off, w, h = icon_atlas.INDEX[(name, 1, 1)]
+    src = bytes(_view[off:off + (w + 7) // 8 * h])
+    sw = w * scale
+    sh = h * scale
+    buf = bytearray((sw + 7) // 8 * sh)
+    fb = framebuf.FrameBuffer(buf, sw, sh, framebuf.MONO_HMSB)
+    if color == 0:
+        fb.fill(1)
+    scaled_text.draw_bitmap(fb, src, 0, 0, w, h, scale, color, msb_first=False)
+    return fb
+
+
+def frame(name, scale=1, color=0):
+    """返回图标变体的FrameBuffer，笔画为color，底色为1 - color"""
+    key = (name, scale, color)
+    fb = _frames.get(key)
+    if fb is None:
+        entry = icon_atlas.INDEX.get(key)
+        if entry is None:
+            fb = _build(name, scale, color)
+        else:
+            off, w, h = entry
+            fb = framebuf.FrameBuffer(_view[off:off + (w + 7) // 8 * h], w, h, framebuf.MONO_HMSB)
+        _frames[key] = fb
+    return fb
+
+
+def draw(fb, name, x, y, scale=1, color=0, opaque=False):
+    """在fb的(x, y)处绘制图标"""
+    fb.blit(frame(name, scale, color), x, y, -1 if opaque else 1 - color)
@@ -1,68 +1,158 @@
 """
 图片显示模块
 用于显示传入的二进制图片数据
+
+图片数据统一使用面板格式(FORMAT_NATIVE，即MONO_HMSB：每字节8个水平像素，
+bit0在最左边，行与行连续存放)。这与驱动的帧缓冲区格式相同，0度时按原样发送给面板，
+整屏图片无需转换和blit即可直接显示。旧的MONO_HLSB数据(bit7在最左边)仍可显示，
+需要传入 fmt=FORMAT_HLSB，显示前按字节查表转换。
 """
 import epaper4in2
 import config
+import display_service
 import framebuf
+import log
 from time import sleep_ms
 
-def run(image_data=None, width=128, height=296):
+# 面板格式，应用、转换工具和驱动共用
+FORMAT_NATIVE = framebuf.MONO_HMSB
+# 旧格式，tool/image_converter.py --hlsb 及后端服务器输出的数据
+FORMAT_HLSB = framebuf.MONO_HLSB
+
+
+def _reverse_bytes(buf, n):
+    rev = epaper4in2.REV8
+    for i in range(n):
+        buf[i] = rev[buf[i]]
+
+
+# viper版本在运行时编译：@micropython.viper在编译阶段处理，写在模块里时
+# 不支持viper的固件会导致整个模块编译失败，无法回退
+_VIPER_SRC = """
+@micropython.viper
+def _reverse_bytes(buf, n: int):
+    p = ptr8(buf)
+    rev = ptr8(REV8)
+    for i in range(n):
+        p[i] = rev[p[i]]
+"""
+
+_g = {"REV8": epaper4in2.REV8}
+try:
+    import micropython
+    _g["micropython"] = micropython
+    exec(_VIPER_SRC, _g)
+    _reverse_bytes = _g["_reverse_bytes"]
+except (ImportError, AttributeError, NameError, SyntaxError, ValueError):
+    # 不支持viper或exec的固件、主机模拟时使用上面的普通实现
+    pass
+del _g
+
+
+def to_native(buf):
+    """把MONO_HLSB数据原地转换为面板格式(每字节位反转)，返回buf
+
+    MONO_HLSB与MONO_HMSB的字节布局相同，只是字节内位序相反，转换不改变数据大小。
+    buf必须可写(bytearray)。
+    """
+    _reverse_bytes(buf, len(buf))
+    return buf
+
+
+def load_frame(buf, image_data, fmt=FORMAT_NATIVE):
+    """把整屏图片数据复制到帧缓冲区buf，必要时转换为面板格式
+
+    面板格式的数据只做一次内存复制，适合双缓冲流水线等已有缓冲区的场景。
+    """
+    if len(image_data) != len(buf):
+        raise ValueError("图片数据大小与帧缓冲区不一致")
+    buf[:] = image_data
+    if fmt != FORMAT_NATIVE:
+        to_native(buf)
+    return buf
+
+
+def draw_image(fb, image_data, width, height, screen_w=None, screen_h=None, fmt=FORMAT_NATIVE):
+    """把图片数据居中绘制到帧缓冲区
+
+    参数:
+        fb: 目标帧缓冲区
+        image_data: 图片的二进制数据
+        width, height: 图片尺寸
+        screen_w, screen_h: 帧缓冲区尺寸，默认为屏幕尺寸
+        fmt: 图片数据格式，FORMAT_NATIVE 或 FORMAT_HLSB
+    """
+    if screen_w is None:
+        screen_w = config.WIDTH
+    if screen_h is None:
+        screen_h = config.HEIGHT
+
+    # 确保image_data是bytearray类型
+    if isinstance(image_data, bytes):
+        bufImage = bytearray(image_data)
+    else:
+        bufImage = image_data
+
+    # 检查图片数据大小是否正确
+    expected_size = (width + 7) // 8 * height
+    if len(bufImage) != expected_size:
+        log.warn("图片数据大小不匹配，预期 %d 字节，实际 %d 字节", expected_size, len(bufImage))
+
+    # 与目标帧缓冲区格式相同时framebuf按字节复制，否则逐像素转换
+    fbImage = framebuf.FrameBuffer(bufImage, width, height, fmt)
+
+    # 将图片放置在屏幕中央
+    x_offset = (screen_w - width) // 2
+    y_offset = (screen_h - height) // 2
+    fb.blit(fbImage, x_offset, y_offset)
+
+def run(image_data=None, width=128, height=296, fmt=FORMAT_NATIVE):
     """显示传入的图片二进制数据
-    
+
+    整屏大小的面板格式图片直接交给驱动发送，不复制；
+    整屏大小的MONO_HLSB图片复制到共享帧缓冲区并查表转换；其他尺寸居中绘制到共享帧缓冲区。
+
     参数:
         image_data: 图片的二进制数据，如果为None则使用默认的image_dark图片
+        width, height: 图片尺寸
+        fmt: 图片数据格式，FORMAT_NATIVE 或 FORMAT_HLSB
     """
-    print("启动图片显示应用")
-    
+    log.info("启动图片显示应用")
+
     # 如果没有传入图片数据，则使用默认的image_dark图片
     if image_data is None:
         from image_dark import hello_world_dark
         image_data = hello_world_dark
-        print("使用默认的image_dark图片")
+        fmt = FORMAT_HLSB
+        log.info("使用默认的image_dark图片")
     else:
-        print("使用传入的图片数据")
-    
-    # 初始化墨水屏
-    e = epaper4in2.EPD(config.spi, config.cs, config.dc, config.rst, config.busy)
-    e.pwr_on()
-    e.init()
-    
+        log.info("使用传入的图片数据")
+
+    # 借用共享的墨水屏和帧缓冲区
+    e, buf, fb = display_service.acquire()
+
     # 获取屏幕尺寸
     w = config.WIDTH
     h = config.HEIGHT
-    
-    # 创建帧缓冲区
-    buf = bytearray(w * h // 8)
-    fb = framebuf.FrameBuffer(buf, w, h, framebuf.MONO_HMSB)
-    
-    # 设置背景为白色
-    black = 0
-    white = 1
-    fb.fill(white)
-    
-    # 加载并显示图片
-    print("显示图片")
-    
-    # 确保image_data是bytearray类型
-    if isinstance(image_data, bytes):
-        bufImage = bytearray(image_data)
+    size = (w + 7) // 8 * h
+
+    if width == w and height == h and len(image_data) == size:
+        if fmt == FORMAT_NATIVE:
+            # 与面板格式一致，数据直接作为帧缓冲区
+            buf = image_data
+        else:
+            load_frame(buf, image_data, fmt)
     else:
-        bufImage = image_data
-    
-    # 检查图片数据大小是否正确
-    expected_size = width * height // 8
-    if len(bufImage) != expected_size:
-        print(f"警告: 图片数据大小不匹配，预期 {expected_size} 字节，实际 {len(bufImage)} 字节")
-    
-    fbImage = framebuf.FrameBuffer(bufImage, width, height, framebuf.MONO_HLSB)
-    
-    # 将图片放置在屏幕中央
-    x_offset = (w - width) // 2
-    y_offset = (h - height) // 2
-    fb.blit(fbImage, x_offset, y_offset)
-    
+        # 设置背景为白色
+        white = 1
+        fb.fill(white)
+
+        draw_image(fb, image_data, width, height, w, h, fmt)
+
+    # 加载并显示图片
+    log.info("显示图片")
+
     # 显示图片，使用全屏刷新模式确保没有残影
     e.display_frame(buf, partial=False, global_refresh=True)
-    
-    print("图片显示完成")
+
+    log.info("图片显示完成")
@@ -0,0 +1,101 @@
+"""
+轻量日志
+分级输出运行信息，可选把日志保存在内存环形缓冲区中，需要时再导出。
+
+调试日志在编译期去除：使用方模块定义 `_DEBUG = const(0)`，把调试日志写成
+`if _DEBUG: log.debug(...)`，MicroPython编译器会删掉整条语句，参数也不会被格式化。
+需要调试某个模块时把它的 _DEBUG 改为1。
+
+其他级别在运行时按 level 过滤，参数按 % 延迟格式化，被过滤的日志不会构造字符串：
+    log.info("刷新耗时 %d ms", ms)
+"""
+from micropython import const
+from time import ticks_ms
+
+DEBUG = const(10)
+INFO = const(20)
+WARN = const(30)
+ERROR = const(40)
+
+_TAGS = {DEBUG: "D", INFO: "I", WARN: "W", ERROR: "E"}
+
+# 输出到串口的最低级别，正式固件可设为WARN
+level = INFO
+
+# 内存环形日志，enable_ring()后才分配
+_ring = None
+_ring_pos = 0
+_ring_level = DEBUG
+
+
+def set_level(lvl):
+    """设置输出到串口的最低级别"""
+    global level
+    level = lvl
+
+
+def enable_ring(size=32, min_level=DEBUG):
+    """在内存中保留最近size条不低于min_level的日志，串口不输出的日志也会保存"""
+    global _ring, _ring_pos, _ring_level
+    _ring = [None] * size
+    _ring_pos = 0
+    _ring_level = min_level
+
+
+def disable_ring():
+    """关闭并释放环形日志"""
+    global _ring
+    _ring = None
+
+
+def _log(lvl, msg, args):
+    global _ring_pos
+    ring = _ring
+    if lvl < level and (ring is None or lvl < _ring_level):
+        return
+    if args:
+        msg = msg % args
+    if lvl >= level:
+        if lvl >= WARN:
+            print(_TAGS[lvl], msg)
+        else:
+            print(msg)
+    if ring is not None and lvl >= _ring_level:
+        ring[_ring_pos] = (ticks_ms(), lvl, msg)
+        _ring_pos = (_ring_pos + 1) % len(ring)
+
+
+def debug(msg, *args):
+    _log(DEBUG, msg, args)
+
+
+def info(msg, *args):
+    _log(INFO, msg, args)
+
+
+def warn(msg, *args):
+    _log(WARN, msg, args)
+
+
+def error(msg, *args):
+    _log(ERROR, msg, args)
+
+
+def lines():
+    """返回环形日志中的记录，从旧到新，每条为 (ticks_ms, 级别, 消息)"""
+    ring = _ring
+    if ring is None:
+        return []
+    n = len(ring)
+    out = []
+    for k in range(n):
+        rec = ring[(_ring_pos + k) % n]
+        if rec is not None:
+            out.append(rec)
+    return out
+
+
+def dump():
+    """把环形日志打印到串口"""
+    for t, lvl, msg in lines():
+        print(t, _TAGS[lvl], msg)
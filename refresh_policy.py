@@ -0,0 +1,184 @@
+"""
+墨水屏刷新策略
+决定何时需要一次全屏清理刷新来消除局部刷新累积的残影。
+驱动在每次局部刷新和全屏刷新后通知策略，策略通过 need_full() 给出决定，
+可以替换 EPD.policy 来使用自定义策略。
+"""
+import frame_diff
+
+
+class RefreshPolicy:
+    """刷新策略基类，只做计数，从不要求全屏刷新"""
+
+    def __init__(self):
+        self.partial_count = 0      # 累计局部刷新次数
+        self.full_count = 0         # 累计全屏刷新次数
+        self.clean_count = 0        # 其中因残影预算耗尽触发的次数
+        self.pixels_flipped = 0     # 局部刷新累计翻转的像素数
+        self.partials_since_full = 0
+
+    def need_full(self, epd):
+        """下一次刷新是否必须是全屏刷新"""
+        return False
+
+    def on_partial(self, epd, new, old, rects, differential):
+        """局部刷新已启动
+
+        参数:
+            epd: 驱动实例
+            new: 新帧缓冲区
+            old: 刷新前屏幕内容的帧副本，未知时为None
+            rects: 本次写入的按字节对齐的矩形列表
+            differential: 是否使用了差分波形
+        """
+        self.partial_count += 1
+        self.partials_since_full += 1
+        self.pixels_flipped += self._count(epd, new, old, rects)
+
+    def on_full(self, epd, cleaning=False):
+        """全屏刷新已启动，cleaning表示是因残影预算触发的清理刷新"""
+        self.full_count += 1
+        if cleaning:
+            self.clean_count += 1
+        self.partials_since_full = 0
+
+    def counters(self):
+        """返回策略计数器"""
+        return {
+            "partial": self.partial_count,
+            "full": self.full_count,
+            "clean": self.clean_count,
+            "pixels_flipped": self.pixels_flipped,
+            "partials_since_full": self.partials_since_full,
+        }
+
+    def _count(self, epd, new, old, rects):
+        n = 0
+        for x, y, w, h in rects:
+            if old is None:
+                n += w * h
+            else:
+                n += frame_diff.flipped_pixels(new, old, epd.stride, x, y, w, h)
+        return n
+
+
+class CountPolicy(RefreshPolicy):
+    """固定次数策略：每N次局部刷新后执行一次全屏刷新"""
+
+    def __init__(self, limit=5, differential_limit=30):
+        super().__init__()
+        # 快速局部刷新的次数上限
+        self.limit = limit
+        # 差分局部刷新残影少，允许更多次
+        self.differential_limit = differential_limit
+        self._differential = True
+
+    def need_full(self, epd):
+        limit = self.differential_limit if self._differential else self.limit
+        return self.partials_since_full >= limit
+
+    def on_partial(self, epd, new, old, rects, differential):
+        super().on_partial(epd, new, old, rects, differential)
+        if not differential:
+            self._differential = False
+
+    def on_full(self, epd, cleaning=False):
+        super().on_full(epd, cleaning)
+        self._differential = True
+
+
+class GhostBudgetPolicy(RefreshPolicy):
+    """残影预算策略
+
+    把画布划分为 tile x tile 的区块，局部刷新时统计每个区块内翻转的像素数，
+    按刷新方式和面板温度加权后累加。任一区块的累计值超过
+    区块像素数 * budget 时预算耗尽，下一次刷新改为全屏清理刷新。
+    只改动几个像素的更新几乎不消耗预算，大面积变化很快耗尽预算。
+    """
+
+    def __init__(self, budget=2.0, tile=48, fast_weight=3, cold_temp=10, cold_weight=2,
+                 max_partials=200):
+        """
+        参数:
+            budget: 每个区块允许累计翻转的次数(按区块像素数计)
+            tile: 区块边长(像素)，应为8的倍数
+            fast_weight: 快速(非差分)局部刷新的残影权重，差分刷新为1
+            cold_temp: 低于该温度(℃)时残影更重
+            cold_weight: 低温时的额外权重
+            max_partials: 无论预算如何，连续局部刷新的最大次数
+        """
+        super().__init__()
+        self.budget = budget
+        self.tile = tile
+        self.fast_weight = fast_weight
+        self.cold_temp = cold_temp
+        self.cold_weight = cold_weight
+        self.max_partials = max_partials
+        self._ghost = None
+        self._cols = 0
+        self.exhausted = False
+
+    def _weight(self, epd, differential):
+        w = 1 if differential else self.fast_weight
+        t = epd.temperature
+        if t is not None and t < self.cold_temp:
+            w *= self.cold_weight
+        return w
+
+    def _grid(self, epd):
+        cols = (epd.width + self.tile - 1) // self.tile
+        rows = (epd.height + self.tile - 1) // self.tile
+        if self._ghost is None or len(self._ghost) != cols * rows:
+            self._ghost = [0] * (cols * rows)
+            self._cols = cols
+        return self._ghost
+
+    def need_full(self, epd):
+        return self.exhausted or self.partials_since_full >= self.max_partials
+
+    def on_partial(self, epd, new, old, rects, differential):
+        self.partial_count += 1
+        self.partials_since_full += 1
+        ghost = self._grid(epd)
+        tile = self.tile
+        limit = tile * tile * self.budget
+        weight = self._weight(epd, differential)
+        for x, y, w, h in rects:
+            # 按区块边界切分矩形，区块边长是8的倍数，切分后仍按字节对齐
+            ty = y
+            while ty < y + h:
+                ty1 = min((ty // tile + 1) * tile, y + h)
+                tx = x
+                while tx < x + w:
+                    tx1 = min((tx // tile + 1) * tile, x + w)
+                    if old is None:
+                        n = (tx1 - tx) * (ty1 - ty)
+                    else:
+                        n = frame_diff.flipped_pixels(new, old, epd.stride, tx, ty, tx1 - tx, ty1 - ty)
+                    if n:
+                        self.pixels_flipped += n
+                        idx = (ty // tile) * self._cols + tx // tile
+                        ghost[idx] += n * weight
+                        if ghost[idx] >= limit:
+                            self.exhausted = True
+                    tx = tx1
+                ty = ty1
+
+    def on_full(self, epd, cleaning=False):
+        super().on_full(epd, cleaning)
+        self.exhausted = False
+        if self._ghost is not None:
+            for i in range(len(self._ghost)):
+                self._ghost[i] = 0
+
+    def budget_used(self):
+        """残影最重的区块已用掉的预算百分比"""
+        if not self._ghost:
+            return 0
+        return max(self._ghost) * 100 // int(self.tile * self.tile * self.budget)
+
+    def counters(self):
+        c = super().counters()
+        c["budget_used_pct"] = self.budget_used()
+        c["exhausted"] = self.exhausted
+        return c
@@ -0,0 +1,142 @@
+"""
+放大文本和位图绘制
+内置8x8字体按整数倍放大绘制。每个(字符, 倍数, 颜色)第一次出现时渲染成一个
+放大后的字形位图，保存在有字节预算的LRU缓存中，之后每个字符只需一次blit。
+看板的12倍日期数字由每个字符几百次fill_rect变为一次blit。
+
+位图(图标、字形)放大时按行拆成水平游程，相同的相邻行合并为一块，
+每个游程块只调用一次fill_rect，而不是每个像素一次。
+
+    import scaled_text
+    scaled_text.draw(fb, "25", 20, 90, scale=12)
+    scaled_text.draw(fb, "TASKS", 15, 12, scale=2, color=1)
+    scaled_text.draw_bitmap(fb, SUNNY_ICON, 296, 60, 16, 16, scale=3)
+"""
+import framebuf
+
+CHAR_SIZE = 8
+# 缓存字形位图占用的字节上限，12倍字形每个1152字节
+MAX_BYTES = 8192
+
+# 键: (字符, 倍数, 颜色) -> (FrameBuffer, 字节数)
+_cache = {}
+# 最近使用的键在末尾
+_order = []
+_bytes = 0
+# 命中/未命中次数
+hits = 0
+misses = 0
+
+_char_buf = bytearray(CHAR_SIZE * CHAR_SIZE // 8)
+_char_fb = framebuf.FrameBuffer(_char_buf, CHAR_SIZE, CHAR_SIZE, framebuf.MONO_HMSB)
+
+
+def runs(row, width, msb_first=True):
+    """逐个产生一行位图中连续置位像素的 (起点, 长度)
+
+    参数:
+        row: 该行的字节数据，不足width时缺少的像素视为0
+        msb_first: 字节最高位为最左像素(MONO_HLSB、图标数据)；
+                   为False时最低位在左(MONO_HMSB、面板格式)
+    """
+    n = len(row)
+    start = -1
+    for i in range(width):
+        b = i >> 3
+        if b < n and (row[b] >> ((7 - (i & 7)) if msb_first else (i & 7))) & 1:
+            if start < 0:
+                start = i
+        elif start >= 0:
+            yield start, i - start
+            start = -1
+    if start >= 0:
+        yield start, width - start
+
+
+def draw_bitmap(fb, data, x, y, width, height, scale=1, color=0, msb_first=True):
+    """把1位位图放大scale倍画到fb的(x, y)处，只绘制置位的像素
+
+    每行按水平游程绘制，内容相同的相邻行合并成一块，每个游程块一次fill_rect。
+    data按行存储，每行(width + 7) // 8字节；数据不足时缺少的部分视为空白。
+    """
+    bpr = (width + 7) // 8
+    sy = 0
+    while sy < height:
+        row = data[sy * bpr:(sy + 1) * bpr]
+        n = 1
+        while sy + n < height and data[(sy + n) * bpr:(sy + n + 1) * bpr] == row:
+            n += 1
+        for sx, w in runs(row, width, msb_first):
+            fb.fill_rect(x + sx * scale, y + sy * scale, w * scale, n * scale, color)
+        sy += n
+
+
+def _render(ch, scale, color):
+    """渲染一个放大字形：笔画为color，背景为另一色(blit时作为透明色)"""
+    size = CHAR_SIZE * scale
+    stride = (size + 7) // 8
+    gbuf = bytearray(stride * size)
+    gfb = framebuf.FrameBuffer(gbuf, size, size, framebuf.MONO_HMSB)
+    if color == 0:
+        gfb.fill(1)
+    _char_fb.fill(0)
+    _char_fb.text(ch, 0, 0, 1)
+    draw_bitmap(gfb, _char_buf, 0, 0, CHAR_SIZE, CHAR_SIZE, scale, color, msb_first=False)
+    return gfb, len(gbuf)
+
+
+def glyph(ch, scale=1, color=0):
+    """返回缓存的放大字形FrameBuffer，不在缓存中时渲染并按LRU淘汰"""
+    global _bytes, hits, misses
+    key = (ch, scale, color)
+    entry = _cache.get(key)
+    if entry is not None:
+        hits += 1
+        if _order[-1] != key:
+            _order.remove(key)
+            _order.append(key)
+        return entry[0]
+    misses += 1
+    gfb, n = _render(ch, scale, color)
+    # 超过预算时淘汰最久未用的字形，单个字形超过预算时仍然缓存它自己
+    while _order and _bytes + n > MAX_BYTES:
+        old = _order.pop(0)
+        _bytes -= _cache.pop(old)[1]
+    _cache[key] = (gfb, n)
+    _order.append(key)
+    _bytes += n
+    return gfb
+
+
+def draw(fb, text, x, y, scale=1, color=0):
+    """在fb的(x, y)处绘制放大scale倍的文本，只绘制笔画，背景保持不变
+
+    返回文本绘制的宽度(像素)
+    """
+    text = str(text)
+    if scale == 1:
+        fb.text(text, x, y, color)
+        return len(text) * CHAR_SIZE
+    key = 1 - color
+    step = CHAR_SIZE * scale
+    cx = x
+    for ch in text:
+        if ch != " ":
+            fb.blit(glyph(ch, scale, color), cx, y, key)
+        cx += step
+    return cx - x
+
+
+def clear():
+    """清空字形缓存，释放内存"""
+    global _bytes, hits, misses
+    _cache.clear()
+    del _order[:]
+    _bytes = 0
+    hits = 0
+    misses = 0
+
+
+def info():
+    """返回缓存状态 (字形数, 字节数, 命中, 未命中)"""
+    return len(_cache), _bytes, hits, misses
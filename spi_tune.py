@@ -0,0 +1,110 @@
+"""
+SPI时钟自动校准
+config.py中的SPI时钟为保守的2MHz，整帧15000字节仅线上传输就要约60ms。
+SSD1683的写入时钟可以高得多，但实际上限取决于连线和转接板。
+
+校准从低到高逐级提高写入时钟，每一级把伪随机测试图案写入控制器RAM，
+再用低速读取时钟通过0x27读回比较，连续几轮都一致的最高一级即为可靠时钟。
+结果保存在闪存中，之后启动时直接使用，不再重复校准。
+
+测试使用RAM 0x26(差分刷新的旧画面)的前几行，不影响当前画面；
+驱动会在下一次全屏提交时重写0x26，在此之前局部刷新改用快速波形。
+"""
+try:
+    import json
+except ImportError:
+    import ujson as json
+import epaper4in2
+import log
+
+SETTINGS_FILE = "spi_rate.json"
+# ESP32的SPI时钟由80MHz分频得到，只测试能精确分出的频率
+RATES = (2000000, 4000000, 8000000, 10000000, 13333333, 16000000, 20000000,
+         26666666, 40000000)
+# 读回测试图案使用的时钟，控制器读取时序比写入慢得多
+READ_RATE = 2000000
+# 测试占用的RAM行数
+_ROWS = 8
+_ROW_BYTES = epaper4in2.EPD_WIDTH // 8
+
+
+def _pattern(buf, seed):
+    """用xorshift填充伪随机数据，每隔一段插入0x00/0xFF/0x55/0xAA等易出错的跳变"""
+    x = (seed * 2654435761 + 1) & 0xFFFFFFFF or 1
+    for i in range(len(buf)):
+        if i & 0x1F < 4:
+            buf[i] = (0x00, 0xFF, 0x55, 0xAA)[(i + seed) & 3]
+            continue
+        x ^= (x << 13) & 0xFFFFFFFF
+        x ^= x >> 17
+        x ^= (x << 5) & 0xFFFFFFFF
+        buf[i] = x & 0xFF
+
+
+def verify(epd, rate, rounds=3, read_hz=READ_RATE):
+    """以rate写入、read_hz读回测试图案rounds轮，全部一致时返回True"""
+    n = _ROW_BYTES * _ROWS
+    pattern = bytearray(n)
+    back = bytearray(n)
+    epaper4in2.set_spi_rate(epd.spi, rate, read_hz)
+    for r in range(rounds):
+        _pattern(pattern, rate // 1000 + r)
+        epd.ram_window(0, _ROW_BYTES - 1, 0, _ROWS - 1)
+        epd.write_ram(pattern)
+        epd.ram_window(0, _ROW_BYTES - 1, 0, _ROWS - 1)
+        epd.read_ram(n, buf=back)
+        if back != pattern:
+            return False
+    return True
+
+
+def calibrate(epd, rates=RATES, rounds=3, read_hz=READ_RATE, path=SETTINGS_FILE):
+    """校准并应用最高可靠的写入时钟，保存到path(为None时不保存)
+
+    epd需已init()。最低一级也无法读回时说明MISO未连接或不支持读取，
+    保持最低一级并记录为未验证，之后启动不再重复校准。
+
+    返回选定的写入时钟(Hz)
+    """
+    best = None
+    for rate in rates:
+        if not verify(epd, rate, rounds, read_hz):
+            log.info("SPI %d Hz 校验失败", rate)
+            break
+        best = rate
+    verified = best is not None
+    if not verified:
+        best = rates[0]
+        log.warn("无法读回控制器RAM，SPI时钟保持 %d Hz", best)
+    else:
+        log.info("SPI写入时钟校准为 %d Hz", best)
+    epaper4in2.set_spi_rate(epd.spi, best, read_hz)
+    if path is not None:
+        save({"write_hz": best, "read_hz": read_hz, "verified": verified}, path)
+    return best
+
+
+def save(settings, path=SETTINGS_FILE):
+    try:
+        with open(path, "w") as f:
+            json.dump(settings, f)
+    except OSError as e:
+        log.warn("保存SPI时钟失败: %s", e)
+
+
+def load(path=SETTINGS_FILE):
+    """读取保存的校准结果，没有时返回None"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def apply_saved(spi, path=SETTINGS_FILE):
+    """应用保存的SPI时钟，没有校准记录时返回False"""
+    settings = load(path)
+    if not settings:
+        return False
+    epaper4in2.set_spi_rate(spi, settings["write_hz"], settings.get("read_hz"))
+    return True
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+点阵字体生成工具 - 从TTF/OTF或BDF字体中截取需要的字符，生成设备端bitmap_font使用的字体文件
+
+字符集总是包含可打印ASCII(0x20~0x7E)，另外可以指定:
+    --chars     直接给出的字符
+    --from      从文本文件(如应用源码)中收集出现过的全部字符
+    --range     码点范围，如 4E00-9FFF (常用汉字全集约2万字，16点阵约650KB)
+只支持U+0000~U+FFFF的字符，其余字符跳过。
+
+TTF/OTF字体需要Pillow，按 --size 像素渲染并二值化；BDF字体直接读取点阵，不需要额外依赖。
+输出格式见 bitmap_font.py：文件头、按码点排序的索引、MONO_HMSB位图，
+内容相同的位图共用一份数据。
+
+用法:
+    python3 tool/build_font.py NotoSansSC-Regular.otf -s 16 --from wifi_display.py -o font16.bin
+    python3 tool/build_font.py wenquanyi_12pt.bdf --range 4E00-9FFF -o font12.bin
+"""
+
+import argparse
+import struct
+import sys
+
+MAGIC = b"EPF1"
+ASCII = ''.join(chr(c) for c in range(0x20, 0x7F))
+
+
+def load_bdf(path, chars):
+    """读取BDF字体，返回 (字高, 基线, {字符: (步进宽度, 宽, 笔画像素集合)})"""
+    glyphs = {}
+    height = ascent = None
+    with open(path, encoding='latin-1') as f:
+        lines = iter(f.read().splitlines())
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] == 'FONTBOUNDINGBOX':
+            fw, fh, fx, fy = map(int, parts[1:5])
+            height = fh
+            ascent = fh + fy
+        elif parts[0] == 'STARTCHAR':
+            code = adv = None
+            bbx = None
+            for line in lines:
+                parts = line.split()
+                if parts[0] == 'ENCODING':
+                    code = int(parts[1])
+                elif parts[0] == 'DWIDTH':
+                    adv = int(parts[1])
+                elif parts[0] == 'BBX':
+                    bbx = tuple(map(int, parts[1:5]))
+                elif parts[0] == 'BITMAP':
+                    break
+            rows = []
+            for line in lines:
+                if line.strip() == 'ENDCHAR':
+                    break
+                rows.append(int(line.strip(), 16) if line.strip() else 0)
+            if code is None or code < 0 or chr(code) not in chars:
+                continue
+            if height is None:
+                raise ValueError("BDF缺少FONTBOUNDINGBOX")
+            bw, bh, bx, by = bbx
+            nbits = (bw + 7) // 8 * 8
+            top = ascent - (by + bh)
+            ink = set()
+            for j, row in enumerate(rows[:bh]):
+                for i in range(bw):
+                    if row >> (nbits - 1 - i) & 1:
+                        x = bx + i
+                        y = top + j
+                        if x >= 0 and 0 <= y < height:
+                            ink.add((x, y))
+            width = max([adv or 0] + [x + 1 for x, _ in ink])
+            glyphs[chr(code)] = (adv if adv is not None else bw, width, ink)
+    return height, ascent, glyphs
+
+
+def load_ttf(path, size, chars, threshold=128):
+    """按size像素渲染TTF/OTF字体，返回 (字高, 基线, {字符: (步进宽度, 宽, 笔画像素集合)})"""
+    from PIL import Image, ImageDraw, ImageFont
+    font = ImageFont.truetype(path, size)
+    ascent, descent = font.getmetrics()
+    height = ascent + descent
+    # 字体中没有的字符会画成.notdef字形，与一个不存在的码点画出的结果相同
+    def mask(ch):
+        m = font.getmask(ch)
+        return m.size, bytes(m)
+    notdef = mask('\uffff')
+    glyphs = {}
+    for ch in chars:
+        # 字体中没有的字符跳过，设备端会用内置字体或方框代替
+        if ch != ' ' and (font.getmask(ch).getbbox() is None or mask(ch) == notdef):
+            continue
+        adv = int(round(font.getlength(ch)))
+        img = Image.new('L', (max(adv, 1) + size, height), 0)
+        ImageDraw.Draw(img).text((0, 0), ch, font=font, fill=255)
+        px = img.load()
+        ink = {(x, y) for y in range(height) for x in range(img.width) if px[x, y] >= threshold}
+        width = max([adv] + [x + 1 for x, _ in ink])
+        glyphs[ch] = (adv, width, ink)
+    return height, ascent, glyphs
+
+
+def pack_glyph(width, height, ink):
+    """生成一个字形的MONO_HMSB位图，笔画位为1"""
+    stride = (width + 7) // 8
+    data = bytearray(stride * height)
+    for x, y in ink:
+        data[y * stride + (x >> 3)] |= 1 << (x & 7)
+    return bytes(data)
+
+
+def build(height, ascent, glyphs):
+    """返回字体文件内容"""
+    codes = sorted(ord(ch) for ch in glyphs)
+    index = bytearray()
+    bitmaps = bytearray()
+    offsets = {}
+    base = 12 + 8 * len(codes)
+    for code in codes:
+        adv, width, ink = glyphs[chr(code)]
+        if width > 255 or adv > 255:
+            raise ValueError("U+%04X 字形过宽" % code)
+        # 没有笔画的字符(空格等)不存位图，只记录步进宽度
+        if not ink:
+            width = 0
+        data = pack_glyph(width, height, ink)
+        off = offsets.get(data)
+        if off is None:
+            off = base + len(bitmaps)
+            offsets[data] = off
+            bitmaps += data
+        index += struct.pack('<HBBI', code, width, adv, off)
+    head = MAGIC + struct.pack('<HHI', height, ascent, len(codes))
+    return head + bytes(index) + bytes(bitmaps)
+
+
+def collect_chars(args):
+    chars = set(ASCII)
+    if args.chars:
+        chars.update(args.chars)
+    for path in args.sources:
+        with open(path, encoding='utf-8') as f:
+            chars.update(f.read())
+    for r in args.range:
+        lo, _, hi = r.partition('-')
+        chars.update(chr(c) for c in range(int(lo, 16), int(hi or lo, 16) + 1))
+    skipped = sorted(c for c in chars if ord(c) > 0xFFFF)
+    if skipped:
+        print("跳过%d个U+FFFF以外的字符" % len(skipped))
+    return {c for c in chars if 0x20 <= ord(c) <= 0xFFFF}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='从TTF/OTF/BDF字体生成设备端的点阵字体文件')
+    parser.add_argument('font', help='TTF/OTF或BDF字体文件')
+    parser.add_argument('-s', '--size', type=int, default=16, help='TTF/OTF渲染的像素大小(默认16)')
+    parser.add_argument('-o', '--output', default='font16.bin', help='输出文件(默认font16.bin)')
+    parser.add_argument('--chars', default='', help='需要包含的字符')
+    parser.add_argument('--from', dest='sources', nargs='*', default=[],
+                        help='从这些UTF-8文本文件中收集字符')
+    parser.add_argument('--range', nargs='*', default=[],
+                        help='十六进制码点范围，如 4E00-9FFF')
+    args = parser.parse_args()
+
+    try:
+        chars = collect_chars(args)
+        if args.font.lower().endswith('.bdf'):
+            height, ascent, glyphs = load_bdf(args.font, chars)
+        else:
+            height, ascent, glyphs = load_ttf(args.font, args.size, chars)
+        data = build(height, ascent, glyphs)
+    except (OSError, ValueError) as e:
+        print("生成失败: %s" % e)
+        return 1
+    with open(args.output, 'wb') as f:
+        f.write(data)
+    missing = len(chars) - len(glyphs)
+    print("已生成 %s: 字高%d，%d个字符，%d 字节%s" % (
+        args.output, height, len(glyphs), len(data),
+        "，字体中缺少%d个字符" % missing if missing else ""))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
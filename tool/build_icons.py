@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+图标图集生成工具 - 把 tool/icons/ 下的PNG图标打包成设备端的 icon_atlas.py
+
+icons.json 列出每个图标需要预生成的 [倍数, 颜色] 变体：
+    颜色0: 黑色笔画，其余为白色(位为0的是笔画)
+    颜色1: 白色笔画，其余为黑色(位为1的是笔画)
+每个图标总是额外生成 [1, 1] 变体，设备端遇到未预生成的变体时用它现场放大。
+
+所有变体按MONO_HMSB(面板格式)逐个连续存放在同一个字节串中，
+内容相同的变体共用一份数据，偏移表记录每个变体的起点和尺寸，
+设备端用 memoryview 切片直接构造FrameBuffer，一次blit即可绘制。
+
+用法:
+    python3 tool/build_icons.py                    # 默认读取tool/icons，输出到仓库根目录的icon_atlas.py
+    python3 tool/build_icons.py icons/ -o out.py
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from PIL import Image
+
+TOOL_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TOOL_DIR)
+
+
+def load_icon(path, threshold=128):
+    """读取PNG，返回 (宽, 高, 笔画像素集合)，暗于阈值的像素为笔画"""
+    img = Image.open(path).convert('L')
+    w, h = img.size
+    px = img.load()
+    ink = {(x, y) for y in range(h) for x in range(w) if px[x, y] < threshold}
+    return w, h, ink
+
+
+def pack_variant(w, h, ink, scale, color):
+    """生成一个变体的MONO_HMSB数据，返回 (数据, 宽, 高)"""
+    sw = w * scale
+    sh = h * scale
+    stride = (sw + 7) // 8
+    data = bytearray(stride * sh)
+    for y in range(sh):
+        base = y * stride
+        for x in range(sw):
+            on = (x // scale, y // scale) in ink
+            # 颜色1时笔画为1，颜色0时笔画为0、背景为1
+            if on == (color == 1):
+                data[base + (x >> 3)] |= 1 << (x & 7)
+    return bytes(data), sw, sh
+
+
+def build(icon_dir, spec):
+    """返回 (图集字节串, 偏移表{(名称, 倍数, 颜色): (偏移, 宽, 高)})"""
+    atlas = bytearray()
+    index = {}
+    offsets = {}
+    for name in sorted(k for k in spec if not k.startswith('_')):
+        w, h, ink = load_icon(os.path.join(icon_dir, name + '.png'))
+        variants = [tuple(v) for v in spec[name]]
+        if (1, 1) not in variants:
+            variants.append((1, 1))
+        for scale, color in variants:
+            if color not in (0, 1) or scale < 1:
+                raise ValueError("%s: 无效的变体 [%s, %s]" % (name, scale, color))
+            data, sw, sh = pack_variant(w, h, ink, scale, color)
+            off = offsets.get(data)
+            if off is None:
+                off = len(atlas)
+                offsets[data] = off
+                atlas += data
+            index[(name, scale, color)] = (off, sw, sh)
+    return bytes(atlas), index
+
+
+def write_module(path, atlas, index):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('"""\n图标图集\n由 tool/build_icons.py 根据 tool/icons/ 生成，请勿手工修改\n"""\n')
+        f.write('# Format: MONO_HMSB，每个变体逐行存储，每行 (宽 + 7) // 8 字节\n')
+        f.write('ATLAS = (\n')
+        for i in range(0, len(atlas), 32):
+            f.write('    %r\n' % atlas[i:i + 32])
+        f.write(')\n\n')
+        f.write('# (名称, 倍数, 颜色) -> (偏移, 宽, 高)\n')
+        f.write('INDEX = {\n')
+        for key in sorted(index):
+            f.write('    %r: %r,\n' % (key, index[key]))
+        f.write('}\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='把PNG图标打包成设备端的图标图集')
+    parser.add_argument('icon_dir', nargs='?', default=os.path.join(TOOL_DIR, 'icons'),
+                        help='图标目录，需包含icons.json(默认tool/icons)')
+    parser.add_argument('-o', '--output', default=os.path.join(ROOT, 'icon_atlas.py'),
+                        help='输出的Python模块路径(默认仓库根目录的icon_atlas.py)')
+    args = parser.parse_args()
+
+    with open(os.path.join(args.icon_dir, 'icons.json'), encoding='utf-8') as f:
+        spec = json.load(f)
+    try:
+        atlas, index = build(args.icon_dir, spec)
+    except (OSError, ValueError) as e:
+        print("生成失败: %s" % e)
+        return 1
+    write_module(args.output, atlas, index)
+    print("已生成 %s: %d 个变体，图集 %d 字节" % (args.output, len(index), len(atlas)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
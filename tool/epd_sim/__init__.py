@@ -0,0 +1,89 @@
+"""
+主机端墨水屏模拟器
+
+在PC(CPython)上运行驱动和应用：提供machine(Pin/SPI)、framebuf、micropython
+的替身模块和time的MicroPython扩展接口，把EPD发出的SSD1683命令流解码到
+模拟的面板RAM，可以把屏幕内容保存为PNG，并记录每次刷新的波形种类、
+BUSY时长和SPI字节数，用于在PC上衡量和回归检查驱动的性能优化。
+
+用法:
+    import sys; sys.path.insert(0, 'tool')
+    import epd_sim
+    panel = epd_sim.install()        # 之后可以import config、epaper4in2和各应用
+    e = epd_sim.make_epd()
+    ...
+    panel.save_png('screen.png')
+    print(panel.stats(), panel.refreshes)
+
+命令行:
+    python3 tool/epd_sim demo [-o screen.png]   # 运行一组刷新并检查屏幕内容
+    python3 tool/epd_sim bench                  # 对比各种写入方式的SPI开销
+"""
+import os
+import sys
+import tempfile
+import time
+import traceback
+import gc
+
+from . import clock as _clock_mod
+from . import framebuf
+from . import machine
+from . import micropython
+from .clock import clock
+from .panel import Panel
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# install()创建的面板
+panel = None
+# 代替设备flash根目录的临时目录，应用缓存的背景文件写在这里
+flash_dir = None
+
+
+def install(realtime=False, **panel_kwargs):
+    """安装替身模块并创建一块新的模拟面板，返回面板
+
+    参数:
+        realtime: 使用真实时间，默认使用虚拟时间
+        panel_kwargs: 传给Panel，如temperature、timing
+    """
+    global panel, flash_dir
+    sys.modules["machine"] = machine
+    sys.modules["framebuf"] = framebuf
+    sys.modules["micropython"] = micropython
+
+    clock.reset(realtime)
+    for name in ("sleep_ms", "sleep_us", "ticks_ms", "ticks_us", "ticks_add", "ticks_diff"):
+        setattr(time, name, getattr(clock, name))
+    if not hasattr(gc, "mem_free"):
+        gc.mem_free = lambda: 8 * 1024 * 1024
+        gc.mem_alloc = lambda: 0
+    if not hasattr(sys, "print_exception"):
+        sys.print_exception = lambda e, file=None: traceback.print_exception(type(e), e, e.__traceback__, file=file)
+
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    machine._reset()
+    panel = Panel(**panel_kwargs)
+    # 新面板尚未上电，已导入的驱动不能沿用上一块面板的控制器状态
+    drv = sys.modules.get("epaper4in2")
+    if drv is not None:
+        drv._panel_state = drv.STATE_OFF
+    # 背景缓存默认写到设备flash根目录，主机上改到临时目录
+    if flash_dir is None:
+        flash_dir = tempfile.mkdtemp(prefix="epd_sim_")
+    import config
+    if getattr(config, "BACKGROUND_DIR", None) == "/":
+        config.BACKGROUND_DIR = flash_dir
+    return panel
+
+
+def make_epd(baudrate=2000000):
+    """创建连接到模拟面板的EPD实例，尚未install()时先安装"""
+    if panel is None:
+        install()
+    import epaper4in2
+    spi = machine.SPI(2, baudrate=baudrate)
+    return epaper4in2.EPD(spi, panel.cs, panel.dc, panel.rst, panel.busy)
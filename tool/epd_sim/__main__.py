@@ -0,0 +1,111 @@
+"""
+python3 tool/epd_sim demo [-o screen.png] [--scale N]
+python3 tool/epd_sim bench [--text | --ui]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import epd_sim  # noqa: E402
+from epd_sim import bench  # noqa: E402
+
+
+def demo(out=None, scale=1):
+    """全屏刷新后做几次局部刷新，每一步都检查屏幕内容是否等于帧缓冲区"""
+    panel = epd_sim.install()
+    import framebuf
+    e = epd_sim.make_epd()
+    e.pwr_on()
+    e.init()
+    buf = bytearray(e.stride * e.height)
+    fb = framebuf.FrameBuffer(buf, e.width, e.height, framebuf.MONO_HMSB)
+
+    def check(name, mode):
+        ok = panel.frame() == buf
+        print("%-12s %-8s %s" % (name, mode, "OK" if ok else "屏幕内容与帧缓冲区不一致"))
+        return ok
+
+    fb.fill(1)
+    fb.rect(4, 4, e.width - 8, e.height - 8, 0)
+    fb.text("EPD SIM", 16, 16, 0)
+    e.display_frame(buf, global_refresh=True)
+    ok = check("全屏", "full")
+
+    for minute in range(3):
+        fb.fill_rect(120, 120, 160, 40, 1)
+        fb.text("12:%02d" % minute, 160, 128, 0)
+        fb.fill_rect(160, 144, 24 * (minute + 1), 8, 0)
+        ok &= check("时钟", e.display_auto(buf))
+
+    fb.fill_rect(16, 250, 64, 24, 0)
+    fb.fill_rect(320, 40, 40, 40, 0)
+    ok &= check("多区域", e.display_regions(buf, [(16, 250, 64, 24), (320, 40, 40, 40)]))
+
+    # 旋转90度后画布为300x400，帧副本不能再拿来比较，第一次应为全局刷新
+    e.set_orientation(90)
+    rbuf = bytearray(e.stride * e.height)
+    rfb = framebuf.FrameBuffer(rbuf, e.width, e.height, framebuf.MONO_HMSB)
+
+    def check_rotated(name, mode):
+        # 画布(x, y)显示在面板的(399 - y, x)
+        want = bytearray(b"\xff" * (panel.width * panel.height // 8))
+        for y in range(e.height):
+            for x in range(e.width):
+                if not rfb.pixel(x, y):
+                    i = x * panel.width + panel.width - 1 - y
+                    want[i >> 3] &= ~(1 << (i & 7))
+        ok = panel.frame() == want
+        print("%-12s %-8s %s" % (name, mode, "OK" if ok else "屏幕内容与帧缓冲区不一致"))
+        return ok
+
+    rfb.fill(1)
+    rfb.rect(4, 4, e.width - 8, e.height - 8, 0)
+    rfb.text("ROTATED", 16, 16, 0)
+    ok &= check_rotated("旋转90度", e.display_auto(rbuf))
+    rfb.fill_rect(16, 40, 64, 16, 0)
+    ok &= check_rotated("旋转后局部", e.display_auto(rbuf))
+
+    e.set_orientation(0)
+    ok &= check("转回0度", e.display_auto(buf))
+
+    print()
+    print("%-8s %8s %8s %8s %8s" % ("波形", "BUSY(ms)", "字节", "变化像素", "错误像素"))
+    for r in panel.refreshes:
+        print("%-8s %8d %8d %8d %8d" % (r["kind"], r["busy_ms"], r["bytes"], r["changed"], r["stale"]))
+    print()
+    for k, v in panel.stats().items():
+        print("%s: %s" % (k, v))
+    if out:
+        panel.save_png(out, scale=scale)
+        print("已保存", out)
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="墨水屏模拟器")
+    sub = parser.add_subparsers(dest="command")
+    p = sub.add_parser("demo", help="运行一组刷新并检查屏幕内容")
+    p.add_argument("-o", "--output", help="保存屏幕内容的PNG路径")
+    p.add_argument("--scale", type=int, default=1, help="PNG放大倍数")
+    p = sub.add_parser("bench", help="对比各种写入方式的SPI开销")
+    p.add_argument("--text", action="store_true", help="改为对比放大文本的绘制开销")
+    p.add_argument("--ui", action="store_true", help="改为对比整屏重画与控件重画的界面更新开销")
+    args = parser.parse_args()
+    if args.command == "demo":
+        return demo(args.output, args.scale)
+    if args.command == "bench":
+        if args.text:
+            bench.run_text()
+        elif args.ui:
+            bench.run_ui()
+        else:
+            bench.run()
+        return 0
+    parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
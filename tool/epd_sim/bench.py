@@ -0,0 +1,268 @@
+"""
+传输阶段对比
+分别用逐字节写入(旧方式)、按行流式写入整帧、只写入一个时钟数字大小的局部窗口，
+以及逐字节发送与预编码命令序列的窗口设置，打印各自的SPI事务数、字节数、
+CS翻转次数和按波特率计算的线上传输时间。
+
+放大文本对比(run_text)
+用看板大小的字符串比较逐像素放大(旧方式)、按水平游程放大(不缓存)和scaled_text
+字形缓存冷/热几种情况，以及看板天气图标的逐像素与游程放大，打印FrameBuffer
+调用次数和主机耗时。设备上每次调用的开销远大于PC，以调用次数为准。
+
+界面更新对比(run_ui)
+看板和Todo List数据小幅变化后，分别整屏重画再由display_auto()比较整帧，
+与widgets只重画脏控件并把损坏区域交给display_regions()，打印FrameBuffer调用次数、
+主机耗时、刷新写入的SPI字节数和刷新方式。
+"""
+import sys
+import time
+
+
+def legacy_write_image(e, command, bitmap, mirror_x, mirror_y):
+    """旧版逐字节写入实现，仅用作对比基准"""
+    h = e.height
+    bpl = e.width // 8
+    e._command(command)
+    for i in range(0, h):
+        for j in range(0, bpl):
+            idx = ((bpl-j-1) if mirror_x else j) + ((h-i-1) if mirror_y else i) * bpl
+            e._ndata(bitmap[idx])
+
+
+def legacy_set_partial(e, x, y, w, h):
+    """旧版逐字节发送的窗口设置，仅用作对比基准"""
+    xs = x // 8
+    xe = (x + w - 1) // 8
+    ys = y
+    ye = y + h - 1
+    for command, data in ((0x11, (0x03,)), (0x44, (xs, xe)),
+                          (0x45, (ys % 256, ys // 256, ye % 256, ye // 256)),
+                          (0x4E, (xs,)), (0x4F, (ys % 256, ys // 256))):
+        e._command(command)
+        for v in data:
+            e._ndata(v)
+
+
+def legacy_draw_scaled_text(fb, text, x, y, scale=1, color=0):
+    """旧版逐像素放大绘制，仅用作对比基准"""
+    import framebuf
+    char_buf = bytearray(8)
+    char_fb = framebuf.FrameBuffer(char_buf, 8, 8, framebuf.MONO_HMSB)
+    current_x = x
+    for char in str(text):
+        char_fb.fill(0)
+        char_fb.text(char, 0, 0, 1)
+        for cy in range(8):
+            for cx in range(8):
+                if char_fb.pixel(cx, cy):
+                    fb.fill_rect(current_x + cx * scale, y + cy * scale, scale, scale, color)
+        current_x += 8 * scale
+
+
+def runlength_draw_scaled_text(fb, text, x, y, scale=1, color=0):
+    """每个字符渲染到8x8缓冲区后按游程放大，不使用字形缓存"""
+    import framebuf
+    import scaled_text
+    char_buf = bytearray(8)
+    char_fb = framebuf.FrameBuffer(char_buf, 8, 8, framebuf.MONO_HMSB)
+    for char in str(text):
+        char_fb.fill(0)
+        char_fb.text(char, 0, 0, 1)
+        scaled_text.draw_bitmap(fb, char_buf, x, y, 8, 8, scale, color, msb_first=False)
+        x += 8 * scale
+
+
+def legacy_draw_scaled_icon(fb, icon_data, x, y, source_size=16, scale=1, color=0):
+    """旧版逐像素放大图标，仅用作对比基准"""
+    bytes_per_row = source_size // 8
+    for sy in range(source_size):
+        for sx in range(source_size):
+            byte_index = sy * bytes_per_row + (sx // 8)
+            if byte_index < len(icon_data) and (icon_data[byte_index] >> (7 - (sx % 8))) & 1:
+                fb.fill_rect(x + sx * scale, y + sy * scale, scale, scale, color)
+
+
+# 看板天气图标(晴天，16x16)
+SUNNY_ICON = bytes((0x01, 0x80, 0x01, 0x80, 0x00, 0x00, 0x10, 0x08,
+                    0x08, 0x10, 0x07, 0xE0, 0x1F, 0xF8, 0x3F, 0xFC,
+                    0x3F, 0xFC, 0x1F, 0xF8, 0x07, 0xE0, 0x08, 0x10,
+                    0x10, 0x08, 0x00, 0x00, 0x01, 0x80, 0x01, 0x80))
+
+# 看板和Todo List中实际使用的字符串和倍数
+TEXT_CASES = (("Dec 2025", 2), ("17", 12), ("Saturday", 2), ("23", 5), ("C", 2), ("TASKS", 2))
+
+
+class _CallCounter:
+    """临时包装FrameBuffer的绘图方法，统计所有实例(包括字形缓冲区)的调用次数"""
+    METHODS = ("pixel", "fill", "fill_rect", "blit", "text")
+
+    def __init__(self):
+        self.calls = 0
+
+    def __enter__(self):
+        import framebuf
+        self._saved = {}
+        for name in self.METHODS:
+            orig = getattr(framebuf.FrameBuffer, name)
+            self._saved[name] = orig
+            setattr(framebuf.FrameBuffer, name, self._wrap(orig))
+        return self
+
+    def _wrap(self, orig):
+        def method(fb, *args):
+            self.calls += 1
+            return orig(fb, *args)
+        return method
+
+    def __exit__(self, *exc):
+        import framebuf
+        for name, orig in self._saved.items():
+            setattr(framebuf.FrameBuffer, name, orig)
+
+
+def run_text(repeat=5):
+    import epd_sim
+    epd_sim.install()
+    import framebuf
+    import scaled_text
+    fb = framebuf.FrameBuffer(bytearray(400 * 300 // 8), 400, 300, framebuf.MONO_HMSB)
+
+    def draw_all(fn):
+        for text, scale in TEXT_CASES:
+            fn(fb, text, 10, 10, scale, 0)
+
+    results = []
+    for name, fn, cold in (("逐像素放大", legacy_draw_scaled_text, False),
+                           ("游程放大", runlength_draw_scaled_text, False),
+                           ("字形缓存(冷)", scaled_text.draw, True),
+                           ("字形缓存(热)", scaled_text.draw, False)):
+        if cold:
+            scaled_text.clear()
+        with _CallCounter() as counter:
+            t0 = time.perf_counter()
+            draw_all(fn)
+            dt = (time.perf_counter() - t0) * 1000
+        if not cold:
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                draw_all(fn)
+            dt = (time.perf_counter() - t0) * 1000 / repeat
+        results.append((name, counter.calls, dt))
+    for name, fn in (("图标逐像素", lambda: legacy_draw_scaled_icon(fb, SUNNY_ICON, 10, 10, 16, 3)),
+                     ("图标游程", lambda: scaled_text.draw_bitmap(fb, SUNNY_ICON, 10, 10, 16, 16, 3))):
+        with _CallCounter() as counter:
+            t0 = time.perf_counter()
+            fn()
+            dt = (time.perf_counter() - t0) * 1000
+        results.append((name, counter.calls, dt))
+
+    print(f"{'方式':<12}{'fb调用':>10}{'主机耗时(ms)':>14}")
+    for name, calls, dt in results:
+        print(f"{name:<12}{calls:>10}{dt:>14.1f}")
+    n, nbytes, hits, misses = scaled_text.info()
+    print(f"缓存: {n} 个字形, {nbytes} 字节, 命中 {hits}, 未命中 {misses}")
+    return results
+
+
+def run():
+    import epd_sim
+    epd_sim.install()
+    e = epd_sim.make_epd()
+    frame = bytearray(e.width * e.height // 8)
+
+    results = []
+    for name, fn in (("逐字节写入", lambda: legacy_write_image(e, 0x24, frame, True, True)),
+                     ("流式写入", lambda: e.write_image(0x24, frame)),
+                     ("局部窗口", lambda: e.write_region(0x24, frame, 20, 90, 48, 96)),
+                     ("逐字节窗口设置", lambda: legacy_set_partial(e, 20, 90, 48, 96)),
+                     ("窗口设置", lambda: e.set_partial(20, 90, 48, 96))):
+        e.spi.reset_counters()
+        e.cs.toggles = 0
+        t0 = time.perf_counter()
+        fn()
+        dt = (time.perf_counter() - t0) * 1000
+        results.append((name, e.spi.transactions, e.spi.bytes, e.cs.toggles, e.spi.wire_ms, dt))
+
+    print(f"{'方式':<10}{'事务数':>10}{'字节数':>10}{'CS翻转':>10}{'线上(ms)':>12}{'主机耗时(ms)':>14}")
+    for name, tx, nbytes, cs, wire, dt in results:
+        print(f"{name:<10}{tx:>10}{nbytes:>10}{cs:>10}{wire:>12.1f}{dt:>14.1f}")
+    return results
+
+
+def _app_env():
+    """导入应用所需的环境：模拟面板加上不联网的wifi/urequests/ujson/button_control空模块"""
+    import types
+    import epd_sim
+    panel = epd_sim.install()
+    for name in ("wifi", "urequests", "ujson", "button_control"):
+        sys.modules[name] = types.ModuleType(name)
+    for name in ("display_service", "dashboard", "todo_list"):
+        sys.modules.pop(name, None)
+    return panel
+
+
+def _measure(panel, fn):
+    with _CallCounter() as counter:
+        t0 = time.perf_counter()
+        mode = fn()
+        dt = (time.perf_counter() - t0) * 1000
+    r = panel.refreshes[-1] if panel.refreshes and mode != "none" else None
+    return counter.calls, dt, r["bytes"] if r else 0, mode
+
+
+def run_ui():
+    panel = _app_env()
+    import dashboard
+    import todo_list
+
+    def scenarios():
+        app = dashboard.DashboardApp()
+        for k, v in dict(current_year=2025, current_month=12, current_day=17, current_hour=9,
+                         current_minute=0, current_weekday=3, temperature=21, weather_desc="Sunny",
+                         humidity=60, weather_icon="sunny", wifi_connected=True).items():
+            setattr(app, k, v)
+
+        def tick(step):
+            app.current_hour += step
+            app.temperature += step
+        yield "看板整点更新", app.screen, app.draw_dashboard, tick
+
+        todo = todo_list.TodoApp()
+        todo.wifi_connected = True
+        todo.todos = [{"title": "Task %d" % i, "is_completed": False,
+                       "due_date": "2030-01-%02dT10:30:00" % (i + 1)} for i in range(8)]
+
+        def complete(step):
+            todo.todos[2] = dict(todo.todos[2], is_completed=step > 0)
+        yield "Todo完成一项", todo.screen, todo.draw_ui, complete
+
+    results = []
+    for name, screen, draw, change in scenarios():
+        e = dashboard.e
+        buf = dashboard.buf
+        draw()
+        screen.present(e, buf)
+        change(1)
+
+        # 整屏重画后与上一帧整帧比较(旧方式)
+        def full():
+            screen.invalidate()
+            draw()
+            screen.render()
+            return e.display_auto(buf)
+        results.append((name, "整屏重画", _measure(panel, full)))
+
+        # 回到变化前的画面，再只重画脏控件
+        change(-1)
+        draw()
+        screen.present(e, buf)
+        change(1)
+        def retained():
+            draw()
+            return screen.present(e, buf)
+        results.append((name, "控件重画", _measure(panel, retained)))
+
+    print(f"{'场景':<12}{'方式':<10}{'fb调用':>8}{'主机耗时(ms)':>14}{'SPI字节':>10}  刷新")
+    for name, how, (calls, dt, nbytes, mode) in results:
+        print(f"{name:<12}{how:<10}{calls:>8}{dt:>14.1f}{nbytes:>10}  {mode}")
+    return results
@@ -0,0 +1,68 @@
+"""
+模拟时钟
+默认使用虚拟时间：sleep_ms只推进计数而不真的等待，SPI传输按波特率推进，
+BUSY在虚拟时间到达刷新结束时释放。这样在PC上运行驱动既快又可重复，
+统计出的耗时就是设备上的预期耗时。realtime=True时使用真实时间。
+"""
+import time
+
+TICKS_PERIOD = 1 << 30
+
+
+class Clock:
+    def __init__(self):
+        self.realtime = False
+        self._now = 0.0
+        self._t0 = time.perf_counter()
+        # 时间推进后调用 fn(now_ms)，面板用它释放BUSY
+        self.listeners = []
+
+    def reset(self, realtime=False):
+        self.realtime = realtime
+        self._now = 0.0
+        self._t0 = time.perf_counter()
+        self.listeners = []
+
+    def now(self):
+        """当前时间(毫秒，浮点)"""
+        if self.realtime:
+            return (time.perf_counter() - self._t0) * 1000
+        return self._now
+
+    def advance(self, ms):
+        """虚拟时间下推进ms毫秒，用于SPI传输等设备上的耗时；真实时间下不等待"""
+        if not self.realtime and ms > 0:
+            self._now += ms
+        self.poll()
+
+    def poll(self):
+        now = self.now()
+        for fn in self.listeners:
+            fn(now)
+
+    # 以下为time模块的MicroPython扩展接口
+
+    def sleep_ms(self, ms):
+        if self.realtime:
+            time.sleep(ms / 1000)
+            self.poll()
+        else:
+            self.advance(ms)
+
+    def sleep_us(self, us):
+        self.sleep_ms(us / 1000)
+
+    def ticks_ms(self):
+        return int(self.now()) % TICKS_PERIOD
+
+    def ticks_us(self):
+        return int(self.now() * 1000) % TICKS_PERIOD
+
+    def ticks_add(self, ticks, delta):
+        return (ticks + delta) % TICKS_PERIOD
+
+    def ticks_diff(self, a, b):
+        return ((a - b + TICKS_PERIOD // 2) % TICKS_PERIOD) - TICKS_PERIOD // 2
+
+
+clock = Clock()
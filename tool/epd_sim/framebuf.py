@@ -0,0 +1,259 @@
+"""
+framebuf模块替身
+支持单色格式 MONO_VLSB / MONO_HLSB / MONO_HMSB，像素布局与MicroPython一致，
+所以在PC上画出的缓冲区可以原样发送给模拟面板。
+
+主机上没有MicroPython内置的8x8字体，text()默认把每个非空格字符画成一个方框，
+框内用几个像素编码字符，位置和宽度与设备上一致，不同字符画出的像素也不同。
+load_font()可以加载MicroPython源码中的font_petme128_8x8.h，之后text()输出真实字形。
+"""
+import os
+import re
+
+MONO_VLSB = 0
+RGB565 = 1
+GS4_HMSB = 2
+MONO_HLSB = 3
+MONO_HMSB = 4
+GS2_HMSB = 5
+GS8 = 6
+MVLSB = MONO_VLSB
+
+# 字符32~127的字形，每个字符8个字节，每字节一列，bit0在上
+_font = None
+_BLANK = bytes(8)
+
+
+def load_font(path):
+    """加载font_petme128_8x8.h(或768字节的原始字形数据)"""
+    global _font
+    with open(path, "rb") as f:
+        raw = f.read()
+    if path.endswith(".h"):
+        raw = bytes(int(v, 16) for v in re.findall(rb"0x([0-9a-fA-F]{2})", raw))
+    if len(raw) < 96 * 8:
+        raise ValueError("字体数据不足768字节")
+    _font = raw[:96 * 8]
+
+
+def _glyph(ch):
+    c = ord(ch)
+    if c < 32 or c > 127:
+        c = 127
+    if _font is not None:
+        i = (c - 32) * 8
+        return _font[i:i + 8]
+    if c == 32:
+        return _BLANK
+    # 方框，左侧两列内部按位画出字符编码
+    return bytes((0x00, 0x7F, 0x41 | ((c & 0x1F) << 1), 0x41 | (((c >> 5) & 3) << 1),
+                  0x41, 0x7F, 0x00, 0x00))
+
+
+if os.environ.get("EPD_SIM_FONT"):
+    load_font(os.environ["EPD_SIM_FONT"])
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        if format not in (MONO_VLSB, MONO_HLSB, MONO_HMSB):
+            raise ValueError("invalid format")
+        self.buf = buffer
+        self.width = width
+        self.height = height
+        self.format = format
+        if stride is None:
+            stride = width
+        if format != MONO_VLSB:
+            # 与MicroPython一样，水平格式的stride向上取整到8的倍数
+            stride = (stride + 7) & ~7
+            need = (stride >> 3) * height
+        else:
+            need = ((height + 7) >> 3) * stride
+        if len(buffer) < need:
+            raise ValueError("buffer too small")
+        self.stride = stride
+
+    # 像素寻址
+
+    def _get(self, x, y):
+        if self.format == MONO_VLSB:
+            return (self.buf[(y >> 3) * self.stride + x] >> (y & 7)) & 1
+        b = self.buf[(x + y * self.stride) >> 3]
+        if self.format == MONO_HMSB:
+            return (b >> (x & 7)) & 1
+        return (b >> (7 - (x & 7))) & 1
+
+    def _set(self, x, y, c):
+        if self.format == MONO_VLSB:
+            i = (y >> 3) * self.stride + x
+            m = 1 << (y & 7)
+        else:
+            i = (x + y * self.stride) >> 3
+            m = 1 << (x & 7) if self.format == MONO_HMSB else 0x80 >> (x & 7)
+        if c & 1:
+            self.buf[i] |= m
+        else:
+            self.buf[i] &= ~m & 0xFF
+
+    def _mask(self, lo, hi):
+        """字节内第lo~hi个像素对应的位"""
+        m = ((1 << (hi + 1)) - 1) & ~((1 << lo) - 1)
+        if self.format == MONO_HLSB:
+            m = int("{:08b}".format(m)[::-1], 2)
+        return m
+
+    # 绘图接口
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    def fill(self, c):
+        self.fill_rect(0, 0, self.width, self.height, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        x1 = min(x + w, self.width)
+        y1 = min(y + h, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        if self.format == MONO_VLSB:
+            for yy in range(y0, y1):
+                for xx in range(x0, x1):
+                    self._set(xx, yy, c)
+            return
+        buf = self.buf
+        sb = self.stride >> 3
+        b0 = x0 >> 3
+        b1 = (x1 - 1) >> 3
+        on = c & 1
+        if b0 == b1:
+            parts = ((b0, self._mask(x0 & 7, (x1 - 1) & 7)),)
+            full = None
+        else:
+            parts = ((b0, self._mask(x0 & 7, 7)), (b1, self._mask(0, (x1 - 1) & 7)))
+            full = (b"\xff" if on else b"\x00") * (b1 - b0 - 1)
+        for yy in range(y0, y1):
+            base = yy * sb
+            for b, m in parts:
+                if on:
+                    buf[base + b] |= m
+                else:
+                    buf[base + b] &= ~m & 0xFF
+            if full:
+                buf[base + b0 + 1:base + b1] = full
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        dx = abs(x2 - x1)
+        dy = -abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x1, y1, c)
+            if x1 == x2 and y1 == y2:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x1 += sx
+            if e2 <= dx:
+                err += dx
+                y1 += sy
+
+    def text(self, s, x, y, c=1):
+        for ch in s:
+            g = _glyph(ch)
+            for j in range(8):
+                col = g[j]
+                yy = y
+                while col:
+                    if col & 1:
+                        self.pixel(x + j, yy, c)
+                    col >>= 1
+                    yy += 1
+            x += 8
+
+    def scroll(self, xstep, ystep):
+        w, h = self.width, self.height
+        xs = range(w - 1, -1, -1) if xstep > 0 else range(w)
+        ys = range(h - 1, -1, -1) if ystep > 0 else range(h)
+        for yy in ys:
+            sy = yy - ystep
+            if not 0 <= sy < h:
+                continue
+            for xx in xs:
+                sx = xx - xstep
+                if 0 <= sx < w:
+                    self._set(xx, yy, self._get(sx, sy))
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if isinstance(fbuf, tuple):
+            fbuf = FrameBuffer(*fbuf)
+        dx0 = max(x, 0)
+        dy0 = max(y, 0)
+        dx1 = min(x + fbuf.width, self.width)
+        dy1 = min(y + fbuf.height, self.height)
+        if dx0 >= dx1 or dy0 >= dy1:
+            return
+        if (fbuf.format == self.format and self.format != MONO_VLSB and key == -1
+                and palette is None and x & 7 == 0 and (dx1 - dx0) & 7 == 0):
+            # 格式相同且按字节对齐时整行复制
+            n = (dx1 - dx0) >> 3
+            sb = fbuf.stride >> 3
+            db = self.stride >> 3
+            src = fbuf.buf
+            for yy in range(dy0, dy1):
+                s = (yy - y) * sb + ((dx0 - x) >> 3)
+                d = yy * db + (dx0 >> 3)
+                self.buf[d:d + n] = src[s:s + n]
+            return
+        if fbuf.format == self.format == MONO_HMSB and key in (-1, 0, 1) and palette is None:
+            # MONO_HMSB的一行按小端整数读取时第i位即第i个像素，整行移位合并
+            n = dx1 - dx0
+            m = (1 << n) - 1
+            sb = fbuf.stride >> 3
+            db = self.stride >> 3
+            b0 = dx0 >> 3
+            b1 = ((dx1 - 1) >> 3) + 1
+            sh = dx0 & 7
+            for yy in range(dy0, dy1):
+                s = (yy - y) * sb
+                row = (int.from_bytes(fbuf.buf[s:s + sb], "little") >> (dx0 - x)) & m
+                d = yy * db
+                cur = int.from_bytes(self.buf[d + b0:d + b1], "little")
+                if key == -1:
+                    cur = (cur & ~(m << sh)) | (row << sh)
+                elif key == 0:
+                    cur |= row << sh
+                else:
+                    cur &= ~((~row & m) << sh)
+                self.buf[d + b0:d + b1] = cur.to_bytes(b1 - b0, "little")
+            return
+        for yy in range(dy0, dy1):
+            for xx in range(dx0, dx1):
+                col = fbuf._get(xx - x, yy - y)
+                if palette is not None:
+                    col = palette.pixel(col, 0)
+                if col != key:
+                    self._set(xx, yy, col)
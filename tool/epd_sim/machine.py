@@ -0,0 +1,174 @@
+"""
+machine模块替身：Pin、SPI以及几个空操作函数
+
+同一编号的Pin是同一个对象，与硬件一样，config.py里创建的引脚和模拟面板
+连接的引脚是同一根线。SPI把写入的数据广播给所有挂在总线上的设备，
+设备自己根据CS电平决定是否接收。
+"""
+from .clock import clock
+
+# 挂在SPI总线上的模拟设备，需实现 spi_write(spi, data) 和 spi_read(spi, nbytes)
+_devices = []
+
+
+def attach(device):
+    if device not in _devices:
+        _devices.append(device)
+
+
+def _reset():
+    """清空引脚和总线设备，开始新的模拟"""
+    Pin._registry.clear()
+    del _devices[:]
+
+
+class Pin:
+    IN = 1
+    OUT = 3
+    OPEN_DRAIN = 7
+    PULL_UP = 2
+    PULL_DOWN = 1
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    _registry = {}
+
+    def __new__(cls, id=None, *args, **kwargs):
+        pin = cls._registry.get(id) if id is not None else None
+        if pin is None:
+            pin = super().__new__(cls)
+            pin.id = id
+            pin.mode = None
+            pin._value = 0
+            pin.toggles = 0
+            pin._irq_handler = None
+            pin._irq_trigger = 0
+            # 电平变化时通知模拟设备，fn(pin)
+            pin._watchers = []
+            # 读取电平前调用，模拟设备借此更新输出
+            pin._on_read = None
+            if id is not None:
+                cls._registry[id] = pin
+        return pin
+
+    def __init__(self, id=None, mode=-1, pull=-1, value=None, **kwargs):
+        self.init(mode, pull, value)
+
+    def init(self, mode=-1, pull=-1, value=None, **kwargs):
+        if mode != -1:
+            self.mode = mode
+        if value is not None:
+            self.value(value)
+
+    def value(self, v=None):
+        if v is None:
+            if self._on_read is not None:
+                self._on_read()
+            return self._value
+        self._set(1 if v else 0)
+
+    def _set(self, v):
+        if v == self._value:
+            return
+        self.toggles += 1
+        self._value = v
+        for fn in self._watchers:
+            fn(self)
+        edge = self.IRQ_RISING if v else self.IRQ_FALLING
+        if self._irq_handler is not None and self._irq_trigger & edge:
+            self._irq_handler(self)
+
+    def _drive(self, v):
+        """由模拟设备驱动的输入电平(如BUSY)，不计入MCU的翻转次数"""
+        toggles = self.toggles
+        self._set(v)
+        self.toggles = toggles
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, **kwargs):
+        self._irq_handler = handler
+        self._irq_trigger = trigger
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def __repr__(self):
+        return "Pin(%s)" % self.id
+
+
+class SPI:
+    MSB = 0
+    LSB = 1
+
+    def __init__(self, id=1, baudrate=1000000, polarity=0, phase=0, bits=8, firstbit=MSB,
+                 sck=None, mosi=None, miso=None, **kwargs):
+        self.id = id
+        self.baudrate = baudrate
+        # 每次传输的固定开销(毫秒)，对应驱动调用和DMA启动
+        self.overhead_ms = 0.02
+        self.transactions = 0
+        self.bytes = 0
+        # 累计线上传输时间(毫秒)
+        self.wire_ms = 0.0
+
+    def init(self, baudrate=None, **kwargs):
+        if baudrate is not None:
+            self.baudrate = baudrate
+
+    def deinit(self):
+        pass
+
+    def _transfer(self, nbytes):
+        self.transactions += 1
+        self.bytes += nbytes
+        ms = nbytes * 8000 / self.baudrate + self.overhead_ms
+        self.wire_ms += ms
+        clock.advance(ms)
+
+    def write(self, buf):
+        data = bytes(buf)
+        self._transfer(len(data))
+        for dev in _devices:
+            dev.spi_write(self, data)
+
+    def read(self, nbytes, write=0x00):
+        self._transfer(nbytes)
+        for dev in _devices:
+            data = dev.spi_read(self, nbytes)
+            if data is not None:
+                return data
+        # 没有设备应答时与未接MISO一样返回填充字节
+        return bytes([write]) * nbytes
+
+    def readinto(self, buf, write=0x00):
+        buf[:] = self.read(len(buf), write)
+
+    def reset_counters(self):
+        self.transactions = 0
+        self.bytes = 0
+        self.wire_ms = 0.0
+
+
+def idle():
+    clock.sleep_ms(1)
+
+
+def lightsleep(ms=None):
+    clock.sleep_ms(ms or 0)
+
+
+def freq(hz=None):
+    return 240000000
+
+
+def unique_id():
+    return b"\x00\x00\x00\x00\x00\x00"
+
+
+def reset():
+    raise SystemExit("machine.reset()")
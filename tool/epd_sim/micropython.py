@@ -0,0 +1,25 @@
+"""
+micropython模块替身
+没有提供viper/native装饰器，使用它们的代码会走各自的纯Python分支。
+"""
+
+
+def const(x):
+    return x
+
+
+def schedule(func, arg):
+    # 主机上没有硬中断，直接调用
+    func(arg)
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def mem_info(verbose=None):
+    print("mem: host")
+
+
+def opt_level(level=None):
+    return 0
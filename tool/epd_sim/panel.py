@@ -0,0 +1,438 @@
+"""
+SSD1683控制器和400x300面板的模拟
+
+按DC电平把SPI数据解码为命令和参数，维护RAM窗口、地址计数器、数据输入模式、
+两块显示RAM(0x24新画面/0x26旧画面)、温度寄存器和电源状态。0x20启动更新时按
+0x22的各个位决定动作：上电、加载温度、加载波形、模式1/模式2显示、下电，
+再根据波形种类拉低BUSY一段(虚拟)时间，并记录这次刷新。
+
+屏幕上的内容单独保存：模式1刷新后等于新画面；模式2(差分)只驱动新旧RAM
+不同的像素，旧RAM与屏幕不一致时会留下错误像素，记录在stale中。
+"""
+import random
+
+from . import machine
+from .clock import clock
+from .png import write_png
+
+# 各类操作的BUSY时长(毫秒)
+TIMING = {
+    "full": 3500,       # 模式1，按实测温度加载的完整波形
+    "fast": 1500,       # 模式1，按0x1A写入的高温快速波形
+    "partial": 600,     # 模式2差分波形
+    "power_on": 80,
+    "power_off": 40,
+    "temp": 20,
+    "swreset": 10,
+    "cold_factor": 2,   # 波形温度低于10℃时刷新时长的倍数
+}
+
+# 快速波形的温度下限：0x1A写入不低于该温度时按快速波形计
+FAST_LUT_TEMP = 50
+
+KINDS = ("full", "fast", "partial")
+
+# SPI时钟上限(Hz)，取自数据手册的串口时序，超过后RAM数据和读出的数据开始出错
+MAX_WRITE_HZ = 20000000
+MAX_READ_HZ = 6600000
+
+
+def _rev8(b):
+    return int("{:08b}".format(b)[::-1], 2)
+
+
+_REV8 = bytes(_rev8(i) for i in range(256))
+
+
+def _popcount(x):
+    return bin(x).count("1")
+
+
+class Panel:
+    def __init__(self, width=400, height=300, cs=45, dc=40, rst=41, busy=42,
+                 flip_x=True, flip_y=True, temperature=25.0, busy_level=0, timing=None,
+                 max_write_hz=MAX_WRITE_HZ, max_read_hz=MAX_READ_HZ):
+        """
+        参数:
+            width, height: 面板RAM尺寸
+            cs, dc, rst, busy: 引脚编号，默认与config.py一致
+            flip_x, flip_y: 面板安装方向，RAM的X/Y与观看方向相反时为True
+            temperature: 内部温度传感器的读数(℃)
+            busy_level: BUSY有效电平
+            timing: 覆盖TIMING中的时长
+            max_write_hz, max_read_hz: SPI写入/读取时钟上限
+        """
+        self.width = width
+        self.height = height
+        self.xbytes = width // 8
+        self.flip_x = flip_x
+        self.flip_y = flip_y
+        self.temperature = temperature
+        self.busy_level = busy_level
+        self.max_write_hz = max_write_hz
+        self.max_read_hz = max_read_hz
+        # 超速误码使用固定种子，结果可重复
+        self._rng = random.Random(1683)
+        self.timing = dict(TIMING)
+        if timing:
+            self.timing.update(timing)
+
+        self.cs = machine.Pin(cs)
+        self.dc = machine.Pin(dc)
+        self.rst = machine.Pin(rst)
+        self.busy = machine.Pin(busy)
+        self.busy._drive(1 - busy_level)
+        self.busy._on_read = clock.poll
+        self.rst._watchers.append(self._rst_changed)
+        clock.listeners.append(self._tick)
+        machine.attach(self)
+
+        n = self.xbytes * height
+        self.ram = {0x24: bytearray(b"\xff" * n), 0x26: bytearray(n)}
+        # 屏幕上实际显示的内容，布局与RAM相同
+        self.glass = bytearray(b"\xff" * n)
+        self._busy_until = None
+        self._busy_kind = None
+        self._cmd = None
+        self._params = bytearray()
+        self.reset_stats()
+        self._por()
+
+    def reset_stats(self):
+        """清空刷新记录和计数器"""
+        self.refreshes = []
+        self.bytes = 0
+        self.commands = 0
+        self.resets = 0
+        self.swresets = 0
+        self.busy_violations = 0
+        self.ignored = 0
+        self.unpowered = 0
+        self.spi_errors = 0
+        self.unknown = set()
+        self.busy_ms = {}
+        self._frame_bytes = 0
+        self._frame_commands = 0
+
+    def _por(self):
+        """上电/硬件复位后的寄存器状态，RAM内容保留"""
+        self.entry = 0x03
+        self.xs, self.xe = 0, self.xbytes - 1
+        self.ys, self.ye = 0, self.height - 1
+        self.x = 0
+        self.y = 0
+        self.ram_opt = (0x00, 0x00)
+        self.ctrl = 0xFF
+        self.temp_reg = 0.0
+        self.lut_temp = None
+        self.read_ram = 0x24
+        self._dummy = False
+        self.sleeping = False
+        self.analog = False
+        self.regs = {}
+
+    # 引脚和时间
+
+    def _rst_changed(self, pin):
+        if not pin._value and self._busy_until is not None:
+            # 硬件复位中止进行中的操作，BUSY释放
+            self._busy_until = None
+            self.busy._drive(1 - self.busy_level)
+        if pin._value:
+            self.resets += 1
+            self._por()
+            self._cmd = None
+
+    def _tick(self, now):
+        if self._busy_until is not None and now >= self._busy_until:
+            self._busy_until = None
+            self.busy._drive(1 - self.busy_level)
+
+    @property
+    def is_busy(self):
+        clock.poll()
+        return self._busy_until is not None
+
+    def _start_busy(self, kind, ms):
+        self.busy_ms[kind] = self.busy_ms.get(kind, 0) + ms
+        self._busy_until = clock.now() + ms
+        self._busy_kind = kind
+        self.busy._drive(self.busy_level)
+
+    def settle(self):
+        """推进虚拟时间直到BUSY释放"""
+        if self._busy_until is not None and not clock.realtime:
+            clock.advance(self._busy_until - clock.now())
+
+    # SPI
+
+    def spi_write(self, spi, data):
+        if self.cs._value:
+            return
+        self.bytes += len(data)
+        self._frame_bytes += len(data)
+        if self.sleeping:
+            self.ignored += len(data)
+            return
+        if self._busy_until is not None:
+            clock.poll()
+            if self._busy_until is not None:
+                self.busy_violations += 1
+        if self.dc._value == 0:
+            for c in data:
+                self._command(c)
+        elif self._cmd in (0x24, 0x26):
+            data = self._garble(data, spi.baudrate, self.max_write_hz)
+            self._ram_write(self.ram[self._cmd], data)
+        elif self._cmd is not None:
+            self._params += data
+            self._apply(self._cmd, self._params)
+
+    def spi_read(self, spi, nbytes):
+        if self.cs._value:
+            return None
+        if self._cmd == 0x1B:
+            v = int(round(self.temp_reg * 16)) & 0xFFF
+            out = bytes((v >> 4, (v & 0x0F) << 4))
+            out = (out * nbytes)[:nbytes]
+        elif self._cmd == 0x27:
+            out = self._ram_read(nbytes)
+        else:
+            out = bytes(nbytes)
+        return self._garble(out, spi.baudrate, self.max_read_hz)
+
+    def _garble(self, data, hz, limit):
+        """时钟超过上限时按超出的比例随机翻转数据位"""
+        if hz <= limit:
+            return data
+        p = min(1.0, (hz / limit - 1) * 0.2)
+        rng = self._rng
+        out = bytearray(data)
+        for i in range(len(out)):
+            if rng.random() < p:
+                out[i] ^= 1 << rng.randrange(8)
+                self.spi_errors += 1
+        return bytes(out)
+
+    # 命令解码
+
+    def _command(self, c):
+        self.commands += 1
+        self._frame_commands += 1
+        self._cmd = c
+        self._params = bytearray()
+        if c == 0x20:
+            self._activate()
+        elif c == 0x12:
+            self.swresets += 1
+            self._por()
+            self._cmd = c
+            self._start_busy("swreset", self.timing["swreset"])
+        elif c == 0x27:
+            # 第一个读出的字节是空字节
+            self._dummy = True
+
+    def _apply(self, c, p):
+        n = len(p)
+        if c == 0x11:
+            self.entry = p[0] & 0x07
+        elif c == 0x44:
+            self.xs = p[0] & 0x3F
+            if n > 1:
+                self.xe = p[1] & 0x3F
+        elif c == 0x45:
+            if n > 1:
+                self.ys = p[0] | (p[1] & 0x01) << 8
+            if n > 3:
+                self.ye = p[2] | (p[3] & 0x01) << 8
+        elif c == 0x4E:
+            self.x = p[0] & 0x3F
+        elif c == 0x4F:
+            if n > 1:
+                self.y = p[0] | (p[1] & 0x01) << 8
+        elif c == 0x21:
+            self.ram_opt = (p[0], p[1] if n > 1 else 0)
+        elif c == 0x22:
+            self.ctrl = p[0]
+        elif c == 0x1A:
+            t = p[0] - 256 if p[0] & 0x80 else p[0]
+            if n > 1:
+                t += (p[1] >> 4) / 16
+            self.temp_reg = float(t)
+        elif c == 0x10:
+            if p[0] & 0x03:
+                self.sleeping = True
+                self.analog = False
+                if p[0] & 0x03 == 0x03:
+                    # 深度睡眠模式2不保留RAM
+                    for ram in self.ram.values():
+                        ram[:] = bytes(len(ram))
+        elif c == 0x41:
+            self.read_ram = 0x26 if p[0] & 0x01 else 0x24
+        elif c in (0x01, 0x03, 0x04, 0x0C, 0x18, 0x2C, 0x32, 0x37, 0x3C, 0x3F):
+            self.regs[c] = bytes(p)
+        else:
+            self.unknown.add(c)
+
+    def _advance(self):
+        """按数据输入模式移动地址计数器，到达窗口边界时折返"""
+        e = self.entry
+        if e & 0x04:
+            if self.y == self.ye:
+                self.y = self.ys
+                self.x = self._step(self.x, self.xs, self.xe, e & 0x01)
+            else:
+                self.y += 1 if e & 0x02 else -1
+        else:
+            if self.x == self.xe:
+                self.x = self.xs
+                self.y = self._step(self.y, self.ys, self.ye, e & 0x02)
+            else:
+                self.x += 1 if e & 0x01 else -1
+
+    @staticmethod
+    def _step(v, start, end, inc):
+        if v == end:
+            return start
+        return v + 1 if inc else v - 1
+
+    def _ram_write(self, ram, data):
+        xb = self.xbytes
+        n = len(ram)
+        for v in data:
+            i = self.y * xb + self.x
+            if 0 <= i < n:
+                ram[i] = v
+            self._advance()
+
+    def _ram_read(self, nbytes):
+        ram = self.ram[self.read_ram]
+        out = bytearray()
+        for _ in range(nbytes):
+            if self._dummy:
+                self._dummy = False
+                out.append(0x00)
+                continue
+            i = self.y * self.xbytes + self.x
+            out.append(ram[i] if 0 <= i < len(ram) else 0)
+            self._advance()
+        return bytes(out)
+
+    # 显示更新
+
+    def _ram_value(self, cmd, opt):
+        """按0x21的RAM选项取出RAM内容(整数)：0100为按0处理，1000为取反"""
+        ram = self.ram[cmd]
+        n = len(ram) * 8
+        if opt & 0x04:
+            return 0
+        v = int.from_bytes(ram, "big")
+        if opt & 0x08:
+            v ^= (1 << n) - 1
+        return v
+
+    def _activate(self):
+        ctrl = self.ctrl
+        t = self.timing
+        ms = 0
+        if ctrl & 0x40 and not self.analog:
+            self.analog = True
+            ms += t["power_on"]
+        if ctrl & 0x20:
+            self.temp_reg = float(self.temperature)
+            ms += t["temp"]
+        if ctrl & 0x10:
+            self.lut_temp = self.temp_reg
+        kind = None
+        if ctrl & 0x04:
+            if not self.analog:
+                self.unpowered += 1
+            kind = self._display(ctrl & 0x08)
+            d = t[kind]
+            if self.lut_temp is not None and self.lut_temp < 10:
+                d *= t["cold_factor"]
+            ms += d
+            self.refreshes[-1]["busy_ms"] = d
+        if ctrl & 0x02 and self.analog:
+            self.analog = False
+            ms += t["power_off"]
+        self._start_busy(kind or "power", ms)
+
+    def _display(self, mode2):
+        new = self._ram_value(0x24, self.ram_opt[0] & 0x0F)
+        glass = int.from_bytes(self.glass, "big")
+        if mode2:
+            old = self._ram_value(0x26, self.ram_opt[0] >> 4)
+            diff = old ^ new
+            result = (glass & ~diff) | (new & diff)
+            kind = "partial"
+        else:
+            result = new
+            lut = self.lut_temp if self.lut_temp is not None else self.temp_reg
+            kind = "fast" if lut >= FAST_LUT_TEMP else "full"
+        self.glass[:] = result.to_bytes(len(self.glass), "big")
+        self.refreshes.append({
+            "t": round(clock.now(), 1),
+            "ctrl": self.ctrl,
+            "kind": kind,
+            "busy_ms": 0,
+            "temperature": self.lut_temp,
+            "bytes": self._frame_bytes,
+            "commands": self._frame_commands,
+            "changed": _popcount(glass ^ result),
+            "stale": _popcount(result ^ new),
+        })
+        self._frame_bytes = 0
+        self._frame_commands = 0
+        return kind
+
+    # 结果
+
+    def frame(self, source=None):
+        """返回观看方向下的MONO_HMSB整帧，可直接与驱动的帧缓冲区比较
+
+        source为None时取屏幕内容，也可以是0x24/0x26取对应RAM
+        """
+        data = self.glass if source is None else self.ram[source]
+        xb = self.xbytes
+        out = bytearray(len(data))
+        for vy in range(self.height):
+            ry = self.height - 1 - vy if self.flip_y else vy
+            row = data[ry * xb:(ry + 1) * xb]
+            if self.flip_x:
+                # RAM最高位在左，水平翻转后恰好等于MONO_HMSB，只需倒转字节顺序
+                row = row[::-1]
+            else:
+                row = bytes(_REV8[b] for b in row)
+            out[vy * xb:(vy + 1) * xb] = row
+        return out
+
+    def save_png(self, path, source=None, scale=1):
+        """把屏幕内容(或指定RAM)按观看方向保存为PNG"""
+        f = self.frame(source)
+        xb = self.xbytes
+        rows = [bytes(_REV8[b] for b in f[y * xb:(y + 1) * xb]) for y in range(self.height)]
+        write_png(path, self.width, self.height, rows, scale)
+
+    def stats(self):
+        """刷新次数、BUSY时长和接收字节等统计"""
+        counts = {k: 0 for k in KINDS}
+        for r in self.refreshes:
+            counts[r["kind"]] += 1
+        return {
+            "refreshes": len(self.refreshes),
+            "counts": counts,
+            "busy_ms": dict(self.busy_ms),
+            "busy_ms_total": sum(self.busy_ms.values()),
+            "bytes": self.bytes,
+            "commands": self.commands,
+            "cs_toggles": self.cs.toggles,
+            "resets": self.resets,
+            "swresets": self.swresets,
+            "busy_violations": self.busy_violations,
+            "ignored": self.ignored,
+            "unpowered": self.unpowered,
+            "spi_errors": self.spi_errors,
+            "stale": self.refreshes[-1]["stale"] if self.refreshes else 0,
+            "unknown": sorted(self.unknown),
+        }
@@ -0,0 +1,42 @@
+"""
+不依赖PIL的PNG输出
+"""
+import struct
+import zlib
+
+
+def _chunk(kind, data):
+    body = kind + data
+    return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+
+def write_png(path, width, height, rows, scale=1):
+    """把1位图像写为PNG
+
+    参数:
+        rows: height行数据，每行(width+7)//8字节，最高位在左，1为白色
+        scale: 整数放大倍数，便于在PC上查看
+    """
+    if scale <= 1:
+        depth = 1
+        raw = b"".join(b"\x00" + bytes(r) for r in rows)
+        w, h = width, height
+    else:
+        # 放大后改用8位灰度，每个像素展开为scale个字节
+        depth = 8
+        lines = []
+        for r in rows:
+            line = bytearray()
+            for x in range(width):
+                v = 255 if (r[x >> 3] >> (7 - (x & 7))) & 1 else 0
+                line += bytes((v,)) * scale
+            line = b"\x00" + bytes(line)
+            lines.extend([line] * scale)
+        raw = b"".join(lines)
+        w, h = width * scale, height * scale
+    png = b"\x89PNG\r\n\x1a\n"
+    png += _chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, depth, 0, 0, 0, 0))
+    png += _chunk(b"IDAT", zlib.compress(raw, 9))
+    png += _chunk(b"IEND", b"")
+    with open(path, "wb") as f:
+        f.write(png)
@@ -6,6 +6,8 @@
 # 假设你已经使用图片转换工具将图片转换为example_image.py
 # 其中包含以下内容：
 # example_image = bytearray(b'\x00\x00\x00\x0...')
+# 转换工具默认输出面板格式(MONO_HMSB，bit0在最左边)，image.run()直接使用；
+# 使用 --hlsb 生成的旧格式数据需要传入 fmt=image.FORMAT_HLSB
 
 # 1. 导入转换后的图片数据
 # from example_image import example_image
@@ -33,7 +35,7 @@ def run(img_data=None):
         
         # 创建帧缓冲区
         buf = bytearray(config.WIDTH * config.HEIGHT // 8)
-        fb = framebuf.FrameBuffer(buf, config.WIDTH, config.HEIGHT, framebuf.MONO_HLSB)
+        fb = framebuf.FrameBuffer(buf, config.WIDTH, config.HEIGHT, framebuf.MONO_HMSB)
         
         if img_data is not None:
             # 使用提供的图片数据
@@ -56,9 +58,9 @@ def run(img_data=None):
             # 将图片数据复制到帧缓冲区
             for y in range(img_height):
                 for x in range(img_width):
-                    # 计算源位置
+                    # 计算源位置(面板格式，bit0在最左边)
                     src_byte_index = y * ((img_width + 7) // 8) + x // 8
-                    src_bit_position = 7 - (x % 8)
+                    src_bit_position = x % 8
                     
                     # 获取像素值
                     pixel = (img_data[src_byte_index] >> src_bit_position) & 1
@@ -114,8 +116,8 @@ if RUN_MODE == 3:
     # 导入图片显示模块
     import image
     
-    # 显示图片
-    image.run(example_image)
+    # 显示图片(转换工具默认输出的面板格式)
+    image.run(example_image, width=400, height=300)
 """
 
 # 4. 使用不同的图片
@@ -124,19 +126,23 @@ if RUN_MODE == 3:
 
 # 显示黑色背景白色文本的图片
 from example_dark import example_dark
-image.run(example_dark)
+image.run(example_dark, width=400, height=300)
 
 # 显示白色背景黑色文本的图片
 from example_light import example_light
-image.run(example_light)
+image.run(example_light, width=400, height=300)
 
 # 显示旋转的图片
 from example_rotated import example_rotated
-image.run(example_rotated)
+image.run(example_rotated, width=400, height=300)
 
 # 显示文本图片
 from hello_text import hello_text
-image.run(hello_text)
+image.run(hello_text, width=400, height=300)
+
+# 使用 --hlsb 生成的旧格式图片
+from example_legacy import example_legacy
+image.run(example_legacy, width=400, height=300, fmt=image.FORMAT_HLSB)
 """
 
 # 5. 动态选择图片
@@ -159,7 +165,7 @@ def display_image_by_condition(condition):
 
 # 使用示例
 img_data = display_image_by_condition("dark")
-image.run(img_data)
+image.run(img_data, width=400, height=300)
 """
 
 print("这是一个示例文件，展示了如何在ESP32项目中使用转换后的图片数据。")
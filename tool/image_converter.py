@@ -10,7 +10,11 @@ from PIL import Image, ImageOps, ImageDraw, ImageFont
 import argparse
 import math
 
-def convert_image_to_epaper(input_path, output_path, width=400, height=300, invert=False, rotate=False, dither=True):
+def format_name(hlsb):
+    """输出文件头中记录的数据格式"""
+    return "MONO_HLSB" if hlsb else "MONO_HMSB"
+
+def convert_image_to_epaper(input_path, output_path, width=400, height=300, invert=False, rotate=False, dither=True, hlsb=False):
     """
     将图片转换为墨水屏二进制格式
     
@@ -22,6 +26,7 @@ def convert_image_to_epaper(input_path, output_path, width=400, height=300, inve
         invert: 是否反转颜色(默认False，黑色背景白色文本)
         rotate: 是否旋转90度(默认False)
         dither: 是否使用抖动算法(默认True)
+        hlsb: 输出旧的MONO_HLSB格式(默认False，输出面板格式MONO_HMSB)
     """
     try:
         # 打开图片
@@ -92,7 +97,10 @@ def convert_image_to_epaper(input_path, output_path, width=400, height=300, inve
                 
                 # 计算字节位置和位位置
                 byte_index = y * width_bytes + x // 8
-                bit_position = 7 - (x % 8)  # 最高位在前
+                if hlsb:
+                    bit_position = 7 - (x % 8)  # 最高位在前
+                else:
+                    bit_position = x % 8  # 最低位在前，与面板格式一致
                 
                 # 设置位
                 if pixel:
@@ -104,6 +112,7 @@ def convert_image_to_epaper(input_path, output_path, width=400, height=300, inve
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(f"# Converted from {input_path}\n")
             f.write(f"# Size: {width}x{height}\n")
+            f.write(f"# Format: {format_name(hlsb)}\n")
             f.write(f"# Inverted: {invert}, Rotated: {rotate}\n")
             f.write(f"{var_name} = bytearray(b'")
             
@@ -125,7 +134,7 @@ def convert_image_to_epaper(input_path, output_path, width=400, height=300, inve
         print(f"转换失败: {e}")
         return False
 
-def create_text_image(text, output_path, width=400, height=300, font_size=24, invert=False, rotate=False):
+def create_text_image(text, output_path, width=400, height=300, font_size=24, invert=False, rotate=False, hlsb=False):
     """
     创建文本图像并转换为墨水屏二进制格式
     
@@ -137,6 +146,7 @@ def create_text_image(text, output_path, width=400, height=300, font_size=24, in
         font_size: 字体大小(默认24)
         invert: 是否反转颜色(默认False，黑色背景白色文本)
         rotate: 是否旋转90度(默认False)
+        hlsb: 输出旧的MONO_HLSB格式(默认False，输出面板格式MONO_HMSB)
     """
     try:
         # 创建图像
@@ -192,7 +202,10 @@ def create_text_image(text, output_path, width=400, height=300, font_size=24, in
                 
                 # 计算字节位置和位位置
                 byte_index = y * width_bytes + x // 8
-                bit_position = 7 - (x % 8)  # 最高位在前
+                if hlsb:
+                    bit_position = 7 - (x % 8)  # 最高位在前
+                else:
+                    bit_position = x % 8  # 最低位在前，与面板格式一致
                 
                 # 设置位
                 if pixel:
@@ -204,6 +217,7 @@ def create_text_image(text, output_path, width=400, height=300, font_size=24, in
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(f"# Text image: {text}\n")
             f.write(f"# Size: {width}x{height}\n")
+            f.write(f"# Format: {format_name(hlsb)}\n")
             f.write(f"# Font size: {font_size}\n")
             f.write(f"# Inverted: {invert}, Rotated: {rotate}\n")
             f.write(f"{var_name} = bytearray(b'")
@@ -239,6 +253,7 @@ def main():
     img_parser.add_argument('--height', type=int, default=300, help='目标高度(默认300)')
     img_parser.add_argument('--invert', action='store_true', help='反转颜色(白色背景黑色文本)')
     img_parser.add_argument('--rotate', action='store_true', help='旋转90度')
+    img_parser.add_argument('--hlsb', action='store_true', help='输出旧的MONO_HLSB格式(最高位在前)')
     img_parser.add_argument('--no-dither', action='store_true', help='不使用抖动算法')
     
     # 文本创建命令
@@ -250,6 +265,7 @@ def main():
     text_parser.add_argument('--font-size', type=int, default=24, help='字体大小(默认24)')
     text_parser.add_argument('--invert', action='store_true', help='反转颜色(白色背景黑色文本)')
     text_parser.add_argument('--rotate', action='store_true', help='旋转90度')
+    text_parser.add_argument('--hlsb', action='store_true', help='输出旧的MONO_HLSB格式(最高位在前)')
     
     # 批量转换命令
     batch_parser = subparsers.add_parser('batch', help='批量转换图片')
@@ -259,6 +275,7 @@ def main():
     batch_parser.add_argument('--height', type=int, default=300, help='目标高度(默认300)')
     batch_parser.add_argument('--invert', action='store_true', help='反转颜色(白色背景黑色文本)')
     batch_parser.add_argument('--rotate', action='store_true', help='旋转90度')
+    batch_parser.add_argument('--hlsb', action='store_true', help='输出旧的MONO_HLSB格式(最高位在前)')
     batch_parser.add_argument('--no-dither', action='store_true', help='不使用抖动算法')
     
     args = parser.parse_args()
@@ -271,7 +288,8 @@ def main():
             args.height, 
             args.invert, 
             args.rotate, 
-            not args.no_dither
+            not args.no_dither,
+            args.hlsb
         )
     elif args.command == 'text':
         create_text_image(
@@ -281,7 +299,8 @@ def main():
             args.height, 
             args.font_size, 
             args.invert, 
-            args.rotate
+            args.rotate,
+            args.hlsb
         )
     elif args.command == 'batch':
         # 确保输出目录存在
@@ -304,7 +323,8 @@ def main():
                     args.height, 
                     args.invert, 
                     args.rotate, 
-                    not args.no_dither
+                    not args.no_dither,
+                    args.hlsb
                 )
     else:
         parser.print_help()
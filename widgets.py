@@ -0,0 +1,362 @@
+"""
+保留模式界面
+应用把界面描述成一组控件(文本、图标、方框、列表、标签)，每个控件有固定的区域和
+可选的数据绑定。值变化时控件标记为脏，绘制时只重画受影响的控件，并把变化区域
+交给驱动的display_regions()做一次局部刷新，不再每次整屏重画、整屏比较。
+
+    screen = widgets.Screen(fb, config.WIDTH, config.HEIGHT)
+    screen.add(widgets.Box(0, 0, 400, 300))
+    day = screen.add(widgets.Label(20, 90, 200, 96, scale=12, align="center",
+                                   bind=lambda: str(app.current_day)))
+    ...
+    screen.update()            # 读取绑定，值变化的控件标记为脏
+    screen.present(e, buf)     # 重画脏区域并局部刷新
+
+重画规则：
+    1. 脏控件的旧区域和新区域为损坏区域，先用屏幕底色清空；
+       设置了静态背景(background.Background)时改为从背景复制，区域x方向扩展到整字节；
+    2. 与损坏区域相交的控件按添加顺序重画，被重画控件覆盖的后添加控件也一起重画；
+    3. 控件只在自己的区域内绘制，同样的值画出同样的像素，
+       因此损坏区域以外的像素不变，刷新损坏区域即可。
+"""
+import scaled_text
+import icons
+
+BLACK = 0
+WHITE = 1
+# 损坏区域超过该数量时合并为一个外接矩形
+MAX_RECTS = 8
+
+
+def _intersects(a, b):
+    return (a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and
+            a[1] < b[1] + b[3] and b[1] < a[1] + a[3])
+
+
+def _union(a, b):
+    x = min(a[0], b[0])
+    y = min(a[1], b[1])
+    return (x, y, max(a[0] + a[2], b[0] + b[2]) - x, max(a[1] + a[3], b[1] + b[3]) - y)
+
+
+def badge(fb, text, x, y, padding=2, color=BLACK):
+    """绘制实心底色、反色文字的小标签，返回宽度"""
+    w = len(text) * 8 + padding * 2
+    fb.fill_rect(x, y, w, 10 + padding * 2, color)
+    fb.text(text, x + padding, y + padding, 1 - color)
+    return w
+
+
+class Widget:
+    """控件基类
+
+    参数:
+        x, y, w, h: 控件区域，绘制不超出该区域
+        value: 控件的值，由子类解释(文本、图标名等)
+        bind: 无参函数，Screen.update()时调用，返回值作为新的value
+        visible: 是否显示
+    """
+
+    def __init__(self, x, y, w, h, value=None, bind=None, visible=True):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.value = value
+        self.bind = bind
+        self.visible = visible
+        self.dirty = True
+        # 上次绘制时的区域，隐藏或移动后需要清除
+        self._drawn = None
+
+    @property
+    def rect(self):
+        return (self.x, self.y, self.w, self.h)
+
+    def set(self, value):
+        """设置值，变化时标记为脏"""
+        if value != self.value:
+            self.value = value
+            self.dirty = True
+
+    def show(self, visible=True):
+        if visible != self.visible:
+            self.visible = visible
+            self.dirty = True
+
+    def move(self, x, y, w=None, h=None):
+        """改变区域，旧区域在下次绘制时清除"""
+        rect = (x, y, self.w if w is None else w, self.h if h is None else h)
+        if rect != self.rect:
+            self.x, self.y, self.w, self.h = rect
+            self.dirty = True
+
+    def invalidate(self):
+        self.dirty = True
+
+    def areas(self):
+        """绘制时实际覆盖的矩形，用于判断是否受损坏区域影响"""
+        return (self.rect,)
+
+    def update(self):
+        """读取数据绑定"""
+        if self.bind is not None:
+            self.set(self.bind())
+
+    def draw(self, fb):
+        raise NotImplementedError
+
+
+class Box(Widget):
+    """方框或实心矩形，也用作分割线(宽或高为1~2的实心矩形)"""
+
+    def __init__(self, x, y, w, h, color=BLACK, fill=False, **kw):
+        super().__init__(x, y, w, h, **kw)
+        self.color = color
+        self.fill = fill
+
+    def areas(self):
+        if self.fill:
+            return (self.rect,)
+        # 空心方框只覆盖四条边，框内的控件不受它影响
+        x, y, w, h = self.rect
+        return ((x, y, w, 1), (x, y + h - 1, w, 1), (x, y, 1, h), (x + w - 1, y, 1, h))
+
+    def draw(self, fb):
+        if self.fill:
+            fb.fill_rect(self.x, self.y, self.w, self.h, self.color)
+        else:
+            fb.rect(self.x, self.y, self.w, self.h, self.color)
+
+
+class Label(Widget):
+    """文本，scale为放大倍数，在区域内按align("left"/"center"/"right")对齐
+
+    w为None时区域宽度取初始文本的宽度。文本比区域宽时截去放不下的字符，
+    不会画到区域外。
+    """
+
+    def __init__(self, x, y, w=None, h=None, text="", scale=1, color=BLACK,
+                 align="left", **kw):
+        text = str(text)
+        if w is None:
+            w = len(text) * 8 * scale
+        if h is None:
+            h = 8 * scale
+        super().__init__(x, y, w, h, text, **kw)
+        self.scale = scale
+        self.color = color
+        self.align = align
+
+    def set(self, value):
+        super().set(str(value))
+
+    def draw(self, fb):
+        text = self.value
+        cw = 8 * self.scale
+        n = self.w // cw
+        if len(text) > n:
+            # 只在自己的区域内绘制(重画规则3)
+            text = text[:n]
+        tw = len(text) * cw
+        x = self.x
+        if self.align == "center":
+            x += (self.w - tw) // 2
+        elif self.align == "right":
+            x += self.w - tw
+        scaled_text.draw(fb, text, x, self.y, self.scale, self.color)
+
+
+class Icon(Widget):
+    """图集中的图标，value为图标名"""
+
+    def __init__(self, x, y, name, scale=1, color=BLACK, opaque=False, **kw):
+        w, h = icons.size(name, scale)
+        super().__init__(x, y, w, h, name, **kw)
+        self.scale = scale
+        self.color = color
+        self.opaque = opaque
+
+    def draw(self, fb):
+        icons.draw(fb, self.value, self.x, self.y, self.scale, self.color, self.opaque)
+
+
+class Badge(Widget):
+    """实心底色、反色文字的小标签，区域随文本变化"""
+
+    def __init__(self, x, y, text="", padding=2, color=BLACK, **kw):
+        super().__init__(x, y, len(text) * 8 + padding * 2, 10 + padding * 2, text, **kw)
+        self.padding = padding
+        self.color = color
+
+    def set(self, value):
+        super().set(value)
+        self.w = len(self.value) * 8 + self.padding * 2
+
+    def draw(self, fb):
+        badge(fb, self.value, self.x, self.y, self.padding, self.color)
+
+
+class _Row(Widget):
+    def __init__(self, owner, index, x, y, w, h):
+        super().__init__(x, y, w, h, visible=False)
+        self.owner = owner
+        self.index = index
+
+    def draw(self, fb):
+        self.owner.draw_row(fb, self.value, self.index, self.x, self.y, self.w, self.h)
+
+
+class List:
+    """固定行高的列表，只重画内容变化的行
+
+    draw_row(fb, item, index, x, y, w, h) 负责绘制一行，item为set()传入的列表元素。
+    bind返回整个列表。添加到Screen时展开为各行控件；超出count的元素不显示。
+    """
+
+    def __init__(self, x, y, w, row_h, count, draw_row, bind=None):
+        self.draw_row = draw_row
+        self.bind = bind
+        self.rows = [_Row(self, i, x, y + i * row_h, w, row_h) for i in range(count)]
+
+    def update(self):
+        if self.bind is not None:
+            self.set(self.bind())
+
+    @property
+    def children(self):
+        return self.rows
+
+    def set(self, items):
+        """设置列表内容，元素需可比较(==)，相同的行不重画"""
+        n = len(items)
+        for i, row in enumerate(self.rows):
+            if i < n:
+                row.set(items[i])
+                row.show(True)
+            else:
+                row.show(False)
+
+
+class Screen:
+    """控件树的根，负责脏区域计算、重画和提交刷新
+
+    background为background.Background时，边框、分割线等静态元素由它绘制一次，
+    整屏重画和清空损坏区域时从背景复制，不再作为控件逐个重画；
+    背景没有缓存(background.cached为False)时每次都整屏重画。
+    """
+
+    def __init__(self, fb, width, height, bg=WHITE, background=None):
+        self.fb = fb
+        self.width = width
+        self.height = height
+        self.bg = bg
+        self.background = background
+        self.widgets = []
+        # 带children的控件组，update()时先读取组的绑定
+        self.groups = []
+        # 为True时下一次绘制重画整屏
+        self.full = True
+        # 最近一次绘制的损坏区域和重画的控件数
+        self.last_rects = []
+        self.last_drawn = 0
+
+    def add(self, widget):
+        """添加控件(或List等带children的组)，后添加的绘制在上层，返回该控件"""
+        children = getattr(widget, "children", None)
+        if children is not None:
+            self.groups.append(widget)
+            for w in children:
+                self.widgets.append(w)
+        else:
+            self.widgets.append(widget)
+        return widget
+
+    def invalidate(self):
+        """下一次绘制重画整屏"""
+        self.full = True
+
+    def update(self):
+        """读取所有控件的数据绑定"""
+        for g in self.groups:
+            g.update()
+        for w in self.widgets:
+            w.update()
+
+    def _damage(self):
+        rects = []
+        for w in self.widgets:
+            if not w.dirty:
+                continue
+            if w._drawn is not None:
+                rects.append(w._drawn)
+            if w.visible and w.rect != w._drawn:
+                rects.append(w.rect)
+        if len(rects) > MAX_RECTS:
+            r = rects[0]
+            for o in rects[1:]:
+                r = _union(r, o)
+            rects = [r]
+        return rects
+
+    def render(self):
+        """重画脏区域，返回损坏区域列表 [(x, y, w, h), ...]"""
+        fb = self.fb
+        bg = self.background
+        if not self.full and bg is not None and not bg.cached:
+            # 背景没有缓存(内存不足)时不能局部恢复，有损坏区域就整屏重画
+            self.full = bool(self._damage())
+        if self.full:
+            if bg is not None:
+                bg.paint()
+            else:
+                fb.fill(self.bg)
+            todo = [w for w in self.widgets if w.visible]
+            rects = [(0, 0, self.width, self.height)]
+        else:
+            rects = self._damage()
+            if not rects:
+                self.last_rects = rects
+                self.last_drawn = 0
+                return rects
+            if bg is not None:
+                restored = []
+                for r in rects:
+                    r = bg.restore(*r)
+                    if r is not None:
+                        restored.append(r)
+                rects = restored
+            else:
+                for x, y, w, h in rects:
+                    fb.fill_rect(x, y, w, h, self.bg)
+            # 与损坏区域相交的控件，以及被它们覆盖的后添加控件
+            todo = []
+            areas = list(rects)
+            for w in self.widgets:
+                if not w.visible:
+                    continue
+                own = w.areas()
+                if any(_intersects(r, a) for r in own for a in areas):
+                    todo.append(w)
+                    areas.extend(own)
+        for w in todo:
+            w.draw(fb)
+        for w in self.widgets:
+            w.dirty = False
+            w._drawn = w.rect if w.visible else None
+        self.full = False
+        self.last_rects = rects
+        self.last_drawn = len(todo)
+        return rects
+
+    def present(self, epd, buf, wait=True, callback=None):
+        """绘制并刷新，返回刷新方式 "none" / "partial" / "full"
+
+        整屏重画时交给display_auto()与上一帧比较(首帧或切换应用后)，
+        否则只把损坏区域交给display_regions()。
+        """
+        full = self.full
+        rects = self.render()
+        if full:
+            return epd.display_auto(buf, wait=wait, callback=callback)
+        return epd.display_regions(buf, rects, wait=wait, callback=callback)
@@ -1,19 +1,28 @@
-import epaper4in2
+import display_service
+import icons
+import bitmap_font
 import config
 import wifi
-import framebuf
+import log
 from time import sleep_ms
 
+# 信号图标 rssi0(极弱) ~ rssi8(极强) 打包在 icon_atlas.py 中，源图见 tool/icons/
+_RSSI_LEVELS = (-80, -75, -70, -65, -60, -55, -50, -40)
+
+
+def rssi_icon(rssi):
+    """返回RSSI对应的信号图标名"""
+    level = 0
+    for threshold in _RSSI_LEVELS:
+        if rssi > threshold:
+            level += 1
+    return "rssi%d" % level
+
+
 class WiFiDisplayApp:
     def __init__(self):
-        # 初始化墨水屏
-        self.e = epaper4in2.EPD(config.spi, config.cs, config.dc, config.rst, config.busy)
-        self.e.pwr_on()
-        self.e.init()
-        
-        # 创建帧缓冲区
-        self.buf = bytearray(config.WIDTH * config.HEIGHT // 8)
-        self.fb = framebuf.FrameBuffer(self.buf, config.WIDTH, config.HEIGHT, framebuf.MONO_HMSB)
+        # 借用共享的墨水屏和帧缓冲区
+        self.e, self.buf, self.fb = display_service.acquire()
         
         # 颜色定义
         self.BLACK = 0
@@ -33,9 +42,40 @@ class WiFiDisplayApp:
         self.text_width = config.WIDTH - 2 * self.margin
         self.text_height = config.HEIGHT - 2 * self.margin
         
+        # flash中的点阵字体，可以显示中文；没有字体文件时使用内置8x8字体和英文提示
+        self.font = None
+        path = getattr(config, 'FONT_PATH', 'font16.bin')
+        try:
+            self.font = bitmap_font.load(path)
+            self.font_height = self.font.height + 2
+            self.line_height = max(self.line_height, self.font.height + 2)
+        except (OSError, ValueError) as e:
+            log.info("未加载点阵字体 %s，使用内置字体: %s", path, e)
+        
         # 最大显示行数
         self.max_lines = self.text_height // self.line_height
         
+    def msg(self, cn, en):
+        """有点阵字体时返回中文文本，否则返回英文文本"""
+        return cn if self.font is not None else en
+        
+    def measure(self, text):
+        """文本绘制的宽度(像素)"""
+        if self.font is not None:
+            return self.font.width(text)
+        return len(text) * self.font_width
+        
+    def put_text(self, text, x, y):
+        """绘制一行文本，有点阵字体时用它绘制"""
+        if self.font is not None:
+            self.font.draw(self.fb, text, x, y, self.BLACK)
+        else:
+            self.fb.text(text, x, y, self.BLACK)
+            
+    def draw_centered(self, text, y):
+        """水平居中绘制一行文本"""
+        self.put_text(text, (config.WIDTH - self.measure(text)) // 2, y)
+        
     def clear_screen(self):
         """Clear screen to white"""
         self.fb.fill(self.WHITE)
@@ -43,7 +83,7 @@ class WiFiDisplayApp:
     def draw_title(self, title):
         """Draw title with decorative elements"""
         # 计算标题居中位置
-        title_width = len(title) * self.font_width
+        title_width = self.measure(title)
         x = (config.WIDTH - title_width) // 2
         
         # 绘制装饰线
@@ -51,7 +91,7 @@ class WiFiDisplayApp:
                     config.WIDTH - 2 * self.margin, self.BLACK)
         
         # 绘制标题
-        self.fb.text(title, x, self.margin + 3, self.BLACK)
+        self.put_text(title, x, self.margin + 3)
         
         # 绘制下划线
         self.fb.hline(self.margin, self.margin + self.font_height + 4, 
@@ -64,6 +104,13 @@ class WiFiDisplayApp:
         if max_width is None:
             max_width = self.text_width
             
+        # 点阵字体的字符宽度不一，按像素宽度换行
+        if self.font is not None:
+            for line in self.font.wrap(text, max_width):
+                self.font.draw(self.fb, line, x, y, self.BLACK)
+                y += self.line_height
+            return y
+            
         # 计算每行最大字符数
         max_chars = max_width // self.font_width
         
@@ -85,10 +132,11 @@ class WiFiDisplayApp:
     
     def draw_wifi_list(self, networks):
         """Draw WiFi list with signal icons and better formatting"""
-        y = self.draw_title("Available WiFi Networks")
+        y = self.draw_title(self.msg("可用的WiFi网络", "Available WiFi Networks"))
         
         # 显示找到的网络数量
-        self.draw_text(f"Found {len(networks)} networks:", self.margin, y)
+        self.draw_text(self.msg(f"找到{len(networks)}个网络:", f"Found {len(networks)} networks:"),
+                       self.margin, y)
         y += int(self.line_height * 1.5)  # 修复TypeError，确保为整数
         
         # 绘制分隔线
@@ -102,25 +150,8 @@ class WiFiDisplayApp:
             ssid = network[0].decode('utf-8') if isinstance(network[0], bytes) else network[0]
             rssi = network[3]
             
-            # 将RSSI转换为信号图标（使用二进制符号）
-            if rssi > -40:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x1F\x3F\xFF')  # 极强
-            elif rssi > -50:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x1F\x3F\x7F')  # 非常强
-            elif rssi > -55:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x1F\x3F\x5F')  # 强
-            elif rssi > -60:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x1F\x3F\x3F')  # 良好
-            elif rssi > -65:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x1F\x3F\x1F')  # 中等偏强
-            elif rssi > -70:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x1F\x1F\x1F')  # 中等
-            elif rssi > -75:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x1F\x0F\x0F')  # 中等偏弱
-            elif rssi > -80:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x0F\x0F\x0F')  # 弱
-            else:
-                icon = bytearray(b'\x00\x00\x00\x00\x03\x03\x03\x03')  # 极弱
+            # 将RSSI转换为信号图标
+            icon = rssi_icon(rssi)
                 
             # 显示网络名称和信号图标
             wifi_text = f"{ssid}"
@@ -129,14 +160,8 @@ class WiFiDisplayApp:
             # 绘制二进制信号图标
             icon_x = config.WIDTH - self.margin - 40  # 图标位置
             icon_height = 8
-            for row in range(icon_height):
-                byte_val = icon[row] if row < len(icon) else 0
-                for col in range(8):
-                    if byte_val & (0x80 >> col):
-                        x = icon_x + col
-                        y_pos = y - (icon_height - row) + 4  # 居中对齐
-                        if x < config.WIDTH - self.margin and y_pos >= 0:
-                            self.fb.pixel(x, y_pos, self.BLACK)
+            # 居中对齐
+            icons.draw(self.fb, icon, icon_x, y - icon_height + 4, 1, self.BLACK)
             
             y += self.line_height
             
@@ -172,11 +197,14 @@ class WiFiDisplayApp:
         ssid_x = (config.WIDTH - ssid_width) // 2
         ssid_y = 50  # 位置
         
-        # 绘制放大的WiFi名称
-        for i, char in enumerate(current_ssid):
-            x = ssid_x + i * large_font_width
-            # 使用简单的像素块绘制字符
-            self.fb.text(char, x, ssid_y, self.BLACK)
+        # 绘制放大的WiFi名称，有点阵字体时直接居中绘制(可显示中文名称)
+        if self.font is not None:
+            self.draw_centered(current_ssid, ssid_y)
+        else:
+            for i, char in enumerate(current_ssid):
+                x = ssid_x + i * large_font_width
+                # 使用简单的像素块绘制字符
+                self.fb.text(char, x, ssid_y, self.BLACK)
         
         # 绘制四条竖杠信号图标（居中显示）
         bar_width = 12  # 每条竖杠的宽度
@@ -234,20 +262,17 @@ class WiFiDisplayApp:
                     self.fb.pixel(x + px, bar_y_base - height, self.BLACK)
         
         # 显示连接成功状态（居中）
-        status_text = "Connected Successfully"
-        status_width = len(status_text) * self.font_width
-        status_x = (config.WIDTH - status_width) // 2
         status_y = bar_y_base + 30  # 位置
-        self.fb.text(status_text, status_x, status_y, self.BLACK)
+        self.draw_centered(self.msg("连接成功", "Connected Successfully"), status_y)
     
     def draw_connected_wifi(self):
         """Draw connected WiFi info with signal icon and better formatting"""
-        y = self.draw_title("Connected WiFi")
+        y = self.draw_title(self.msg("已连接的WiFi", "Connected WiFi"))
         
         # 获取WiFi信息
         ssid = wifi.wifi_manager.get_network_info()
         if not ssid:
-            self.draw_text("Cannot get WiFi info", self.margin, y)
+            self.draw_text(self.msg("无法获取WiFi信息", "Cannot get WiFi info"), self.margin, y)
             return
             
         # 获取当前连接的SSID
@@ -262,31 +287,12 @@ class WiFiDisplayApp:
         self.fb.hline(self.margin, y - 5, config.WIDTH - 2 * self.margin, self.BLACK)
         
         # 显示WiFi名称（居中显示）
-        ssid_width = len(current_ssid) * self.font_width
-        ssid_x = (config.WIDTH - ssid_width) // 2
-        self.fb.text(current_ssid, ssid_x, y + 10, self.BLACK)
+        self.draw_centered(current_ssid, y + 10)
         
         # 绘制放大的信号图标（居中显示）
         if rssi is not None:
-            # 将RSSI转换为信号图标（使用二进制符号）
-            if rssi > -40:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x1F\x3F\xFF')  # 极强
-            elif rssi > -50:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x1F\x3F\x7F')  # 非常强
-            elif rssi > -55:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x1F\x3F\x5F')  # 强
-            elif rssi > -60:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x1F\x3F\x3F')  # 良好
-            elif rssi > -65:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x1F\x3F\x1F')  # 中等偏强
-            elif rssi > -70:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x1F\x1F\x1F')  # 中等
-            elif rssi > -75:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x1F\x0F\x0F')  # 中等偏弱
-            elif rssi > -80:
-                icon = bytearray(b'\x00\x00\x00\x00\x0F\x0F\x0F\x0F')  # 弱
-            else:
-                icon = bytearray(b'\x00\x00\x00\x00\x03\x03\x03\x03')  # 极弱
+            # 将RSSI转换为信号图标
+            icon = rssi_icon(rssi)
             
             # 绘制放大的信号图标（4倍大小）
             icon_size = 4  # 放大倍数
@@ -295,17 +301,7 @@ class WiFiDisplayApp:
             icon_x = (config.WIDTH - icon_width * icon_size) // 2  # 居中
             icon_y = y + 40  # 位置
             
-            for row in range(icon_height):
-                byte_val = icon[row] if row < len(icon) else 0
-                for col in range(icon_width):
-                    if byte_val & (0x80 >> col):
-                        # 绘制放大的像素块
-                        for py in range(icon_size):
-                            for px in range(icon_size):
-                                x = icon_x + col * icon_size + px
-                                y_pos = icon_y + row * icon_size + py
-                                if x < config.WIDTH and y_pos < config.HEIGHT:
-                                    self.fb.pixel(x, y_pos, self.BLACK)
+            icons.draw(self.fb, icon, icon_x, icon_y, icon_size, self.BLACK)
             
             # 显示信号强度文字（居中）
             if rssi > -40:
@@ -333,16 +329,15 @@ class WiFiDisplayApp:
             self.fb.text(signal_text, text_x, icon_y + icon_height * icon_size + 10, self.BLACK)
             
             # 显示连接成功状态（居中）
-            status_text = "Connected Successfully"
-            status_width = len(status_text) * self.font_width
-            status_x = (config.WIDTH - status_width) // 2
-            self.fb.text(status_text, status_x, icon_y + icon_height * icon_size + 30, self.BLACK)
+            self.draw_centered(self.msg("连接成功", "Connected Successfully"),
+                               icon_y + icon_height * icon_size + 30)
     
     def draw_no_wifi_config(self):
         """Draw WiFi not configured prompt"""
-        y = self.draw_title("WiFi Not Configured")
+        y = self.draw_title(self.msg("WiFi未配置", "WiFi Not Configured"))
         
-        self.draw_text("Please set WiFi name and password in config.py", self.margin, y)
+        self.draw_text(self.msg("请在config.py中设置WiFi名称和密码",
+                                "Please set WiFi name and password in config.py"), self.margin, y)
         y += int(self.line_height * 1.5)  # 修复TypeError，确保为整数
         
         self.draw_text("WIFI_SSID = \"your_wifi_name\"", self.margin, y)
@@ -351,17 +346,23 @@ class WiFiDisplayApp:
         self.draw_text("WIFI_PASSWORD = \"your_wifi_password\"", self.margin, y)
         y += int(self.line_height * 1.5)  # 修复TypeError，确保为整数
         
-        self.draw_text("Restart device after configuration", self.margin, y)
+        self.draw_text(self.msg("配置后重启设备", "Restart device after configuration"), self.margin, y)
     
+    def close(self):
+        """关闭点阵字体文件并释放字形缓存，之后使用内置字体"""
+        if self.font is not None:
+            self.font.close()
+            self.font = None
+
     def run(self):
         """Run WiFi display app"""
-        print("WiFi display app started")
+        log.info("WiFi display app started")
         
         try:
             # 检查WiFi是否已配置
             if config.WIFI_SSID == "your_wifi_ssid":
                 # WiFi未配置，扫描并显示所有可用网络
-                print("WiFi not configured, scanning available networks")
+                log.info("WiFi not configured, scanning available networks")
                 try:
                     networks = wifi.wifi_manager.scan_networks()
                     # 按信号强度排序
@@ -371,7 +372,7 @@ class WiFiDisplayApp:
                     # 使用全屏刷新
                     self.e.display_frame(self.buf, global_refresh=True)
                 except Exception as e:
-                    print(f"扫描网络时出错: {e}")
+                    log.error("扫描网络时出错: %s", e)
                     self.clear_screen()
                     self.draw_text("WiFi扫描失败", self.margin, 50)
                     self.draw_text(f"错误: {str(e)}", self.margin, 80)
@@ -379,14 +380,14 @@ class WiFiDisplayApp:
                 return
                 
             # 尝试连接WiFi
-            print("Trying to connect to WiFi")
+            log.info("Trying to connect to WiFi")
             try:
                 if wifi.wifi_manager.connect():
-                    print("WiFi connected successfully")
+                    log.info("WiFi connected successfully")
                     # 显示WiFi连接成功界面
                     self.draw_wifi_success()
                 else:
-                    print("WiFi connection failed, showing available networks")
+                    log.warn("WiFi connection failed, showing available networks")
                     # 连接失败，显示所有可用网络
                     try:
                         networks = wifi.wifi_manager.scan_networks()
@@ -395,14 +396,14 @@ class WiFiDisplayApp:
                         self.clear_screen()
                         self.draw_wifi_list(networks)
                     except Exception as e:
-                        print(f"连接失败后扫描网络时出错: {e}")
+                        log.error("连接失败后扫描网络时出错: %s", e)
                         self.clear_screen()
                         self.draw_text("WiFi连接失败", self.margin, 50)
                         self.draw_text("网络扫描也失败", self.margin, 80)
                         self.e.display_frame(self.buf, global_refresh=True)
                         return
             except Exception as e:
-                print(f"WiFi连接过程中出错: {e}")
+                log.error("WiFi连接过程中出错: %s", e)
                 self.clear_screen()
                 self.draw_text("WiFi连接出错", self.margin, 50)
                 self.draw_text(f"错误: {str(e)}", self.margin, 80)
@@ -417,13 +418,16 @@ class WiFiDisplayApp:
             # 使用全屏刷新显示内容
             self.e.display_frame(self.buf, global_refresh=True)
             
-            print("WiFi display app completed")
+            log.info("WiFi display app completed")
         except Exception as e:
-            print(f"WiFi显示应用运行时出错: {e}")
+            log.error("WiFi显示应用运行时出错: %s", e)
             self.clear_screen()
             self.draw_text("应用运行出错", self.margin, 50)
             self.draw_text(f"错误: {str(e)}", self.margin, 80)
             self.e.display_frame(self.buf, global_refresh=True)
+        finally:
+            # 显示完成后不再绘制文本，关闭字体文件
+            self.close()
 
 # 创建全局应用实例
 